@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import os
+import random
+import sys
+import time
+from typing import Callable
+
+# Compares one Qt draw call for a whole batch with a loop of one call per item, for the primitives of
+# utils.rendering. The batches in there use whatever comes out fastest here:
+#   python benchmarks/draw_calls.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtGui import QImage, QPainter, QColor, QPolygonF, QPainterPath
+from PySide6.QtCore import Qt, QLineF, QRectF, QPointF
+
+import utils.colors as Colors
+
+def best_of(draw, antialiasing: bool, repeats: int = 5) -> float:
+    # The fastest of repeats runs in milliseconds, on a fresh image every time
+    image = QImage(800, 800, QImage.Format_ARGB32_Premultiplied)
+    best = float('inf')
+    for _ in range(repeats):
+        image.fill(QColor('white'))
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing, antialiasing)
+        start = time.perf_counter()
+        draw(painter)
+        best = min(best, time.perf_counter() - start)
+        painter.end()
+    return 1000 * best
+
+def lines(count: int) -> dict[str, tuple[Callable, Callable]]:
+    # short lines, like the edges of a network
+    segments = []
+    for _ in range(count):
+        x, y = random.uniform(0, 800), random.uniform(0, 800)
+        segments.append(QLineF(x, y, x + random.uniform(-20, 20), y + random.uniform(-20, 20)))
+    cases = {}
+    for width in (1, 3):
+        def batch(painter, width=width):
+            painter.setPen(Colors.pen(Colors.TEAL, width))
+            painter.drawLines(segments)
+
+        def loop(painter, width=width):
+            painter.setPen(Colors.pen(Colors.TEAL, width))
+            draw_line = painter.drawLine
+            for segment in segments:
+                draw_line(segment)
+        cases[f'lines width {width}'] = (batch, loop)
+    return cases
+
+def points(count: int) -> dict[str, tuple[Callable, Callable]]:
+    # markers of radius 3, the batch draws them as points with a round pen of the same size
+    rectangles = [QRectF(random.uniform(0, 800), random.uniform(0, 800), 6, 6) for _ in range(count)]
+
+    def batch(painter):
+        painter.setPen(Colors.pen(Colors.MAROON, 6))
+        painter.drawPoints([rectangle.center() for rectangle in rectangles])
+
+    def loop(painter):
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(Colors.brush(Colors.MAROON))
+        draw_ellipse = painter.drawEllipse
+        for rectangle in rectangles:
+            draw_ellipse(rectangle)
+    return {'points': (batch, loop)}
+
+def polygons(count: int) -> dict[str, tuple[Callable, Callable]]:
+    # small pentagons, like voronoi cells, the batch fills them as one path
+    shapes = []
+    for _ in range(count):
+        x, y = random.uniform(0, 800), random.uniform(0, 800)
+        shapes.append(QPolygonF([QPointF(x + 10 * dx, y + 10 * dy) for dx, dy in ((0, 0), (1, 0), (1.3, 1), (0.5, 1.6), (-0.3, 1))]))
+
+    def batch(painter):
+        painter.setPen(Colors.pen(Colors.GREY, 1))
+        painter.setBrush(Colors.brush(Colors.WHITE))
+        path = QPainterPath()
+        for shape in shapes:
+            path.addPolygon(shape)
+            path.closeSubpath()
+        painter.drawPath(path)
+
+    def loop(painter):
+        painter.setPen(Colors.pen(Colors.GREY, 1))
+        painter.setBrush(Colors.brush(Colors.WHITE))
+        draw_polygon = painter.drawPolygon
+        for shape in shapes:
+            draw_polygon(shape)
+    return {'polygons': (batch, loop)}
+
+def main(count: int = 3000):
+    random.seed(1)
+    cases = {**lines(count), **points(count), **polygons(count)}
+    print(f"{count} primitives, best of 5 in ms")
+    print(f"{'':20s} {'antialiasing':>12s} {'one call':>10s} {'loop':>10s}")
+    for name, (batch, loop) in cases.items():
+        for antialiasing in (False, True):
+            print(f"{name:20s} {str(antialiasing):>12s} {best_of(batch, antialiasing):10.1f} {best_of(loop, antialiasing):10.1f}")
+
+if __name__ == "__main__":
+    from PySide6.QtGui import QGuiApplication
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QGuiApplication([])
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000)
@@ -1,9 +1,15 @@
 from PySide6.QtWidgets import QWidget
-from PySide6.QtGui import QPixmap, QPainter, QColor, QPen, QMouseEvent, QWheelEvent
-from PySide6.QtCore import Qt, QSize
+from PySide6.QtGui import QPixmap, QPainter, QColor, QPen, QMouseEvent, QWheelEvent, QPicture, QCloseEvent, QKeyEvent
+from PySide6.QtCore import Qt, QSize, QTimer
 import random
+import math
+import time
 
 from utils.shapes import Line, Point, Rectangle
+from utils.vectors import Matrix
+from utils.rendering import SceneIndex
+from utils.background import BackgroundCompute
+from utils.metrics import METRICS
 import utils.colors as Color
 
 class Canvas(QWidget): 
@@ -23,9 +29,41 @@ class Canvas(QWidget):
         self.x_axis: Line = Line(Point(-1, 0), Point(1, 0))
         self.y_axis: Line = Line(Point(0, -1), Point(0, 1))
 
+        # Scenes add their drawables to this index, only the ones inside the view box get drawn
+        self.scene_index: SceneIndex = SceneIndex()
+
+        # The scene is recorded once into a QPicture for an area around the view (cache_margin view sizes to every
+        # side) and replayed on pan and zoom. It is recorded again when it is dirty (scenes call mark_dirty after
+        # their data changed), when the view leaves that area or when the zoom gets in another zoom band
+        self.scene_cache: QPicture | None = None
+        self.cache_bounds: tuple[float, float, float, float] | None = None
+        self.cache_band: int | None = None
+        self.cache_margin: float = 0.5
+        self.dirty: bool = True
+        # the number of primitives in the recording
+        self.cache_primitives: int = 0
+
+        # Input only changes the pan and zoom and asks for a frame, the frame timer then renders once for everything
+        # that came in since the last frame, and never more often than max_fps frames per second
+        self.max_fps: float = 60
+        self.last_frame: float = 0.0
+        self.frame_timer: QTimer = QTimer(self)
+        self.frame_timer.setSingleShot(True)
+        self.frame_timer.timeout.connect(self.render_frame)
+
+        # Scenes that take long to compute run the work here instead of in set_up_scene and draw what is done so far
+        self.background: BackgroundCompute = BackgroundCompute()
+
+        # Every frame is timed per phase in METRICS, F3 shows them on the canvas and metrics_path gets them as json
+        # when the canvas closes
+        self.show_metrics: bool = False
+        self.metrics_path: str | None = None
+        self.setFocusPolicy(Qt.StrongFocus)
+
         self.create_viewbox()
         # For each scene this can be edited
-        self.set_up_scene()
+        with METRICS.measure(f'set_up_scene {type(self).__name__}'): 
+            self.set_up_scene()
     
     def set_up_scene(self): 
         pass 
@@ -33,11 +71,11 @@ class Canvas(QWidget):
     def render_scene(self, painter: QPainter): 
         pass 
 
-    def create_viewbox(self): 
+    def create_viewbox(self, margin: float = 0): 
         # We calculate the bounds of the viewbox after transformation to world coordinates
-        # Convert screen pixels to world units using zoom
-        half_width = self.size.width() / (2 * self.zoom)
-        half_height = self.size.height() / (2 * self.zoom)
+        # Convert screen pixels to world units using zoom, margin grows the box by that many view sizes to every side
+        half_width = (1 + 2 * margin) * self.size.width() / (2 * self.zoom)
+        half_height = (1 + 2 * margin) * self.size.height() / (2 * self.zoom)
 
         # In world coordinates, pan_offset moves the center
         center_x = -1 * self.pan_offset.x() / self.zoom
@@ -58,28 +96,132 @@ class Canvas(QWidget):
         # Flip y-axis 
         painter.scale(self.zoom, -self.zoom)
 
+    def view_transform(self) -> Matrix: 
+        # The same mapping as to_view_coordinates as a 3x3 matrix, from world coordinates to pixels
+        new_center = Point(self.size.width() / 2, self.size.height() / 2) + self.pan_offset
+        return Matrix.translation(new_center.x(), new_center.y()) @ Matrix.scaling(self.zoom, -self.zoom)
+
+    def to_world_coordinates(self, point: Point) -> Point: 
+        # The inverse of to_view_coordinates, for a position in pixels on the widget
+        # it runs on every mouse move, so no matrix is made and inverted for it
+        center = Point(self.size.width() / 2, self.size.height() / 2) + self.pan_offset
+        return Point((point.x() - center.x()) / self.zoom, (center.y() - point.y()) / self.zoom)
+
+    def zoom_band(self) -> int: 
+        # The detail of what is drawn may only change between zoom bands, a band is a factor 2 in zoom
+        return math.floor(math.log2(self.zoom))
+
+    def mark_dirty(self): 
+        # The scene data changed, so the recorded scene is out of date
+        self.dirty = True
+
+    def cache_valid(self) -> bool: 
+        if self.dirty or self.scene_cache is None or self.cache_band != self.zoom_band(): 
+            return False
+        min_x, min_y, max_x, max_y = self.view_box.bounds()
+        cache_min_x, cache_min_y, cache_max_x, cache_max_y = self.cache_bounds
+        return cache_min_x <= min_x and cache_min_y <= min_y and max_x <= cache_max_x and max_y <= cache_max_y
+
+    def record_scene(self): 
+        # Records render_scene and the scene index for the view box grown by cache_margin, in world coordinates
+        self.create_viewbox(self.cache_margin)
+        self.scene_cache = QPicture()
+        painter = QPainter(self.scene_cache)
+        painter.setRenderHint(QPainter.Antialiasing)
+        self.render_scene(painter)
+        self.cache_primitives = self.scene_index.draw(painter, self.view_box, self.zoom_band())
+        painter.end()
+        METRICS.count('recordings')
+
+        self.cache_bounds = self.view_box.bounds()
+        self.cache_band = self.zoom_band()
+        self.dirty = False
+        self.create_viewbox()
+
     def draw_axis_lines(self, painter: QPainter):    
         self.x_axis.draw_inf(painter, self.view_box, thickness=1, color=Color.GREY, pen_style=Qt.PenStyle.DashLine)
         self.y_axis.draw_inf(painter, self.view_box, thickness=1, color=Color.GREY, pen_style=Qt.PenStyle.DashLine)
 
+    def request_frame(self): 
+        # Renders at the next frame, requests before that frame are all handled by it
+        if self.frame_timer.isActive(): 
+            return
+        wait = self.last_frame + 1 / self.max_fps - time.perf_counter()
+        self.frame_timer.start(max(0, math.ceil(1000 * wait)))
+
+    def prepare_frame(self): 
+        # Scenes can apply input that was collected since the last frame here
+        pass
+
+    def render_frame(self): 
+        self.last_frame = time.perf_counter()
+        self.prepare_frame()
+        self.render()
+
     def render(self): 
-        self.pixmap.fill(QColor('white'))
-        painter = QPainter(self.pixmap)
+        with METRICS.frame(): 
+            self.pixmap.fill(QColor('white'))
+            painter = QPainter(self.pixmap)
+            self.paint(painter)
+            if self.show_metrics: 
+                self.draw_metrics(painter)
+            painter.end()
+
+        # Triggers the PaintEvent 
+        self.update()
+
+    def paint(self, painter: QPainter, cached: bool = True): 
+        # Paints the view on any paint device of the canvas size, without cached the scene is drawn directly,
+        # for a device that keeps the drawing commands (like an svg) where a replay would also hold all the cache margin
         painter.setRenderHint(QPainter.Antialiasing)
 
         # Transform from world to view coordinates (based on current panning and zooming info)
-        self.to_view_coordinates(painter)
-        self.create_viewbox()
+        with METRICS.phase('viewbox'): 
+            self.to_view_coordinates(painter)
+            self.create_viewbox()
         
         # Draw the x and y axis 
         if self.draw_axis: 
-            self.draw_axis_lines(painter)
+            with METRICS.phase('axis'): 
+                self.draw_axis_lines(painter)
 
-        # Draw the current scene 
-        self.render_scene(painter)
+        if not cached: 
+            with METRICS.phase('scene'): 
+                self.render_scene(painter)
+                METRICS.count('primitives', self.scene_index.draw(painter, self.view_box, self.zoom_band()))
+            return
 
-        # Triggers the PaintEvent 
-        self.update()
+        # Draw the current scene, from the recording if it is still up to date
+        if not self.cache_valid(): 
+            with METRICS.phase('record'): 
+                self.record_scene()
+        with METRICS.phase('scene'): 
+            painter.drawPicture(0, 0, self.scene_cache)
+        METRICS.count('primitives', self.cache_primitives)
+
+    def draw_metrics(self, painter: QPainter): 
+        # The timings of the last frame in the top left corner, in pixels
+        lines = METRICS.lines()
+        painter.resetTransform()
+        metrics = painter.fontMetrics()
+        height = metrics.height()
+        width = max(metrics.horizontalAdvance(line) for line in lines)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(255, 255, 255, 220))
+        painter.drawRect(4, 4, width + 12, height * len(lines) + 8)
+        painter.setPen(Color.pen(QColor('black')))
+        for i, line in enumerate(lines): 
+            painter.drawText(10, 8 + metrics.ascent() + i * height, line)
+
+    def fit_view(self, bounds: tuple[float, float, float, float], padding: float = 0.05): 
+        # Pans and zooms such that bounds (min_x, min_y, max_x, max_y in world coordinates) fills the view,
+        # with padding of the view size around it
+        min_x, min_y, max_x, max_y = bounds
+        width, height = max(max_x - min_x, 1e-9), max(max_y - min_y, 1e-9)
+        self.zoom = (1 - 2 * padding) * min(self.size.width() / width, self.size.height() / height)
+        # the inverse of the center in create_viewbox
+        self.pan_offset = Point(-self.zoom * (min_x + max_x) / 2, self.zoom * (min_y + max_y) / 2)
+        self.create_viewbox()
 
     def wheelEvent(self, event: QWheelEvent):
         # Zoom toward mouse position
@@ -91,12 +233,21 @@ class Canvas(QWidget):
         # Clamp the zoom such that it can not go forever small or large
         self.zoom = max(0.1, min(self.zoom, 10.0))
 
-        self.render()
+        self.request_frame()
 
     def paintEvent(self, event):
-        painter = QPainter(self)
-        # We draw the pixmap onto the QWidget canvas 
-        painter.drawPixmap(0, 0, self.pixmap)
+        with METRICS.phase('blit'): 
+            painter = QPainter(self)
+            # We draw the pixmap onto the QWidget canvas 
+            painter.drawPixmap(0, 0, self.pixmap)
+            painter.end()
+
+    def keyPressEvent(self, event: QKeyEvent):
+        if event.key() == Qt.Key_F3: 
+            self.show_metrics = not self.show_metrics
+            self.request_frame()
+        else: 
+            super().keyPressEvent(event)
     
     def mousePressEvent(self, event: QMouseEvent):
         if event.button() == Qt.LeftButton:
@@ -108,8 +259,15 @@ class Canvas(QWidget):
             delta: Point = current_pos - self.last_mouse_pos
             self.pan_offset += delta
             self.last_mouse_pos = current_pos
-            self.render()
+            self.request_frame()
 
     def mouseReleaseEvent(self, event: QMouseEvent):
         if event.button() == Qt.LeftButton:
             self.last_mouse_pos = None
+
+    def closeEvent(self, event: QCloseEvent):
+        # A computation that is still running is of no use anymore
+        self.background.cancel()
+        if self.metrics_path is not None: 
+            METRICS.dump(self.metrics_path, frames=True)
+        super().closeEvent(event)
@@ -1,6 +1,8 @@
 from PySide6.QtWidgets import QApplication, QMainWindow, QHBoxLayout
 from PySide6.QtCore import QSize
+from PySide6.QtGui import QCloseEvent
 import sys 
+import os
 
 from canvas import Canvas
 import scenes.scene as Scene 
@@ -16,12 +18,19 @@ class MainWindow(QMainWindow):
         self.setMinimumSize(self.window_size)
 
         self.canvas = Scene.VoronoiDiagramScene(self.window_size, draw_axis=True)
+        # the timings of the session are written here when the window closes (see utils.metrics)
+        self.canvas.metrics_path = os.environ.get('PLAYGROUND_METRICS')
         self.setCentralWidget(self.canvas)
         layout = QHBoxLayout(self.canvas)
         self.setLayout(layout)
 
         self.canvas.render()
 
+    def closeEvent(self, event: QCloseEvent): 
+        # the canvas is not closed with the window by itself
+        self.canvas.close()
+        super().closeEvent(event)
+
     def update(self): 
         self.canvas()
 
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Without a display Qt still has to paint, the offscreen platform does that in memory. It has to be set before
+# the first QApplication, also in every worker process
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QPainter, QColor, QImage
+from PySide6.QtSvg import QSvgGenerator
+from PySide6.QtCore import QSize, QRect
+
+from canvas import Canvas
+from utils.shapes import Point
+from utils.metrics import METRICS
+import scenes.scene as Scene
+
+# Renders scenes without a window, to png or svg:
+#   python render.py VoronoiDiagramScene out.png --size 1280x700 --zoom 2.5 --pan 0,0
+#   python render.py FileScene map.svg --input network.bin --fit
+# and with --batch every file of a directory to one image each, over a pool of processes:
+#   python render.py FileScene out_directory --batch inputs_directory --format png --fit --workers 8
+FORMATS: tuple[str] = ('png', 'svg')
+
+def application() -> QApplication:
+    # Widgets need a QApplication, there is at most one per process
+    return QApplication.instance() or QApplication([])
+
+def create_scene(scene: str, size: QSize, draw_axis: bool = True, path: str | os.PathLike | None = None) -> Canvas:
+    scene_class = getattr(Scene, scene, None)
+    if not isinstance(scene_class, type) or not issubclass(scene_class, Canvas):
+        raise ValueError(f"Unknown scene {scene}")
+    if path is not None:
+        return scene_class(size, draw_axis, path=path)
+    return scene_class(size, draw_axis)
+
+def finish_background(canvas: Canvas, timeout: float = 600):
+    # Scenes that compute in the background are rendered once everything arrived
+    app = application()
+    start = time.perf_counter()
+    while canvas.background.running():
+        if time.perf_counter() - start > timeout:
+            canvas.background.cancel()
+            raise TimeoutError(f"The scene did not finish in {timeout} seconds")
+        app.processEvents()
+        canvas.background.wait(10)
+    # the last chunks can still be queued
+    app.processEvents()
+
+def save_canvas(canvas: Canvas, output: str | os.PathLike):
+    # Saves the view of the canvas to output, the format follows from the extension. The painter is always ended,
+    # a paint device that is destroyed while it is painted on brings the whole process down, and a file that
+    # was not finished is removed
+    extension = os.path.splitext(output)[1].lower().lstrip('.')
+    if extension not in FORMATS:
+        raise ValueError(f"Unknown format {extension}, choose one of {FORMATS}")
+    try:
+        if extension == 'svg':
+            generator = QSvgGenerator()
+            generator.setFileName(os.fspath(output))
+            generator.setSize(canvas.size)
+            generator.setViewBox(QRect(0, 0, canvas.size.width(), canvas.size.height()))
+            painter = QPainter(generator)
+            try:
+                painter.fillRect(0, 0, canvas.size.width(), canvas.size.height(), QColor('white'))
+                canvas.paint(painter, cached=False)
+            finally:
+                with METRICS.phase('save'):
+                    painter.end()
+            return
+        image = QImage(canvas.size, QImage.Format_ARGB32_Premultiplied)
+        image.fill(QColor('white'))
+        painter = QPainter(image)
+        try:
+            canvas.paint(painter, cached=False)
+        finally:
+            painter.end()
+        with METRICS.phase('save'):
+            saved = image.save(os.fspath(output))
+        if not saved:
+            raise ValueError(f"Could not write {output}")
+    except BaseException:
+        if os.path.exists(output):
+            os.remove(output)
+        raise
+
+def render(scene: str, output: str | os.PathLike, size: tuple[int, int] = (1280, 700), zoom: float | None = None,
+           pan: tuple[float, float] = (0, 0), fit: bool = False, draw_axis: bool = True, path: str | os.PathLike | None = None,
+           metrics: bool = False) -> str:
+    # Renders one scene to output, fit zooms to everything in the scene and goes before zoom and pan. With metrics
+    # the timings of the builds and of the render are written next to output as json
+    METRICS.reset()
+    application()
+    canvas = create_scene(scene, QSize(*size), draw_axis, path)
+    finish_background(canvas)
+    if fit and canvas.scene_index.bounds() is not None:
+        canvas.fit_view(canvas.scene_index.bounds())
+    else:
+        canvas.pan_offset = Point(*pan)
+        if zoom is not None:
+            canvas.zoom = zoom
+    with METRICS.frame():
+        save_canvas(canvas, output)
+    if metrics:
+        METRICS.dump(f"{os.path.splitext(output)[0]}.json", frames=True)
+    return os.fspath(output)
+
+def render_batch(scene: str, inputs: list[str | os.PathLike], directory: str | os.PathLike, image_format: str = 'png',
+                 workers: int | None = None, **options) -> list[str]:
+    # Renders every input to directory/<name of the input>.<image_format>, every worker process renders a job at a time with
+    # its own QApplication. The failed jobs are reported and the images that were made are returned
+    os.makedirs(directory, exist_ok=True)
+    outputs, failed = [], []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        futures = {executor.submit(render, scene, os.path.join(directory, f"{os.path.splitext(os.path.basename(path))[0]}.{image_format}"),
+                                   path=path, **options): path for path in inputs}
+        for future in as_completed(futures):
+            try:
+                outputs.append(future.result())
+            except Exception as error:
+                failed.append(futures[future])
+                print(f"Failed to render {futures[future]}: {error}", file=sys.stderr)
+    if failed:
+        print(f"{len(failed)} of {len(inputs)} inputs failed", file=sys.stderr)
+    return sorted(outputs)
+
+def parse_pair(text: str, cast: type) -> tuple:
+    values = text.replace('x', ',').split(',')
+    if len(values) != 2:
+        raise argparse.ArgumentTypeError(f"Expected two values, like 1280x700 or 0,0, got {text}")
+    return tuple(cast(value) for value in values)
+
+def main(arguments: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Render a scene without a window to png or svg")
+    parser.add_argument('scene', help="name of a scene class in scenes/scene.py, like VoronoiDiagramScene or FileScene")
+    parser.add_argument('output', help="the image to write, or the directory of the images with --batch")
+    parser.add_argument('--size', type=lambda text: parse_pair(text, int), default=(1280, 700), help="width x height in pixels")
+    parser.add_argument('--zoom', type=float, default=None)
+    parser.add_argument('--pan', type=lambda text: parse_pair(text, float), default=(0, 0), help="pan offset in pixels, x,y")
+    parser.add_argument('--fit', action='store_true', help="zoom to fit everything in the scene")
+    parser.add_argument('--no-axis', dest='draw_axis', action='store_false')
+    parser.add_argument('--input', help="the file a FileScene shows")
+    parser.add_argument('--batch', metavar='DIRECTORY', help="render every file in this directory")
+    parser.add_argument('--format', choices=FORMATS, default='png', help="image format with --batch")
+    parser.add_argument('--workers', type=int, default=None, help="processes with --batch, all cores by default")
+    parser.add_argument('--metrics', action='store_true', help="write the timings of every image to a json file next to it")
+    options = parser.parse_args(arguments)
+
+    settings = dict(size=options.size, zoom=options.zoom, pan=options.pan, fit=options.fit, draw_axis=options.draw_axis, metrics=options.metrics)
+    if options.batch is None:
+        print(render(options.scene, options.output, path=options.input, **settings))
+        return
+    inputs = sorted(entry.path for entry in os.scandir(options.batch) if entry.is_file())
+    outputs = render_batch(options.scene, inputs, options.output, options.format, options.workers, **settings)
+    print(f"Rendered {len(outputs)} of {len(inputs)} inputs to {options.output}")
+    if len(outputs) < len(inputs):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,17 @@
 
-from PySide6.QtGui import QPainter
-from PySide6.QtCore import QTimer
+from PySide6.QtGui import QPainter, QMouseEvent, QKeyEvent
+from PySide6.QtCore import QTimer, Qt
 import random 
-import time
+import os
 
 from canvas import Canvas
-from utils.network import Network, Vertex, VoronoiDiagram, VoronoiCell
+from utils.network import Network, Vertex, VoronoiDiagram, VoronoiCell, EDGE_BATCH, VERTEX_BATCH, CELL_BATCH, SITE_BATCH
 from utils.shapes import Point, Line, HalfPlane, ComplexPolygon
 import utils.colors as Colors
 from utils.geometry import half_plane_intersection
+from utils.layout import ForceLayout
+from utils.storage import read_header, load_network, load_voronoi
+from utils.importer import import_csv, import_geojson
 
 
 class BisectorScene(Canvas): 
@@ -41,9 +44,38 @@ class NetworkScene(Canvas):
     
     def set_up_scene(self): 
         self.network = Network.create_random()
+        self.scene_index.add_layer(self.network.edges, batch=EDGE_BATCH)
+        self.scene_index.add_layer(self.network.vertices, batch=VERTEX_BATCH)
+
+class FileScene(Canvas): 
+    '''
+    Draws a network or voronoi diagram from a file: one saved with utils.storage, a geojson file or a csv of
+    stations (id, lon, lat)
+    '''
+
+    def __init__(self, size, draw_axis = True, path: str | os.PathLike = ''):
+        # set_up_scene runs in the constructor of the canvas, so the path has to be there before it
+        self.path: str | os.PathLike = path
+        super().__init__(size, draw_axis)
+
+    def set_up_scene(self): 
+        extension = os.path.splitext(self.path)[1].lower()
+        if extension in ('.geojson', '.json'): 
+            self.set_network(import_geojson(self.path).network())
+        elif extension == '.csv': 
+            self.set_network(import_csv(self.path).network())
+        elif read_header(self.path)['kind'] == 'voronoi': 
+            self.voronoi_diagram = load_voronoi(self.path)
+            self.scene_index.add_layer(self.voronoi_diagram.voronoi_cells, batch=CELL_BATCH)
+            self.scene_index.add_layer(self.voronoi_diagram.vertices, batch=SITE_BATCH)
+        else: 
+            self.set_network(load_network(self.path))
+
+    def set_network(self, network: Network): 
+        self.network = network
+        self.scene_index.add_layer(self.network.edges, batch=EDGE_BATCH)
+        self.scene_index.add_layer(self.network.vertices, batch=VERTEX_BATCH)
 
-    def render_scene(self, painter: QPainter): 
-        self.network.draw(painter)
 
 class ClipPolygonScene(Canvas): 
 
@@ -72,10 +104,12 @@ class VoronoiCellScene(Canvas):
         self.others: list[Point] = [Point(20,30), Point(40,60), Point(80,50), Point(90,20), Point(40,10)]
         self.bisectors = [self.middle_point.bi_sector(other) for other in self.others]
         self.half_planes = [HalfPlane(bisector, self.middle_point - bisector.start) for bisector in self.bisectors]
-        self.voronoi_cell: ComplexPolygon = half_plane_intersection(self.half_planes)
+        # None when the half planes have nothing in common
+        self.voronoi_cell: ComplexPolygon | None = half_plane_intersection(self.half_planes)
 
     def render_scene(self, painter):
-        self.voronoi_cell.draw(painter, color=Colors.GREY)
+        if self.voronoi_cell is not None: 
+            self.voronoi_cell.draw(painter, color=Colors.GREY)
         self.middle_point.draw(painter)
         for point in self.others: 
             point.draw(painter)
@@ -104,15 +138,129 @@ class VoronoiCellSceneClass(Canvas):
 
 
 class VoronoiDiagramScene(Canvas): 
+    '''Voronoi diagram of random sites, a site can be dragged around with the right mouse button'''
 
     def __init__(self, size, draw_axis=True):
         super().__init__(size, draw_axis)
     
     def set_up_scene(self):
         self.points: list[Point] = [Point(random.randint(-800, 800), random.randint(-800, 800)) for _ in range(300)]
-        self.voronoi_diagram = VoronoiDiagram(self.points)
-        
-    def render_scene(self, painter):
-        self.voronoi_diagram.draw(painter)
+        self.voronoi_diagram = VoronoiDiagram(self.points, engine='fortune')
+        self.dragged_site: int | None = None
+        self.drag_target: Point | None = None
+
+        # the same as VoronoiDiagram.draw, but only what is in view
+        self.cell_layer = self.scene_index.add_layer(self.voronoi_diagram.voronoi_cells, batch=CELL_BATCH)
+        self.site_layer = self.scene_index.add_layer(self.voronoi_diagram.vertices, batch=SITE_BATCH)
+
+    def mousePressEvent(self, event: QMouseEvent):
+        if event.button() == Qt.RightButton:
+            position = self.to_world_coordinates(Point(event.position()))
+            self.dragged_site = self.voronoi_diagram.nearest_site(position, self.voronoi_diagram.last_site)
+        else: 
+            super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event: QMouseEvent):
+        if self.dragged_site is not None: 
+            # the site is moved once per frame, to where the mouse is by then
+            self.drag_target = self.to_world_coordinates(Point(event.position()))
+            self.request_frame()
+        else: 
+            super().mouseMoveEvent(event)
+
+    def prepare_frame(self): 
+        if self.dragged_site is None or self.drag_target is None: 
+            return
+        # only the cells around the site are updated
+        cell = self.voronoi_diagram.voronoi_cells[self.dragged_site]
+        changed = {self.dragged_site} | {other.vertex.label for other in cell.neighbours()}
+        try: 
+            self.voronoi_diagram.move_site(self.dragged_site, self.drag_target)
+        except ValueError: 
+            # dropped on top of another site, it stays where it was
+            self.drag_target = None
+            return
+        changed |= {other.vertex.label for other in cell.neighbours()}
+        self.cell_layer.update(sorted(changed))
+        self.site_layer.update([self.dragged_site])
+        self.drag_target = None
+        self.mark_dirty()
+
+    def mouseReleaseEvent(self, event: QMouseEvent):
+        if event.button() == Qt.RightButton:
+            # the last position may still wait for its frame
+            self.prepare_frame()
+            self.dragged_site = None
+            self.request_frame()
+        else: 
+            super().mouseReleaseEvent(event)
         
         
+
+
+class ProgressiveVoronoiScene(Canvas): 
+    '''
+    Voronoi diagram of many random sites that is computed in the background, the cells are drawn as they are done.
+    R gives new sites, which cancels the computation of the old ones.
+    '''
+
+    def __init__(self, size, draw_axis=True):
+        super().__init__(size, draw_axis)
+
+    def set_up_scene(self):
+        self.size_sites: int = 3000
+        self.start_diagram()
+
+    def start_diagram(self): 
+        points = [Point(random.uniform(-800, 800), random.uniform(-800, 800)) for _ in range(self.size_sites)]
+        # the sites show at once, their cells follow chunk by chunk
+        self.voronoi_diagram = VoronoiDiagram(points, engine='parallel', build=False)
+        self.finished_cells: list[VoronoiCell] = []
+        self.scene_index.clear()
+        self.cell_layer = self.scene_index.add_layer(self.finished_cells, batch=CELL_BATCH)
+        self.site_layer = self.scene_index.add_layer(self.voronoi_diagram.vertices, batch=SITE_BATCH)
+        self.mark_dirty()
+        self.request_frame()
+
+        diagram = self.voronoi_diagram
+        self.background.start(lambda: diagram.cell_chunks(chunk_size=100), self.add_chunk)
+
+    def add_chunk(self, chunk): 
+        self.finished_cells.extend(self.voronoi_diagram.add_cells(chunk))
+        self.cell_layer.invalidate()
+        self.mark_dirty()
+        self.request_frame()
+
+    def keyPressEvent(self, event: QKeyEvent):
+        if event.key() == Qt.Key_R: 
+            self.start_diagram()
+        else: 
+            super().keyPressEvent(event)
+
+
+class ForceLayoutScene(Canvas): 
+    '''Animates a force directed layout of a random network, one step of the layout per frame'''
+
+    def __init__(self, size, draw_axis=True):
+        super().__init__(size, draw_axis)
+    
+    def set_up_scene(self):
+        self.network = Network.create_random(size=300, max_range=500, connectivity=400)
+        self.layout = ForceLayout(self.network)
+        self.max_iterations: int = 300
+        self.scene_index.add_layer(self.network.edges, batch=EDGE_BATCH)
+        self.scene_index.add_layer(self.network.vertices, batch=VERTEX_BATCH)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.next_frame)
+        self.timer.start(16)
+
+    def next_frame(self): 
+        move = self.layout.step()
+        self.layout.apply()
+        if move < 1e-3 * self.layout.ideal_length or self.layout.iterations >= self.max_iterations: 
+            self.timer.stop()
+        # every vertex moved
+        self.scene_index.invalidate()
+        self.mark_dirty()
+        self.request_frame()
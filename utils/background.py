@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import threading
+import traceback
+from typing import Any, Callable, Iterator
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+# Scenes compute on a pool thread and show what is done so far. The work is a generator function: every value it
+# yields is sent to the GUI thread as a partial result, so drawing starts with the first chunk instead of after all
+# of them. Qt delivers the signals of a task to the thread its TaskSignals lives in, that is the GUI thread.
+
+class TaskSignals(QObject):
+    partial = Signal(object)
+    finished = Signal()
+    failed = Signal(str)
+    # always sent last, also after a cancel
+    closed = Signal()
+
+class GeneratorTask(QRunnable):
+    '''Runs generator() on a pool thread and emits every value it yields, until it is done or cancelled'''
+
+    def __init__(self, generator: Callable[[], Iterator[Any]]):
+        super().__init__()
+        self.generator: Callable[[], Iterator[Any]] = generator
+        self.signals: TaskSignals = TaskSignals()
+        self.cancelled: threading.Event = threading.Event()
+
+    def cancel(self):
+        # the generator stops at its next value, closing it also stops the work it started (see iter_voronoi_cells)
+        self.cancelled.set()
+
+    def run(self):
+        values = None
+        try:
+            values = self.generator()
+            for value in values:
+                if self.cancelled.is_set():
+                    return
+                self.signals.partial.emit(value)
+            if not self.cancelled.is_set():
+                self.signals.finished.emit()
+        except Exception:
+            if not self.cancelled.is_set():
+                self.signals.failed.emit(traceback.format_exc())
+        finally:
+            if values is not None and hasattr(values, 'close'):
+                values.close()
+            self.signals.closed.emit()
+
+class BackgroundCompute:
+    '''
+    One background computation at a time for a canvas. Starting another one cancels the one before, values
+    that it still sends after that are dropped, so a scene only ever sees results for its current input.
+    '''
+
+    def __init__(self, pool: QThreadPool | None = None):
+        self.pool: QThreadPool = pool or QThreadPool.globalInstance()
+        self.task: GeneratorTask | None = None
+        # cancelled tasks are kept until they closed, their signals must outlive the run on the pool thread
+        self.tasks: set[GeneratorTask] = set()
+
+    def start(self, generator: Callable[[], Iterator[Any]], on_partial: Callable[[Any], None],
+              on_finished: Callable[[], None] | None = None, on_failed: Callable[[str], None] | None = None) -> GeneratorTask:
+        self.cancel()
+        task = GeneratorTask(generator)
+        # the callbacks check that the task is still the current one, a signal can already be queued when it is cancelled
+        task.signals.partial.connect(lambda value: self.task is task and on_partial(value))
+        task.signals.finished.connect(lambda: self.done(task, on_finished))
+        task.signals.failed.connect(lambda message: self.done(task, on_failed, message))
+        task.signals.closed.connect(lambda: self.tasks.discard(task))
+        self.task = task
+        self.tasks.add(task)
+        self.pool.start(task)
+        return task
+
+    def done(self, task: GeneratorTask, callback: Callable | None, *args):
+        if self.task is not task:
+            return
+        self.task = None
+        if callback is not None:
+            callback(*args)
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def running(self) -> bool:
+        return self.task is not None
+
+    def wait(self, msecs: int = -1) -> bool:
+        # Blocks until every task of the pool is done, after a cancel this waits for the current chunk to end
+        return self.pool.waitForDone(msecs)
@@ -1,4 +1,5 @@
-from PySide6.QtGui import QColor
+from PySide6.QtGui import QColor, QPen, QBrush
+from PySide6.QtCore import Qt
 
 
 
@@ -23,3 +24,24 @@ APRICOT = QColor("#ffd8b1")  # Apricot
 NAVY = QColor("#000075")  # Navy
 GREY = QColor("#808080")  # Grey
 WHITE = QColor("#F0EAD6") # White 
+
+# Pens and brushes are made once per style and shared, so they must not be changed after they are handed out
+_pens: dict[tuple, QPen] = {}
+_brushes: dict[int, QBrush] = {}
+
+def pen(color: QColor, width: float = 1, style: Qt.PenStyle = Qt.PenStyle.SolidLine, cap: Qt.PenCapStyle = Qt.PenCapStyle.RoundCap) -> QPen: 
+    key = (color.rgba(), width, style, cap)
+    if key not in _pens: 
+        new = QPen()
+        new.setWidthF(width)
+        new.setColor(color)
+        new.setStyle(style)
+        new.setCapStyle(cap)
+        _pens[key] = new
+    return _pens[key]
+
+def brush(color: QColor) -> QBrush: 
+    key = color.rgba()
+    if key not in _brushes: 
+        _brushes[key] = QBrush(color)
+    return _brushes[key]
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+from utils.shapes import Point
+from utils.predicates import orientation, orientation_array
+from utils.network import Network
+
+def segments_intersect(p1: tuple[float, float], p2: tuple[float, float], q1: tuple[float, float], q2: tuple[float, float]) -> bool:
+    # Whether the closed segments p1 p2 and q1 q2 have a point in common, decided exactly
+    o1, o2 = orientation(p1, p2, q1), orientation(p1, p2, q2)
+    o3, o4 = orientation(q1, q2, p1), orientation(q1, q2, p2)
+    if o1 == o2 == o3 == o4 == 0:
+        # on one line, they overlap if their bounding boxes do
+        return (max(min(p1[0], p2[0]), min(q1[0], q2[0])) <= min(max(p1[0], p2[0]), max(q1[0], q2[0]))
+                and max(min(p1[1], p2[1]), min(q1[1], q2[1])) <= min(max(p1[1], p2[1]), max(q1[1], q2[1])))
+    return o1 * o2 <= 0 and o3 * o4 <= 0
+
+def intersection_point(p1: tuple[float, float], p2: tuple[float, float], q1: tuple[float, float], q2: tuple[float, float]) -> tuple[float, float]:
+    # A point shared by two intersecting segments, for overlapping segments the first end point that is on both
+    dx, dy = p2[0] - p1[0], p2[1] - p1[1]
+    ex, ey = q2[0] - q1[0], q2[1] - q1[1]
+    det = dx * ey - dy * ex
+    if det == 0:
+        for point in (q1, q2, p1, p2):
+            if all(min(s[k], e[k]) <= point[k] <= max(s[k], e[k]) for s, e in ((p1, p2), (q1, q2)) for k in (0, 1)):
+                return point
+        return p1
+    t = ((q1[0] - p1[0]) * ey - (q1[1] - p1[1]) * ex) / det
+    t = min(max(t, 0.0), 1.0)
+    return (p1[0] + t * dx, p1[1] + t * dy)
+
+class CrossingIndex:
+    '''
+    Finds the crossings between the edges of a Network. Two edges cross when they have a point in common
+    and do not share a vertex, so an edge that runs trough a station or over another edge counts as well.
+    The edges are put in a uniform grid, with an edge in every grid cell its bounding box covers, and only
+    edges in the same grid cell are tested, which takes O(n + k) for edges of about the same length.
+    After building, move_vertex moves a single vertex and only recounts the crossings of its edges.
+    '''
+
+    def __init__(self, network: Network, cell_size: float | None = None):
+        self.network: Network = network
+        self.points: np.ndarray = np.array([[vertex.point.x(), vertex.point.y()] for vertex in network.vertices], dtype=float).reshape(-1, 2)
+        edge_array = network.edge_array()
+        self.starts: np.ndarray = edge_array[:, 0].copy()
+        self.ends: np.ndarray = edge_array[:, 1].copy()
+
+        # the edges of every vertex
+        self.incident: list[list[int]] = [[] for _ in network.vertices]
+        for e, (u, v) in enumerate(zip(self.starts.tolist(), self.ends.tolist())):
+            self.incident[u].append(e)
+            if v != u:
+                self.incident[v].append(e)
+
+        low, high = self.bounds(np.arange(len(self.starts)))
+        if cell_size is None:
+            # about one edge length, so that an edge is in a few grid cells only
+            extent = (high - low).max(axis=1) if len(low) else np.zeros(0)
+            cell_size = float(extent.mean()) if len(extent) else 1.0
+        self.cell_size: float = cell_size if cell_size > 0 else 1.0
+        self.origin: np.ndarray = self.points.min(axis=0) if len(self.points) else np.zeros(2)
+
+        # crossings[e] holds the edges that cross edge e
+        self.crossings: list[set[int]] = [set() for _ in network.edges]
+        first, second = self.candidate_pairs(low, high)
+        first, second = self.test_pairs(first, second)
+        for e, f in zip(first.tolist(), second.tolist()):
+            self.crossings[e].add(f)
+            self.crossings[f].add(e)
+        self.total: int = len(first)
+        # grid cell -> edges in it, only needed (and built) once a vertex moves
+        self.buckets: dict[tuple[int, int], set[int]] | None = None
+
+    def bounds(self, edges: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        a, b = self.points[self.starts[edges]], self.points[self.ends[edges]]
+        return np.minimum(a, b), np.maximum(a, b)
+
+    def cells_of(self, low: np.ndarray, high: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # the grid cells from the bottom left to the top right cell of every bounding box
+        return (np.floor((low - self.origin) / self.cell_size).astype(np.int64),
+                np.floor((high - self.origin) / self.cell_size).astype(np.int64))
+
+    def candidate_pairs(self, low: np.ndarray, high: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # All pairs of edges (e < f) that share a grid cell, every pair only once
+        m = len(low)
+        if m < 2:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        low_cell, high_cell = self.cells_of(low, high)
+        spans = high_cell - low_cell + 1
+        counts = spans[:, 0] * spans[:, 1]
+        # one entry for every edge in every grid cell
+        edges = np.repeat(np.arange(m), counts)
+        k = np.arange(len(edges)) - np.repeat(np.cumsum(counts) - counts, counts)
+        cx = low_cell[edges, 0] + k % spans[edges, 0]
+        cy = low_cell[edges, 1] + k // spans[edges, 0]
+        order = np.lexsort((cy, cx))
+        edges, cx, cy = edges[order], cx[order], cy[order]
+
+        # entries of the same grid cell are next to each other, so we pair every entry with the ones d places further
+        firsts, seconds = [], []
+        for d in range(1, len(edges)):
+            same = (cx[:-d] == cx[d:]) & (cy[:-d] == cy[d:])
+            if not same.any():
+                break
+            firsts.append(edges[:-d][same])
+            seconds.append(edges[d:][same])
+        if not firsts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        first, second = np.concatenate(firsts), np.concatenate(seconds)
+        keys = np.unique(np.minimum(first, second) * m + np.maximum(first, second))
+        return keys // m, keys % m
+
+    def test_pairs(self, first: np.ndarray, second: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # Keeps the pairs of edges that cross
+        u1, v1, u2, v2 = self.starts[first], self.ends[first], self.starts[second], self.ends[second]
+        keep = (u1 != u2) & (u1 != v2) & (v1 != u2) & (v1 != v2)
+        low1, high1 = self.bounds(first)
+        low2, high2 = self.bounds(second)
+        keep &= np.all((low1 <= high2) & (low2 <= high1), axis=1)
+        first, second = first[keep], second[keep]
+        p1, p2 = self.points[self.starts[first]], self.points[self.ends[first]]
+        q1, q2 = self.points[self.starts[second]], self.points[self.ends[second]]
+
+        o1, o2 = orientation_array(p1, p2, q1), orientation_array(p1, p2, q2)
+        o3, o4 = orientation_array(q1, q2, p1), orientation_array(q1, q2, p2)
+        # the bounding boxes overlap, so collinear segments overlap as well
+        cross = (o1 * o2 <= 0) & (o3 * o4 <= 0)
+        return first[cross], second[cross]
+
+    def segment(self, e: int) -> tuple[tuple[float, float], tuple[float, float]]:
+        return tuple(self.points[self.starts[e]].tolist()), tuple(self.points[self.ends[e]].tolist())
+
+    def count(self) -> int:
+        return self.total
+
+    def pairs(self) -> list[tuple[int, int]]:
+        # The crossing pairs of edges (as indices in network.edges), sorted
+        return [(e, f) for e, crossing in enumerate(self.crossings) for f in sorted(crossing) if e < f]
+
+    def crossing_points(self) -> list[Point]:
+        # For every pair in pairs() the point where the edges cross
+        return [Point(*intersection_point(*self.segment(e), *self.segment(f))) for e, f in self.pairs()]
+
+    def edge_cells(self, e: int) -> list[tuple[int, int]]:
+        (x1, y1), (x2, y2) = self.segment(e)
+        ox, oy = self.origin.tolist()
+        xs = range(math.floor((min(x1, x2) - ox) / self.cell_size), math.floor((max(x1, x2) - ox) / self.cell_size) + 1)
+        ys = range(math.floor((min(y1, y2) - oy) / self.cell_size), math.floor((max(y1, y2) - oy) / self.cell_size) + 1)
+        return [(x, y) for x in xs for y in ys]
+
+    def build_buckets(self):
+        self.buckets = {}
+        for e in range(len(self.starts)):
+            for cell in self.edge_cells(e):
+                self.buckets.setdefault(cell, set()).add(e)
+
+    def move_vertex(self, vertex: int, point: Point) -> int:
+        # Moves network.vertices[vertex] to point, recounts the crossings of its edges and returns the new total
+        if self.buckets is None:
+            self.build_buckets()
+        edges = self.incident[vertex]
+        for e in edges:
+            for f in self.crossings[e]:
+                self.crossings[f].discard(e)
+            self.total -= len(self.crossings[e])
+            self.crossings[e] = set()
+            for cell in self.edge_cells(e):
+                self.buckets[cell].discard(e)
+
+        self.points[vertex] = (point.x(), point.y())
+        self.network.vertices[vertex].point = point
+        for e in edges:
+            self.network.edges[e].update_line()
+            cells = self.edge_cells(e)
+            candidates = set().union(*(self.buckets.get(cell, ()) for cell in cells))
+            for cell in cells:
+                self.buckets.setdefault(cell, set()).add(e)
+
+            shared = {int(self.starts[e]), int(self.ends[e])}
+            p1, p2 = self.segment(e)
+            for f in candidates:
+                if f == e or int(self.starts[f]) in shared or int(self.ends[f]) in shared:
+                    continue
+                if f not in self.crossings[e] and segments_intersect(p1, p2, *self.segment(f)):
+                    self.crossings[e].add(f)
+                    self.crossings[f].add(e)
+                    self.total += 1
+        return self.total
+
+def find_crossings(network: Network) -> tuple[list[tuple[int, int]], list[Point]]:
+    # The crossing pairs of edges of network and the point of every crossing
+    index = CrossingIndex(network)
+    return index.pairs(), index.crossing_points()
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import math
+
+from utils.shapes import Point
+from utils.geometry import circumcenter
+from utils.predicates import orientation, in_circle
+
+# index of the vertex at infinity, every convex hull edge gets a ghost triangle with this vertex
+GHOST = -1
+
+def spatial_order(points: list[tuple[float, float]]) -> list[int]:
+    # Sorts the points in strips of a sqrt(n) x sqrt(n) grid, going up and down in turns (snake order)
+    # consecutive points are then close to each other, which keeps the point location walks short
+    n = len(points)
+    if n < 3:
+        return list(range(n))
+    xs = [point[0] for point in points]
+    ys = [point[1] for point in points]
+    min_x, max_x, min_y, max_y = min(xs), max(xs), min(ys), max(ys)
+    strips = max(1, int(math.sqrt(n)))
+    width = (max_x - min_x) / strips or 1
+
+    def key(i: int):
+        strip = min(int((xs[i] - min_x) / width), strips - 1)
+        return (strip, ys[i] if strip % 2 == 0 else -ys[i])
+    return sorted(range(n), key=key)
+
+class DelaunayTriangulation:
+    '''
+    Incremental Delaunay triangulation (Bowyer-Watson) of a set of points.
+    Every triangle is stored counter clockwise together with the triangles opposite to each of its
+    vertices. The outside of the convex hull is covered by ghost triangles that share the vertex at
+    infinity, so a point outside the hull is handled the same as a point inside it. The triangle
+    that contains a new point is found with a walk from the previously created triangle.
+    '''
+
+    def __init__(self, points: list[Point] | None = None):
+        self.points: list[tuple[float, float]] = [(point.x(), point.y()) for point in points or []]
+        # triangles[t] = [a, b, c] and adjacent[t][i] is the triangle across the edge opposite to vertex i
+        self.triangles_v: list[list[int] | None] = []
+        self.adjacent: list[list[int] | None] = []
+        self.free: list[int] = []
+        self.last: int = -1
+
+        # points we can not triangulate yet because they are all on one line
+        self.pending: list[int] = []
+        self.first_of: dict[tuple[float, float], int] = {}
+        self.duplicate_of: dict[int, int] = {}
+
+        for i in spatial_order(self.points):
+            self.add_label(i)
+
+    def insert(self, point: Point) -> int:
+        # Adds a single point to the triangulation and returns its label
+        label = len(self.points)
+        self.points.append((point.x(), point.y()))
+        self.add_label(label)
+        return label
+
+    def add_label(self, label: int):
+        point = self.points[label]
+        if point in self.first_of:
+            self.duplicate_of[label] = self.first_of[point]
+            return
+        self.first_of[point] = label
+
+        if self.last < 0:
+            self.pending.append(label)
+            self.try_start()
+        else:
+            self.insert_vertex(label)
+
+    @property
+    def triangles(self) -> list[tuple[int, int, int]]:
+        # All real (not ghost) triangles as counter clockwise label triples
+        return [tuple(tri) for tri in self.triangles_v if tri is not None and GHOST not in tri]
+
+    def neighbours(self) -> list[set[int]]:
+        # For every point the labels of the points it shares a delaunay edge with
+        neighbours: list[set[int]] = [set() for _ in self.points]
+        if self.last < 0:
+            # everything is on a line, so every point is connected to the next one on that line
+            order = sorted(self.pending, key=lambda i: self.points[i])
+            for u, v in zip(order, order[1:]):
+                neighbours[u].add(v)
+                neighbours[v].add(u)
+        else:
+            for tri in self.triangles_v:
+                if tri is None:
+                    continue
+                for i in range(3):
+                    u, v = tri[i], tri[(i + 1) % 3]
+                    if u != GHOST and v != GHOST:
+                        neighbours[u].add(v)
+        for duplicate, original in self.duplicate_of.items():
+            neighbours[duplicate] = set(neighbours[original])
+        return neighbours
+
+    def circumcenters(self) -> list[Point]:
+        # The voronoi vertices, in the same order as self.triangles
+        centers = []
+        for a, b, c in self.triangles:
+            center = circumcenter(self.points[a], self.points[b], self.points[c])
+            centers.append(Point(center[0], center[1]))
+        return centers
+
+    def try_start(self):
+        # we need three points that are not on one line for the first triangle
+        if len(self.pending) < 3:
+            return
+        a, b, c = self.pending[0], self.pending[1], self.pending[-1]
+        turn = orientation(self.points[a], self.points[b], self.points[c])
+        if turn == 0:
+            return
+        if turn < 0:
+            a, b = b, a
+
+        first = self.new_triangle([a, b, c])
+        ghosts = [self.new_triangle([v, u, GHOST]) for u, v in ((a, b), (b, c), (c, a))]
+        self.link([first] + ghosts)
+        self.last = first
+
+        for label in self.pending[2:-1]:
+            self.insert_vertex(label)
+        self.pending = []
+
+    def insert_vertex(self, label: int):
+        p = self.points[label]
+        start = self.locate(p)
+
+        # the cavity consists of all triangles whose circumcircle contains p
+        bad: set[int] = {start}
+        stack = [start]
+        boundary: list[tuple[int, int, int]] = []
+        while stack:
+            t = stack.pop()
+            tri = self.triangles_v[t]
+            for i in range(3):
+                other = self.adjacent[t][i]
+                if other in bad:
+                    continue
+                if self.conflicts(other, p):
+                    bad.add(other)
+                    stack.append(other)
+                else:
+                    boundary.append((tri[(i + 1) % 3], tri[(i + 2) % 3], other))
+
+        for t in bad:
+            self.triangles_v[t] = None
+            self.adjacent[t] = None
+            self.free.append(t)
+
+        # connect every boundary edge of the cavity with the new point
+        created = []
+        for u, v, outside in boundary:
+            t = self.new_triangle([u, v, label])
+            self.adjacent[t][2] = outside
+            outer = self.triangles_v[outside]
+            self.adjacent[outside][self.opposite_index(outer, v, u)] = t
+            created.append(t)
+        self.link(created)
+        self.last = created[0]
+
+    def locate(self, p: tuple[float, float]) -> int:
+        # Walks from the last created triangle towards p and returns a triangle whose circumcircle contains p
+        t = self.last
+        if GHOST in self.triangles_v[t]:
+            t = self.adjacent[t][self.triangles_v[t].index(GHOST)]
+
+        for _ in range(len(self.triangles_v) + 1):
+            tri = self.triangles_v[t]
+            if GHOST in tri:
+                return t
+            for i in range(3):
+                if orientation(self.points[tri[(i + 1) % 3]], self.points[tri[(i + 2) % 3]], p) < 0:
+                    t = self.adjacent[t][i]
+                    break
+            else:
+                return t
+
+        # rounding errors made the walk go in circles, so we search every triangle instead
+        for t, tri in enumerate(self.triangles_v):
+            if tri is not None and self.conflicts(t, p):
+                return t
+        raise ValueError("The point could not be located in the triangulation")
+
+    def conflicts(self, t: int, p: tuple[float, float]) -> bool:
+        tri = self.triangles_v[t]
+        if GHOST not in tri:
+            a, b, c = (self.points[v] for v in tri)
+            return in_circle(a, b, c, p) > 0
+
+        # the circle of a ghost triangle is the open half plane outside of its hull edge
+        g = tri.index(GHOST)
+        a, b = self.points[tri[(g + 1) % 3]], self.points[tri[(g + 2) % 3]]
+        turn = orientation(a, b, p)
+        if turn != 0:
+            return turn > 0
+        # on the line of the edge it contains only the points strictly in between a and b
+        return (min(a[0], b[0]) <= p[0] <= max(a[0], b[0])
+                and min(a[1], b[1]) <= p[1] <= max(a[1], b[1])
+                and p != a and p != b)
+
+    def new_triangle(self, vertices: list[int]) -> int:
+        if self.free:
+            t = self.free.pop()
+            self.triangles_v[t] = vertices
+            self.adjacent[t] = [-1, -1, -1]
+        else:
+            t = len(self.triangles_v)
+            self.triangles_v.append(vertices)
+            self.adjacent.append([-1, -1, -1])
+        return t
+
+    def link(self, created: list[int]):
+        # Sets the adjacency between the given triangles wherever they share an edge
+        edges: dict[tuple[int, int], tuple[int, int]] = {}
+        for t in created:
+            tri = self.triangles_v[t]
+            for i in range(3):
+                edges[(tri[(i + 1) % 3], tri[(i + 2) % 3])] = (t, i)
+        for (u, v), (t, i) in edges.items():
+            if (v, u) in edges:
+                self.adjacent[t][i] = edges[(v, u)][0]
+
+    def opposite_index(self, tri: list[int], u: int, v: int) -> int:
+        # index of the vertex of tri that is opposite to the directed edge u -> v
+        for i in range(3):
+            if tri[(i + 1) % 3] == u and tri[(i + 2) % 3] == v:
+                return i
+        raise ValueError("The edge is not part of the triangle")
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import numpy as np
+
+# Simplification of geometry for drawing at low zoom, every tolerance and cell size here is in world units
+# (at zoom z one pixel is 1 / z world units).
+
+def douglas_peucker(points: np.ndarray, tolerance: float) -> np.ndarray:
+    # Indices of the corners of the polyline points (n, 2) that are kept, no corner that is dropped is further
+    # than tolerance from the simplified line. The first and last corner are always kept
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, n - 1]] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        inner = points[start + 1:end] - points[start]
+        length = np.hypot(*segment)
+        if length > 0:
+            distances = np.abs(segment[0] * inner[:, 1] - segment[1] * inner[:, 0]) / length
+        else:
+            distances = np.hypot(inner[:, 0], inner[:, 1])
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance:
+            keep[start + 1 + i] = True
+            stack.extend([(start, start + 1 + i), (start + 1 + i, end)])
+    return np.flatnonzero(keep)
+
+def simplify_polygon(points: np.ndarray, tolerance: float) -> np.ndarray:
+    # The corners of a closed polygon (n, 2) that are kept by douglas_peucker, the ring is split into two
+    # polylines at the first corner and the corner furthest from it, which are both kept
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if len(points) <= 3:
+        return points
+    far = int(np.argmax(np.hypot(*(points - points[0]).T)))
+    if far == 0:
+        return points[:1]
+    ring = np.vstack([points, points[:1]])
+    first = douglas_peucker(ring[:far + 1], tolerance)
+    second = far + douglas_peucker(ring[far:], tolerance)
+    # the last corner of the second half is the first corner again
+    return points[np.concatenate([first, second[1:-1]])]
+
+def cluster_points(points: np.ndarray, cell_size: float) -> tuple[np.ndarray, np.ndarray]:
+    # The points grouped per cell of a grid with cells of cell_size, as the center of mass and the number of
+    # points of every group
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    if not len(points):
+        return np.zeros((0, 2)), np.zeros(0, dtype=np.int64)
+    cells = np.floor(points / cell_size).astype(np.int64)
+    cells -= cells.min(axis=0)
+    keys = cells[:, 0] * (int(cells[:, 1].max()) + 1) + cells[:, 1]
+    _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    centers = np.column_stack([np.bincount(inverse, points[:, 0]), np.bincount(inverse, points[:, 1])]) / counts[:, None]
+    return centers, counts
+
+def snap_segments(segments: np.ndarray, cell_size: float) -> np.ndarray:
+    # The segments (m, 4) as x1, y1, x2, y2 with their ends moved to a grid of cell_size. Segments that become a
+    # point are dropped and segments that end up on top of each other are kept once
+    segments = np.asarray(segments, dtype=float).reshape(-1, 4)
+    snapped = np.round(segments / cell_size).astype(np.int64)
+    snapped = snapped[(snapped[:, :2] != snapped[:, 2:]).any(axis=1)]
+    # the same segment in the other direction is the same segment
+    swap = (snapped[:, 0] > snapped[:, 2]) | ((snapped[:, 0] == snapped[:, 2]) & (snapped[:, 1] > snapped[:, 3]))
+    snapped[swap] = snapped[swap][:, [2, 3, 0, 1]]
+    return np.unique(snapped, axis=0).astype(float) * cell_size
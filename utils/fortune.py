@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import heapq
+import math
+
+from utils.shapes import Point
+from utils.geometry import circumcenter
+
+# event kinds, sites are handled before circle events that happen at the same position
+SITE_EVENT = 0
+CIRCLE_EVENT = 1
+
+class Arc:
+    '''A single parabolic arc of the beach line'''
+    __slots__ = ('site', 'event')
+
+    def __init__(self, site: int):
+        self.site: int = site
+        self.event: CircleEvent | None = None
+
+class CircleEvent:
+    '''The moment the sweep line touches the bottom of the circle trough three consecutive arcs'''
+    __slots__ = ('arc', 'center', 'valid')
+
+    def __init__(self, arc: Arc, center: tuple[float, float]):
+        self.arc: Arc = arc
+        self.center: tuple[float, float] = center
+        self.valid: bool = True
+
+class FortuneSweep:
+    '''
+    Fortune's sweep-line algorithm for the voronoi diagram of a set of sites.
+    The sweep line moves in the +y direction, the beach line is kept as a list of arcs ordered
+    on x which we search with a binary search on the breakpoints. The result are the voronoi
+    vertices and for every site the sites it shares a voronoi edge with.
+    '''
+
+    def __init__(self, points: list[Point]):
+        self.sites: list[tuple[float, float]] = [(point.x(), point.y()) for point in points]
+        self.neighbours: list[set[int]] = [set() for _ in self.sites]
+        self.vertices: list[Point] = []
+
+        self.beach: list[Arc] = []
+        self.queue: list[tuple] = []
+        self.counter: int = 0
+        self.sweep_y: float = -math.inf
+
+        self.sweep()
+
+    def sweep(self):
+        # sites on the exact same position only take part once, the copies get the same neighbours
+        first_of: dict[tuple[float, float], int] = {}
+        duplicates: list[tuple[int, int]] = []
+        for i, site in enumerate(self.sites):
+            if site in first_of:
+                duplicates.append((i, first_of[site]))
+                continue
+            first_of[site] = i
+            self.push((site[1], site[0], SITE_EVENT, i))
+
+        while self.queue:
+            y, x, kind, _, payload = heapq.heappop(self.queue)
+            self.sweep_y = y
+            if kind == SITE_EVENT:
+                self.handle_site_event(payload)
+            elif payload.valid:
+                self.handle_circle_event(payload)
+
+        for duplicate, original in duplicates:
+            self.neighbours[duplicate] = set(self.neighbours[original])
+
+    def push(self, event: tuple):
+        y, x, kind, payload = event
+        heapq.heappush(self.queue, (y, x, kind, self.counter, payload))
+        self.counter += 1
+
+    def handle_site_event(self, site: int):
+        if not self.beach:
+            self.beach.append(Arc(site))
+            return
+
+        sx, sy = self.sites[site]
+        k = self.locate(sx, sy)
+        arc = self.beach[k]
+
+        if self.sites[arc.site][1] == sy:
+            # both sites lie on the sweep line, this only happens for the first row of sites
+            # those are processed from left to right so the new arc is placed to the right
+            self.beach.insert(k + 1, Arc(site))
+            self.link(arc.site, site)
+            return
+
+        # split the arc above the site in two and put the new arc in between
+        self.invalidate(arc)
+        self.beach[k:k + 1] = [Arc(arc.site), Arc(site), Arc(arc.site)]
+        self.link(arc.site, site)
+        self.check_circle_event(k)
+        self.check_circle_event(k + 2)
+
+    def handle_circle_event(self, event: CircleEvent):
+        k = self.index_of(event.arc, event.center[0])
+        left: Arc = self.beach[k - 1]
+        right: Arc = self.beach[k + 1]
+        self.vertices.append(Point(event.center[0], event.center[1]))
+
+        del self.beach[k]
+        self.invalidate(left)
+        self.invalidate(right)
+        self.link(left.site, right.site)
+        # left now lives at k - 1 and right at k
+        self.check_circle_event(k - 1)
+        self.check_circle_event(k)
+
+    def check_circle_event(self, k: int):
+        if k <= 0 or k >= len(self.beach) - 1:
+            return
+        arc = self.beach[k]
+        a = self.sites[self.beach[k - 1].site]
+        b = self.sites[arc.site]
+        c = self.sites[self.beach[k + 1].site]
+        if self.beach[k - 1].site == self.beach[k + 1].site:
+            return
+
+        # the breakpoints only converge if a, b, c make a left turn
+        cross = (b[0] - a[0]) * (c[1] - b[1]) - (b[1] - a[1]) * (c[0] - b[0])
+        if cross <= 0:
+            return
+        center = circumcenter(a, b, c)
+        if center is None:
+            return
+
+        event_y = center[1] + math.hypot(a[0] - center[0], a[1] - center[1])
+        if event_y < self.sweep_y:
+            # rounding can put an event just behind the sweep line, it still has to happen now
+            event_y = self.sweep_y
+        arc.event = CircleEvent(arc, center)
+        self.push((event_y, center[0], CIRCLE_EVENT, arc.event))
+
+    def invalidate(self, arc: Arc):
+        if arc.event is not None:
+            arc.event.valid = False
+            arc.event = None
+
+    def link(self, s1: int, s2: int):
+        self.neighbours[s1].add(s2)
+        self.neighbours[s2].add(s1)
+
+    def locate(self, x: float, y: float) -> int:
+        # binary search for the arc whose breakpoints (at sweep line y) enclose x
+        lo, hi = 0, len(self.beach) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.breakpoint(self.beach[mid].site, self.beach[mid + 1].site, y) < x:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def index_of(self, arc: Arc, x: float) -> int:
+        # a vanishing arc has (almost) zero width, so we search around the location of x
+        k = self.locate(x, self.sweep_y)
+        for offset in range(len(self.beach)):
+            if k - offset >= 0 and self.beach[k - offset] is arc:
+                return k - offset
+            if k + offset < len(self.beach) and self.beach[k + offset] is arc:
+                return k + offset
+        raise ValueError("The arc is not part of the beach line")
+
+    def breakpoint(self, left: int, right: int, y: float) -> float:
+        # x coordinate of the intersection of the parabolas of left and right with directrix y
+        ax, ay = self.sites[left]
+        bx, by = self.sites[right]
+        if ay == by:
+            return (ax + bx) / 2
+        if ay == y:
+            return ax
+        if by == y:
+            return bx
+
+        da = 2 * (ay - y)
+        db = 2 * (by - y)
+        A = 1 / da - 1 / db
+        B = -2 * ax / da + 2 * bx / db
+        C = ax * ax / da - bx * bx / db + (ay - by) / 2
+        root = math.sqrt(max(B * B - 4 * A * C, 0))
+        # we need the root where the left parabola goes under the right one
+        # both forms are the same root, we pick the one without cancellation
+        if B < 0:
+            return 2 * C / (-B + root)
+        return (-B - root) / (2 * A)
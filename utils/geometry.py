@@ -1,8 +1,181 @@
-from utils.shapes import HalfPlane, ComplexPolygon, Point
+from __future__ import annotations
+
+import numpy as np
 
-def half_plane_intersection(half_planes: list[HalfPlane]) -> ComplexPolygon: 
-    area: ComplexPolygon = ComplexPolygon([Point(-1000, 1000), Point(1000,1000), Point(1000,-1000), Point(-1000, -1000)]) 
+from utils.shapes import HalfPlane, ComplexPolygon, Point
 
+def halfplane_array(half_planes: list[HalfPlane]) -> np.ndarray: 
+    # Converts half planes to rows (a, b, c) of a x + b y <= c
+    # a HalfPlane contains p if (p - start) . normal >= 0, which is -normal . p <= -normal . start
+    rows = np.empty((len(half_planes), 3))
     for i, half_plane in enumerate(half_planes): 
-        area = area.clip_with_halfplane(half_plane)
-    return area 
+        nx, ny = half_plane.normal.x(), half_plane.normal.y()
+        start = half_plane.line.start
+        rows[i] = (-nx, -ny, -nx * start.x() - ny * start.y())
+    return rows
+
+def polygon_halfplanes(hull: list[Point]) -> np.ndarray: 
+    # The half planes (a, b, c) whose intersection is the convex polygon hull (in either orientation)
+    points = np.array([[point.x(), point.y()] for point in hull], dtype=float)
+    following = np.roll(points, -1, axis=0)
+    # make it counter clockwise, then the inside is to the left of every edge
+    if (points[:, 0] * following[:, 1] - following[:, 0] * points[:, 1]).sum() < 0: 
+        points, following = following[::-1], points[::-1]
+    direction = following - points
+    a, b = direction[:, 1], -direction[:, 0]
+    return np.column_stack([a, b, a * points[:, 0] + b * points[:, 1]])
+
+def half_plane_intersection(half_planes: list[HalfPlane] | np.ndarray, bounds: ComplexPolygon | None = None, tol: float = 1e-9) -> ComplexPolygon | None: 
+    '''
+    Intersection of half planes within bounds (by default the box from -1000 to 1000), None if it is empty.
+    half_planes is a list of HalfPlane or an (n, 3) array with rows (a, b, c) for a x + b y <= c.
+    The half planes are sorted on the angle of their boundary and then go trough a deque once, which
+    removes the planes that are not part of the result from the front and back, so this takes O(n log n).
+    '''
+    planes = half_planes if isinstance(half_planes, np.ndarray) else halfplane_array(half_planes)
+    if bounds is None: 
+        bounds = ComplexPolygon([Point(-1000, 1000), Point(1000,1000), Point(1000,-1000), Point(-1000, -1000)]) 
+    planes = np.vstack([np.asarray(planes, dtype=float).reshape(-1, 3), polygon_halfplanes(bounds.hull)])
+
+    # normalize, so that c is the distance of the line to the origin and we can compare planes with it
+    norms = np.hypot(planes[:, 0], planes[:, 1])
+    planes = planes[norms > 0] / norms[norms > 0, None]
+    # the boundary a x + b y = c goes in direction (-b, a) with the inside on the left
+    angles = np.arctan2(planes[:, 0], -planes[:, 1])
+    # -pi and pi are the same direction, a rounding error can put a plane on either side
+    angles[angles < -np.pi + tol] += 2 * np.pi
+    # angles that differ by rounding errors only (like cos(pi / 2) instead of 0) form one group of parallel planes,
+    # in a group the plane with the smallest c is the most restrictive, it comes first
+    sorted_angles = np.sort(angles)
+    groups = np.concatenate([[0], np.cumsum(np.diff(sorted_angles) >= tol)])
+    group = groups[np.searchsorted(sorted_angles, angles)]
+    order = np.lexsort((planes[:, 2], group))
+    a, b, c = planes[order].T.tolist()
+    group = group[order].tolist()
+
+    def outside(i: int, point: tuple[float, float]) -> bool: 
+        return a[i] * point[0] + b[i] * point[1] > c[i] + tol
+
+    def intersection(i: int, j: int) -> tuple[float, float]: 
+        det = a[i] * b[j] - a[j] * b[i]
+        return ((c[i] * b[j] - c[j] * b[i]) / det, (a[i] * c[j] - a[j] * c[i]) / det)
+
+    lines: list[int] = []
+    corners: list[tuple[float, float]] = []
+    front = 0
+    for i in range(len(a)): 
+        if i > 0 and group[i] == group[i - 1]: 
+            # a parallel plane in the same direction that is less restrictive
+            continue
+        while len(lines) - front >= 2 and outside(i, corners[-1]): 
+            lines.pop()
+            corners.pop()
+        while len(lines) - front >= 2 and outside(i, corners[front]): 
+            front += 1
+        if len(lines) > front: 
+            last = lines[-1]
+            if abs(a[last] * b[i] - a[i] * b[last]) < tol: 
+                # opposite planes with nothing left in between, they do not overlap
+                if a[last] * a[i] + b[last] * b[i] < 0: 
+                    return None
+                continue
+            corners.append(intersection(last, i))
+        lines.append(i)
+
+    # the last planes can still cut off the corners at the front and the other way around
+    while len(lines) - front >= 3 and outside(lines[front], corners[-1]): 
+        lines.pop()
+        corners.pop()
+    while len(lines) - front >= 3 and outside(lines[-1], corners[front]): 
+        front += 1
+    if len(lines) - front < 3: 
+        return None
+
+    hull = corners[front:] + [intersection(lines[-1], lines[front])]
+    # drop corners where more than two lines meet, and turn it clockwise like the other polygons
+    distinct = [point for k, point in enumerate(hull) if abs(point[0] - hull[k - 1][0]) > tol or abs(point[1] - hull[k - 1][1]) > tol]
+    if len(distinct) < 3: 
+        return None
+    return ComplexPolygon([Point(x, y) for x, y in reversed(distinct)])
+
+def circumcenter(a: tuple[float, float], b: tuple[float, float], c: tuple[float, float]) -> tuple[float, float] | None: 
+    # Center of the circle trough a, b and c (None if the points are collinear)
+    # we translate to a first, which keeps the products small for far away coordinates 
+    bx, by = b[0] - a[0], b[1] - a[1]
+    cx, cy = c[0] - a[0], c[1] - a[1]
+    d = 2 * (bx * cy - by * cx)
+    if d == 0: 
+        return None 
+    b_sq = bx * bx + by * by
+    c_sq = cx * cx + cy * cy
+    ux = (cy * b_sq - by * c_sq) / d
+    uy = (bx * c_sq - cx * b_sq) / d
+    return (a[0] + ux, a[1] + uy)
+
+def bisector_halfplanes(site: np.ndarray, others: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]: 
+    # The half planes a x + b y <= c of all points that are closer to site than to each of the others
+    # |p - site|^2 <= |p - other|^2 is the same as 2 p . (other - site) <= |other|^2 - |site|^2
+    a = 2 * (others[:, 0] - site[0])
+    b = 2 * (others[:, 1] - site[1])
+    c = (others * others).sum(axis=1) - site.dot(site)
+    return a, b, c
+
+def clip_convex_polygon(polygon: np.ndarray, labels: np.ndarray, a: float, b: float, c: float, label: int, tol: float = 1e-9) -> tuple[np.ndarray, np.ndarray]: 
+    # Clips a convex polygon (m x 2 array of vertices) with the half plane a x + b y <= c (Sutherland-Hodgman)
+    # labels[i] belongs to the edge from vertex i to vertex i + 1, the new edge on the clipping line gets label
+    # vertices closer than tol (relative to the size of the coordinates) are merged
+    m = len(polygon)
+    following = np.arange(1, m + 1) % m
+    side = a * polygon[:, 0] + b * polygon[:, 1] - c
+    inside = side <= 0
+    crossing = inside != inside[following]
+
+    # every edge can give its start vertex and an intersection point with the clipping line
+    with np.errstate(divide='ignore', invalid='ignore'): 
+        t = np.where(crossing, side / (side - side[following]), 0)
+    intersections = polygon + t[:, None] * (polygon[following] - polygon)
+
+    points = np.empty((2 * m, 2))
+    points[0::2], points[1::2] = polygon, intersections
+    # leaving the half plane we continue along the clipping line, entering it we continue along the edge
+    new_labels = np.empty(2 * m, dtype=labels.dtype)
+    new_labels[0::2], new_labels[1::2] = labels, np.where(inside, label, labels)
+    keep = np.empty(2 * m, dtype=bool)
+    keep[0::2], keep[1::2] = inside, crossing
+    points, new_labels = points[keep], new_labels[keep]
+
+    # a vertex on the clipping line shows up twice, when it is off by a rounding error as two vertices that are
+    # almost the same. The edge between them has no length, it is dropped with its label
+    scale = max(1.0, float(np.abs(points).max())) if len(points) else 1.0
+    distinct = np.abs(points - np.roll(points, -1, axis=0)).max(axis=1) > tol * scale
+    if not distinct.all() and distinct.any(): 
+        points, new_labels = points[distinct], new_labels[distinct]
+    return points, new_labels
+
+def clip_convex_polygon_batch(polygon: np.ndarray, labels: np.ndarray, a: np.ndarray, b: np.ndarray, c: np.ndarray, tol: float = 1e-9) -> tuple[np.ndarray, np.ndarray]: 
+    # Clips a convex polygon with all half planes a[i] x + b[i] y <= c[i], the new edges get label i
+    # The half planes should be sorted on importance (for voronoi cells: on distance to the site). Every
+    # round tests all remaining half planes against all vertices at once, drops the ones that do not cut
+    # the polygon anymore and clips with the first one that is left
+    remaining = np.arange(len(a))
+    while remaining.size and len(polygon): 
+        side = np.outer(a[remaining], polygon[:, 0]) + np.outer(b[remaining], polygon[:, 1]) - c[remaining, None]
+        remaining = remaining[side.max(axis=1) > tol]
+        if not remaining.size: 
+            break
+        i = remaining[0]
+        polygon, labels = clip_convex_polygon(polygon, labels, a[i], b[i], c[i], i, tol)
+        remaining = remaining[1:]
+    return polygon, labels
+
+def voronoi_cell(site: np.ndarray, others: np.ndarray, box: np.ndarray) -> tuple[np.ndarray, np.ndarray]: 
+    # The voronoi cell of site within the convex polygon box (vertices as an m x 2 array)
+    # labels[i] is the index in others of the site on the other side of edge i, or -1 for a side of the box
+    # the nearest sites are the most likely to shape the cell, so we clip with those first
+    if not len(others): 
+        return np.array(box, dtype=float), np.full(len(box), -1, dtype=np.int64)
+    order = np.argsort(((others - site) ** 2).sum(axis=1), kind='stable')
+    a, b, c = bisector_halfplanes(site, others[order])
+    polygon, labels = clip_convex_polygon_batch(np.array(box, dtype=float), np.full(len(box), -1), a, b, c)
+    labels = np.where(labels >= 0, order[np.maximum(labels, 0)], -1)
+    return polygon, labels
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import heapq
+
+import numpy as np
+
+from utils.network import Network
+
+class CSRGraph:
+    '''
+    Adjacency of a graph in compressed sparse row form. The neighbours of vertex v are
+    indices[indptr[v]:indptr[v + 1]], with the weights of the edges to them in the same places of weights
+    and the index of the edge in edge_ids. An undirected edge is stored once in both directions.
+    '''
+
+    def __init__(self, n: int, sources: np.ndarray, targets: np.ndarray, weights: np.ndarray | None = None, directed: bool = False):
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        weights = np.ones(len(sources)) if weights is None else np.asarray(weights, dtype=float)
+        if len(sources) != len(targets) or len(sources) != len(weights):
+            raise ValueError("Every edge needs a source, a target and a weight")
+        if len(sources) and (min(sources.min(), targets.min()) < 0 or max(sources.max(), targets.max()) >= n):
+            raise ValueError(f"The vertex labels must be >= 0 and < {n}")
+        if (weights < 0).any():
+            raise ValueError("The weights can not be negative")
+
+        edge_ids = np.arange(len(sources))
+        if not directed:
+            sources, targets = np.concatenate([sources, targets]), np.concatenate([targets, sources])
+            weights, edge_ids = np.concatenate([weights, weights]), np.concatenate([edge_ids, edge_ids])
+
+        order = np.argsort(sources, kind='stable')
+        self.n: int = n
+        self.directed: bool = directed
+        self.indptr: np.ndarray = np.concatenate([[0], np.cumsum(np.bincount(sources, minlength=n))]).astype(np.int64)
+        self.indices: np.ndarray = targets[order]
+        self.weights: np.ndarray = weights[order]
+        self.edge_ids: np.ndarray = edge_ids[order]
+        # python lists of indptr, indices and weights for the searches that go one vertex at a time, made once
+        self.lists: tuple[list[int], list[int], list[float]] | None = None
+
+    @classmethod
+    def from_network(cls, network: Network, weights: np.ndarray | None = None) -> CSRGraph:
+        # By default an edge weighs its length
+        edges = network.edge_array()
+        if weights is None:
+            points = np.array([[vertex.point.x(), vertex.point.y()] for vertex in network.vertices], dtype=float).reshape(-1, 2)
+            delta = points[edges[:, 1]] - points[edges[:, 0]]
+            weights = np.hypot(delta[:, 0], delta[:, 1])
+        return cls(len(network.vertices), edges[:, 0], edges[:, 1], weights)
+
+    def neighbours(self, v: int) -> np.ndarray:
+        return self.indices[self.indptr[v]:self.indptr[v + 1]]
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def frontier_neighbours(self, frontier: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # All (vertex, neighbour) pairs of the vertices in frontier, gathered without a python loop
+        starts = self.indptr[frontier]
+        counts = self.indptr[frontier + 1] - starts
+        slots = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        return np.repeat(frontier, counts), self.indices[slots]
+
+    def bfs(self, source: int) -> np.ndarray:
+        # Number of edges from source to every vertex (-1 if it can not be reached), one frontier at a time
+        hops = np.full(self.n, -1, dtype=np.int64)
+        hops[source] = 0
+        frontier = np.array([source], dtype=np.int64)
+        level = 0
+        while frontier.size:
+            level += 1
+            _, reached = self.frontier_neighbours(frontier)
+            frontier = np.unique(reached[hops[reached] < 0])
+            hops[frontier] = level
+        return hops
+
+    def adjacency_lists(self) -> tuple[list[int], list[int], list[float]]:
+        if self.lists is None:
+            self.lists = (self.indptr.tolist(), self.indices.tolist(), self.weights.tolist())
+        return self.lists
+
+    def search(self, source: int, target: int | None = None) -> tuple[dict[int, float], dict[int, int]]:
+        # Dijkstra with only the reached vertices in dicts, so a query costs the part of the graph it visits and not n.
+        # With a target the search stops as soon as the target is popped, the other distances may then be too large
+        indptr, indices, weights = self.adjacency_lists()
+        distances = {source: 0.0}
+        previous = {source: -1}
+        done = set()
+        heap = [(0.0, source)]
+        while heap:
+            distance, v = heapq.heappop(heap)
+            if v in done:
+                continue
+            done.add(v)
+            if v == target:
+                break
+            for k in range(indptr[v], indptr[v + 1]):
+                w = indices[k]
+                candidate = distance + weights[k]
+                if candidate < distances.get(w, np.inf):
+                    distances[w] = candidate
+                    previous[w] = v
+                    heapq.heappush(heap, (candidate, w))
+        return distances, previous
+
+    def dijkstra(self, source: int, target: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        # Distances from source and the previous vertex on every shortest path (-1 for source and unreachable vertices)
+        # with a target the search stops as soon as the target is final, the other distances may then be too large
+        found, parents = self.search(source, target)
+        distances = np.full(self.n, np.inf)
+        previous = np.full(self.n, -1, dtype=np.int64)
+        distances[list(found)] = list(found.values())
+        previous[list(parents)] = list(parents.values())
+        return distances, previous
+
+    def shortest_path(self, source: int, target: int) -> tuple[float, list[int]]:
+        # Length and vertices of a shortest path, (inf, []) if target can not be reached
+        distances, previous = self.search(source, target)
+        if target not in distances:
+            return np.inf, []
+        path = [target]
+        while path[-1] != source:
+            path.append(previous[path[-1]])
+        return float(distances[target]), path[::-1]
+
+    def multi_source(self, sources: list[int]) -> np.ndarray:
+        # (k, n) array with the distances from each of the k sources to every vertex
+        return np.array([self.dijkstra(source)[0] for source in sources]).reshape(len(sources), self.n)
+
+    def connected_components(self) -> tuple[int, np.ndarray]:
+        # Number of components and the component of every vertex (numbered 0, 1, ... in order of their lowest vertex)
+        # Union find with path halving, the root of a set is always its lowest vertex. Edges of a directed graph
+        # count in both directions (weakly connected components), an undirected edge is only joined once
+        parent = list(range(self.n))
+
+        def find(v: int) -> int:
+            while parent[v] != v:
+                parent[v] = parent[parent[v]]
+                v = parent[v]
+            return v
+
+        sources = np.repeat(np.arange(self.n), self.degrees())
+        once = np.ones(len(sources), dtype=bool) if self.directed else sources < self.indices
+        for v, w in zip(sources[once].tolist(), self.indices[once].tolist()):
+            a, b = find(v), find(w)
+            if a < b:
+                parent[b] = a
+            elif b < a:
+                parent[a] = b
+        labels = np.array([find(v) for v in range(self.n)], dtype=np.int64)
+        roots, components = np.unique(labels, return_inverse=True)
+        return len(roots), components
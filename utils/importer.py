@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import csv
+import itertools
+import json
+import operator
+import os
+import re
+from typing import Callable, Iterator
+
+import numpy as np
+
+from utils.shapes import Point
+from utils.network import Network
+
+# Streaming import of stations and lines from csv and geojson. The files are read in chunks by generators and
+# every chunk is projected in one go, only the stations and edges found so far are kept in memory.
+# progress is called after every chunk with the number of bytes read and the total number of bytes.
+
+EARTH_RADIUS = 6378137.0
+# beyond this latitude web mercator goes to infinity, it is where the projection becomes a square
+MAX_LATITUDE = 85.05112878
+
+_FIRST_TYPE = re.compile(r'"type"\s*:\s*"(FeatureCollection|Feature)"|("features")\s*:')
+
+def project(lon: np.ndarray, lat: np.ndarray, origin: tuple[float, float] | None = None, scale: float = 1.0) -> np.ndarray:
+    # Web mercator projection of lon/lat in degrees to an (n, 2) array of meters (times scale), relative to origin (lon, lat)
+    lon = np.asarray(lon, dtype=float)
+    lat = np.clip(np.asarray(lat, dtype=float), -MAX_LATITUDE, MAX_LATITUDE)
+    x = EARTH_RADIUS * np.radians(lon)
+    y = EARTH_RADIUS * np.log(np.tan(np.pi / 4 + np.radians(lat) / 2))
+    if origin is not None:
+        x0, y0 = project([origin[0]], [origin[1]])[0]
+        x, y = x - x0, y - y0
+    return np.column_stack([x, y]) * scale
+
+def read_csv(path: str | os.PathLike, columns: list[str], chunk_size: int = 100_000, delimiter: str = ',',
+             progress: Callable[[int, int], None] | None = None) -> Iterator[list[np.ndarray]]:
+    # Yields for every chunk of at most chunk_size rows the values of columns, as one array of strings per column
+    total = os.path.getsize(path)
+    with open(path, 'r', encoding='utf-8-sig', newline='') as file:
+        reader = csv.reader(file, delimiter=delimiter)
+        header = [name.strip() for name in next(reader, [])]
+        missing = [name for name in columns if name not in header]
+        if missing:
+            raise ValueError(f"{path} has no column {', '.join(missing)}")
+        pick = operator.itemgetter(*[header.index(name) for name in columns])
+
+        while batch := list(itertools.islice(reader, chunk_size)):
+            try:
+                rows = [pick(row) for row in batch if row]
+            except IndexError:
+                raise ValueError(f"{path} has a row with too few columns before line {reader.line_num}")
+            if len(columns) == 1:
+                rows = [(value,) for value in rows]
+            if rows:
+                yield [np.array(column, dtype=str) for column in zip(*rows)]
+            if progress is not None:
+                # the position of the bytes under the text, it runs ahead by the part that is read but not yet parsed
+                progress(min(file.buffer.tell(), total), total)
+        if progress is not None:
+            progress(total, total)
+
+def read_geojson(path: str | os.PathLike, chunk_size: int = 10_000, buffer_size: int = 1 << 20,
+                 progress: Callable[[int, int], None] | None = None) -> Iterator[list[dict]]:
+    # Yields the features of a FeatureCollection or of newline delimited geojson in chunks of at most chunk_size.
+    # The file is decoded one feature at a time from a buffer of about buffer_size bytes, never as a whole
+    total = os.path.getsize(path)
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8-sig') as file:
+        text = file.read(buffer_size)
+        position = 0
+
+        def fill() -> bool:
+            # drops what is decoded and reads the next part, False at the end of the file
+            nonlocal text, position
+            more = file.read(buffer_size)
+            text = text[position:] + more
+            position = 0
+            return bool(more)
+
+        def skip(characters: str):
+            nonlocal position
+            while True:
+                while position < len(text) and text[position] in characters:
+                    position += 1
+                if position < len(text) or not fill():
+                    return
+
+        def decode() -> dict:
+            # a feature is an object, so once it decodes it is complete
+            nonlocal position
+            while True:
+                try:
+                    value, position = decoder.raw_decode(text, position)
+                    return value
+                except json.JSONDecodeError:
+                    if not fill():
+                        raise ValueError(f"{path} is not valid geojson")
+
+        # in a FeatureCollection the "features" member (or its type) comes before the type of the first feature,
+        # newline delimited geojson starts right away with a feature
+        while (match := _FIRST_TYPE.search(text, position)) is None:
+            if not fill():
+                raise ValueError(f"{path} has no features")
+        collection = match.group(1) != 'Feature'
+        if collection:
+            while (start := text.find('"features"', position)) < 0:
+                if not fill():
+                    raise ValueError(f"{path} has no features")
+            position = start + len('"features"')
+            skip(' \t\r\n:')
+            if text[position:position + 1] != '[':
+                raise ValueError(f"{path} has no list of features")
+            position += 1
+
+        chunk = []
+        while True:
+            skip(' \t\r\n,\x1e')
+            if position >= len(text) or (collection and text[position] == ']'):
+                break
+            chunk.append(decode())
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+                if progress is not None:
+                    progress(min(file.tell(), total), total)
+        if chunk:
+            yield chunk
+        if progress is not None:
+            progress(total, total)
+
+class _Buffer:
+    '''Array of rows that grows by doubling, so adding a chunk costs about as much as copying it once'''
+
+    def __init__(self, width: int, dtype: type):
+        self.data: np.ndarray = np.empty((1024, width), dtype=dtype)
+        self.size: int = 0
+
+    def extend(self, rows: np.ndarray):
+        if self.size + len(rows) > len(self.data):
+            grown = np.empty((max(2 * len(self.data), self.size + len(rows)), self.data.shape[1]), dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:self.size + len(rows)] = rows
+        self.size += len(rows)
+
+    def array(self) -> np.ndarray:
+        return self.data[:self.size]
+
+class NetworkImporter:
+    '''
+    Collects stations and the edges between them chunk by chunk. Stations are known by an id, or for the
+    corners of geojson lines by their coordinates, so lines that pass the same place share the station.
+    '''
+
+    def __init__(self, origin: tuple[float, float] | None = None, scale: float = 1.0):
+        self.origin: tuple[float, float] | None = origin
+        self.scale: float = scale
+        self.ids: dict[str, int] = {}
+        self.positions: dict[tuple[float, float], int] = {}
+        # the labels of the stations that have an id
+        self.named: set[int] = set()
+        self.points: _Buffer = _Buffer(2, float)
+        self.edges: _Buffer = _Buffer(2, np.int64)
+
+    def add_stations(self, ids: np.ndarray, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        # Adds the stations with ids that are new and returns the label of every station
+        lon, lat = np.asarray(lon, dtype=float), np.asarray(lat, dtype=float)
+        labels = np.empty(len(lon), dtype=np.int64)
+        new = []
+        for i, (station, x, y) in enumerate(zip(np.asarray(ids, dtype=str).tolist(), lon.tolist(), lat.tolist())):
+            label = self.ids.get(station)
+            if label is None:
+                # a corner of a line that came before its station becomes that station
+                label = self.positions.get((x, y))
+                if label is None or label in self.named:
+                    label = self.points.size + len(new)
+                    self.positions.setdefault((x, y), label)
+                    new.append(i)
+                self.ids[station] = label
+                self.named.add(label)
+            labels[i] = label
+        self.points.extend(project(lon[new], lat[new], self.origin, self.scale))
+        return labels
+
+    def add_positions(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        # Labels of the stations at lon/lat, new stations are added for the places that have none yet
+        lon, lat = np.asarray(lon, dtype=float), np.asarray(lat, dtype=float)
+        labels = np.empty(len(lon), dtype=np.int64)
+        new = []
+        for i, key in enumerate(zip(lon.tolist(), lat.tolist())):
+            label = self.positions.setdefault(key, self.points.size + len(new))
+            if label == self.points.size + len(new):
+                new.append(i)
+            labels[i] = label
+        self.points.extend(project(lon[new], lat[new], self.origin, self.scale))
+        return labels
+
+    def add_edges(self, sources: np.ndarray, targets: np.ndarray):
+        # Edges between the stations with the ids in sources and targets
+        try:
+            labels = [[self.ids[station] for station in column] for column in (np.asarray(sources, dtype=str).tolist(), np.asarray(targets, dtype=str).tolist())]
+        except KeyError as error:
+            raise ValueError(f"There is no station with id {error.args[0]}")
+        self.add_edge_labels(np.column_stack(labels).reshape(-1, 2))
+
+    def add_edge_labels(self, edges: np.ndarray):
+        edges = np.sort(np.asarray(edges, dtype=np.int64).reshape(-1, 2), axis=1)
+        self.edges.extend(edges[edges[:, 0] != edges[:, 1]])
+
+    def add_features(self, features: list[dict], id_property: str = 'id'):
+        # Point features become stations (with the feature id or the id_property as id), every two consecutive
+        # corners of a LineString or MultiLineString become an edge
+        station_ids, station_coordinates = [], []
+        coordinates, path_ends = [], []
+        for feature in features:
+            geometry = feature.get('geometry') or {}
+            kind = geometry.get('type')
+            if kind == 'Point':
+                station = (feature.get('properties') or {}).get(id_property, feature.get('id'))
+                station_ids.append(str(station) if station is not None else f"#{len(self.ids) + len(station_ids)}")
+                station_coordinates.append(geometry['coordinates'][:2])
+            elif kind in ('LineString', 'MultiLineString'):
+                for path in ([geometry['coordinates']] if kind == 'LineString' else geometry['coordinates']):
+                    coordinates.extend(corner[:2] for corner in path)
+                    path_ends.append(len(coordinates))
+        if station_ids:
+            stations = np.array(station_coordinates, dtype=float).reshape(-1, 2)
+            self.add_stations(station_ids, stations[:, 0], stations[:, 1])
+        if coordinates:
+            corners = np.array(coordinates, dtype=float).reshape(-1, 2)
+            labels = self.add_positions(corners[:, 0], corners[:, 1])
+            # no edge from the last corner of a path to the first of the next
+            follows = np.ones(len(labels) - 1, dtype=bool)
+            follows[np.array(path_ends[:-1], dtype=np.int64) - 1] = False
+            self.add_edge_labels(np.column_stack([labels[:-1], labels[1:]])[follows])
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        # The points (n, 2) and the edges (m, 2) without doubles, like Network.random_arrays
+        edges = self.edges.array()
+        n = max(self.points.size, 1)
+        keys = np.unique(edges[:, 0] * n + edges[:, 1])
+        return self.points.array().copy(), np.column_stack([keys // n, keys % n])
+
+    def network(self) -> Network:
+        return Network.from_arrays(*self.arrays())
+
+    def sites(self) -> list[Point]:
+        # The stations as the sites of a VoronoiDiagram
+        return [Point.from_xy(x, y) for x, y in self.points.array().tolist()]
+
+def _total_progress(progress: Callable[[int, int], None] | None, paths: list[str | os.PathLike]) -> list[Callable[[int, int], None] | None]:
+    # One callback per file that reports the bytes of all files together
+    if progress is None:
+        return [None] * len(paths)
+    sizes = [os.path.getsize(path) for path in paths]
+    before = np.concatenate([[0], np.cumsum(sizes)]).tolist()
+    return [lambda done, _, start=start: progress(start + done, before[-1]) for start in before[:-1]]
+
+def import_csv(stations_path: str | os.PathLike, lines_path: str | os.PathLike | None = None,
+               id_column: str = 'id', lon_column: str = 'lon', lat_column: str = 'lat', source_column: str = 'from', target_column: str = 'to',
+               chunk_size: int = 100_000, delimiter: str = ',', origin: tuple[float, float] | None = None, scale: float = 1.0,
+               progress: Callable[[int, int], None] | None = None) -> NetworkImporter:
+    # Stations with an id and lon/lat from one csv and the edges between them as pairs of ids from another
+    paths = [stations_path] + ([lines_path] if lines_path is not None else [])
+    callbacks = _total_progress(progress, paths)
+    importer = NetworkImporter(origin, scale)
+    for ids, lon, lat in read_csv(stations_path, [id_column, lon_column, lat_column], chunk_size, delimiter, callbacks[0]):
+        try:
+            importer.add_stations(ids, lon.astype(float), lat.astype(float))
+        except ValueError:
+            raise ValueError(f"{stations_path} has a {lon_column} or {lat_column} that is not a number")
+    if lines_path is not None:
+        for sources, targets in read_csv(lines_path, [source_column, target_column], chunk_size, delimiter, callbacks[1]):
+            importer.add_edges(sources, targets)
+    return importer
+
+def import_geojson(path: str | os.PathLike, id_property: str = 'id', chunk_size: int = 10_000,
+                   origin: tuple[float, float] | None = None, scale: float = 1.0,
+                   progress: Callable[[int, int], None] | None = None) -> NetworkImporter:
+    # Stations from the Point features and edges from the LineString and MultiLineString features of a geojson file
+    importer = NetworkImporter(origin, scale)
+    for features in read_geojson(path, chunk_size, progress=progress):
+        importer.add_features(features, id_property)
+    return importer
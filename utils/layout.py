@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+from utils.shapes import Point
+from utils.network import Network
+
+class QuadTree:
+    '''
+    Quadtree over a set of 2d points for Barnes-Hut, stored in flat arrays. Every node is a square that
+    is split in four equal quadrants until it holds at most leaf_size points. A node keeps the number of
+    points inside it (its mass) and their center of mass, so a far away node can act as a single point.
+    '''
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 8, max_depth: int = 32):
+        self.points: np.ndarray = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.leaf_size: int = leaf_size
+        # the points of node k are self.order[start[k]:end[k]]
+        self.order: np.ndarray = np.arange(len(self.points))
+
+        low = self.points.min(axis=0) if len(self.points) else np.zeros(2)
+        high = self.points.max(axis=0) if len(self.points) else np.zeros(2)
+        half = max(float((high - low).max()) / 2, 1e-9)
+
+        centers, halves, starts, ends, depths = [tuple((low + high) / 2)], [half], [0], [len(self.points)], [0]
+        children: list[list[int]] = [[-1, -1, -1, -1]]
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            start, end = starts[node], ends[node]
+            # identical points can not be split, so the depth is limited
+            if end - start <= leaf_size or depths[node] >= max_depth:
+                continue
+            indices = self.order[start:end]
+            cx, cy = centers[node]
+            quadrant = (self.points[indices, 0] >= cx).astype(np.int64) + 2 * (self.points[indices, 1] >= cy)
+            sort = np.argsort(quadrant, kind='stable')
+            self.order[start:end] = indices[sort]
+            bounds = start + np.searchsorted(quadrant[sort], np.arange(5))
+            quarter = halves[node] / 2
+            for q in range(4):
+                if bounds[q] == bounds[q + 1]:
+                    continue
+                centers.append((cx + (quarter if q & 1 else -quarter), cy + (quarter if q & 2 else -quarter)))
+                halves.append(quarter)
+                starts.append(int(bounds[q]))
+                ends.append(int(bounds[q + 1]))
+                depths.append(depths[node] + 1)
+                children.append([-1, -1, -1, -1])
+                children[node][q] = len(starts) - 1
+                stack.append(len(starts) - 1)
+
+        self.center = np.array(centers, dtype=float).reshape(-1, 2)
+        self.half = np.array(halves, dtype=float)
+        self.start = np.array(starts, dtype=np.int64)
+        self.end = np.array(ends, dtype=np.int64)
+        self.children = np.array(children, dtype=np.int64).reshape(-1, 4)
+        self.leaf = (self.children < 0).all(axis=1)
+
+        # mass and center of mass of every node, from the prefix sums of the points in tree order
+        ordered = np.vstack([np.zeros((1, 2)), np.cumsum(self.points[self.order], axis=0)])
+        self.mass = (self.end - self.start).astype(float)
+        self.center_of_mass = (ordered[self.end] - ordered[self.start]) / np.maximum(self.mass, 1)[:, None]
+
+    def repulsion(self, strength: float, theta: float = 0.8) -> np.ndarray:
+        # Force on every point from all other points, strength / distance along the direction away from them
+        # All points walk down the tree together: a node that looks small enough from a point (its width
+        # divided by the distance is below theta) pushes as one mass, a close leaf pushes point by point
+        n = len(self.points)
+        forces = np.zeros((n, 2))
+        queries = np.arange(n)
+        nodes = np.zeros(n, dtype=np.int64)
+        while queries.size:
+            delta = self.points[queries] - self.center_of_mass[nodes]
+            distance_sq = (delta * delta).sum(axis=1)
+            # a node around the point itself is never far
+            outside = (np.abs(self.points[queries] - self.center[nodes]) > self.half[nodes, None]).any(axis=1)
+            far = outside & ((2 * self.half[nodes]) ** 2 < theta * theta * distance_sq)
+            self.add_forces(forces, queries[far], delta[far], strength * self.mass[nodes[far]] / distance_sq[far])
+
+            leaf = ~far & self.leaf[nodes]
+            self.push_by_points(forces, queries[leaf], nodes[leaf], strength)
+
+            inner = ~far & ~self.leaf[nodes]
+            children = self.children[nodes[inner]]
+            queries = np.repeat(queries[inner], 4)
+            nodes = children.reshape(-1)
+            queries, nodes = queries[nodes >= 0], nodes[nodes >= 0]
+        return forces
+
+    def push_by_points(self, forces: np.ndarray, queries: np.ndarray, leaves: np.ndarray, strength: float):
+        # Direct forces from the points in a leaf, the leaves are padded to leaf_size like in KDTree.search_leaves
+        slots = self.start[leaves, None] + np.arange(max(self.leaf_size, 1))
+        valid = slots < self.end[leaves, None]
+        others = self.order[np.minimum(slots, len(self.order) - 1)]
+        delta = self.points[queries, None, :] - self.points[others]
+        distance_sq = (delta * delta).sum(axis=2)
+        valid &= others != queries[:, None]
+        # points on top of each other push in a fixed direction, so they can get apart
+        coincide = valid & (distance_sq == 0)
+        delta[coincide] = (1e-6, 0)
+        distance_sq[coincide] = 1e-12
+        scale = np.where(valid, strength / np.where(valid, distance_sq, 1), 0)
+        self.add_forces(forces, np.repeat(queries, valid.shape[1]), delta.reshape(-1, 2), scale.reshape(-1))
+
+    @staticmethod
+    def add_forces(forces: np.ndarray, queries: np.ndarray, delta: np.ndarray, scale: np.ndarray):
+        n = len(forces)
+        forces[:, 0] += np.bincount(queries, delta[:, 0] * scale, minlength=n)
+        forces[:, 1] += np.bincount(queries, delta[:, 1] * scale, minlength=n)
+
+class ForceLayout:
+    '''
+    Force directed layout of a Network (Fruchterman-Reingold). Every pair of vertices pushes apart with
+    k^2 / d and every edge pulls its vertices together with d^2 / k, where k is the ideal edge length.
+    The repulsion of all pairs is approximated with a Barnes-Hut quadtree, which takes O(n log n) per step
+    instead of O(n^2). A vertex moves at most temperature per step, and the temperature cools down.
+    '''
+
+    def __init__(self, network: Network, ideal_length: float | None = None, theta: float = 0.8, cooling: float = 0.95, seed: int | None = None):
+        self.network: Network = network
+        self.positions: np.ndarray = np.array([[vertex.point.x(), vertex.point.y()] for vertex in network.vertices], dtype=float).reshape(-1, 2)
+        self.edges: np.ndarray = network.edge_array()
+        self.theta: float = theta
+        self.cooling: float = cooling
+
+        n = len(self.positions)
+        extent = float((self.positions.max(axis=0) - self.positions.min(axis=0)).max()) if n else 0.0
+        if extent == 0:
+            # everything on one spot, spread the vertices out first
+            extent = math.sqrt(max(n, 1)) * (ideal_length or 10)
+            self.positions += np.random.default_rng(seed).uniform(-extent / 2, extent / 2, self.positions.shape)
+        self.ideal_length: float = ideal_length or extent / math.sqrt(max(n, 1))
+        # a tenth of the size the layout will get to
+        self.temperature: float = max(extent, self.ideal_length * math.sqrt(n)) / 10
+        self.iterations: int = 0
+
+    def forces(self) -> np.ndarray:
+        k = self.ideal_length
+        forces = QuadTree(self.positions).repulsion(k * k, self.theta)
+        u, v = self.edges[:, 0], self.edges[:, 1]
+        delta = self.positions[v] - self.positions[u]
+        pull = delta * (np.hypot(delta[:, 0], delta[:, 1]) / k)[:, None]
+        QuadTree.add_forces(forces, u, pull, np.ones(len(u)))
+        QuadTree.add_forces(forces, v, pull, -np.ones(len(v)))
+        return forces
+
+    def step(self) -> float:
+        # Moves every vertex along its force, returns the largest move
+        if not len(self.positions):
+            return 0.0
+        forces = self.forces()
+        length = np.hypot(forces[:, 0], forces[:, 1])
+        moves = np.minimum(length, self.temperature)
+        self.positions += forces * (moves / np.maximum(length, 1e-12))[:, None]
+        self.temperature *= self.cooling
+        self.iterations += 1
+        return float(moves.max())
+
+    def run(self, iterations: int = 100, tolerance: float = 1e-3) -> int:
+        # Steps until the largest move is below tolerance times the ideal edge length, returns the number of steps
+        for i in range(iterations):
+            if self.step() < tolerance * self.ideal_length:
+                self.apply()
+                return i + 1
+        self.apply()
+        return iterations
+
+    def apply(self):
+        # Writes the positions back into the vertices of the network
+        for vertex, (x, y) in zip(self.network.vertices, self.positions.tolist()):
+            vertex.point = Point(x, y)
+        for edge in self.network.edges:
+            edge.update_line()
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import numpy as np
+
+from utils.shapes import Point
+from utils.network import VoronoiDiagram, VoronoiCell
+
+class KDTree:
+    '''
+    k-d tree over a set of 2d points, stored in flat arrays. Every node splits on the median of its
+    points along the widest axis, a node with at most leaf_size points becomes a leaf.
+    '''
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 8):
+        self.points: np.ndarray = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.leaf_size: int = leaf_size
+        # the points of node k are self.order[start[k]:end[k]]
+        self.order: np.ndarray = np.arange(len(self.points))
+
+        dims, values, lefts, rights, starts, ends, lows, highs = [], [], [], [], [], [], [], []
+        def add_node(start: int, end: int, low: tuple[float, float], high: tuple[float, float]) -> int:
+            for array, value in zip((dims, values, lefts, rights, starts, ends, lows, highs), (-1, 0.0, -1, -1, start, end, low, high)):
+                array.append(value)
+            return len(dims) - 1
+
+        stack = [add_node(0, len(self.points), (-np.inf, -np.inf), (np.inf, np.inf))] if len(self.points) else []
+        while stack:
+            node = stack.pop()
+            start, end = starts[node], ends[node]
+            if end - start <= leaf_size:
+                continue
+            indices = self.order[start:end]
+            coordinates = self.points[indices]
+            dim = int(np.argmax(coordinates.max(axis=0) - coordinates.min(axis=0)))
+            middle = (end - start) // 2
+            partition = np.argpartition(coordinates[:, dim], middle)
+            self.order[start:end] = indices[partition]
+            value = float(self.points[self.order[start + middle], dim])
+
+            low, high = lows[node], highs[node]
+            left_high = (value, high[1]) if dim == 0 else (high[0], value)
+            right_low = (value, low[1]) if dim == 0 else (low[0], value)
+            dims[node], values[node] = dim, value
+            lefts[node] = add_node(start, start + middle, low, left_high)
+            rights[node] = add_node(start + middle, end, right_low, high)
+            stack += [lefts[node], rights[node]]
+
+        self.dim = np.array(dims, dtype=np.int64)
+        self.value = np.array(values, dtype=float)
+        self.left = np.array(lefts, dtype=np.int64)
+        self.right = np.array(rights, dtype=np.int64)
+        self.start = np.array(starts, dtype=np.int64)
+        self.end = np.array(ends, dtype=np.int64)
+        self.low = np.array(lows, dtype=float).reshape(-1, 2)
+        self.high = np.array(highs, dtype=float).reshape(-1, 2)
+
+    def nearest(self, x: float, y: float) -> tuple[int, float]:
+        # Index of and distance to the point closest to (x, y), in O(log n) for well spread points
+        if not len(self.points):
+            return -1, np.inf
+        best, best_sq = -1, np.inf
+        # nodes with the squared distance from (x, y) to their side of the splitting line
+        stack: list[tuple[int, float]] = [(0, 0.0)]
+        dims, values, lefts, rights = self.dim, self.value, self.left, self.right
+        while stack:
+            node, plane_sq = stack.pop()
+            if plane_sq >= best_sq:
+                continue
+            dim = dims[node]
+            if dim < 0:
+                indices = self.order[self.start[node]:self.end[node]]
+                delta = self.points[indices] - (x, y)
+                distances = (delta * delta).sum(axis=1)
+                k = int(np.argmin(distances))
+                if distances[k] < best_sq:
+                    best, best_sq = int(indices[k]), float(distances[k])
+                continue
+            offset = (x if dim == 0 else y) - values[node]
+            near, far = (lefts[node], rights[node]) if offset < 0 else (rights[node], lefts[node])
+            # the near side goes on top of the stack, so it is searched first
+            stack.append((far, offset * offset))
+            stack.append((near, plane_sq))
+        return best, float(np.sqrt(best_sq))
+
+    def nearest_many(self, queries: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # Nearest point for every row of an (m, 2) array of queries
+        # All queries walk down the tree together, level by level, so the work per level is done in numpy
+        queries = np.asarray(queries, dtype=float).reshape(-1, 2)
+        m = len(queries)
+        if not len(self.points):
+            return np.full(m, -1), np.full(m, np.inf)
+
+        nodes = np.zeros(m, dtype=np.int64)
+        inner = self.dim[nodes] >= 0
+        while inner.any():
+            current = nodes[inner]
+            dims = self.dim[current]
+            go_left = queries[inner, dims] < self.value[current]
+            nodes[inner] = np.where(go_left, self.left[current], self.right[current])
+            inner = self.dim[nodes] >= 0
+        indices, best_sq = self.search_leaves(queries, nodes)
+
+        # the leaf answer is exact if the closest point is nearer than the border of the leaf, the other
+        # queries go down the tree again, now skipping every node that is further away than their best so far
+        border = np.minimum(queries - self.low[nodes], self.high[nodes] - queries).min(axis=1)
+        open_queries = np.nonzero(best_sq > border * border)[0]
+        nodes = np.zeros(len(open_queries), dtype=np.int64)
+        while open_queries.size:
+            outside = np.maximum(np.maximum(self.low[nodes] - queries[open_queries], queries[open_queries] - self.high[nodes]), 0)
+            keep = (outside * outside).sum(axis=1) < best_sq[open_queries]
+            open_queries, nodes = open_queries[keep], nodes[keep]
+
+            leaf = self.dim[nodes] < 0
+            leaf_queries = open_queries[leaf]
+            leaf_indices, leaf_sq = self.search_leaves(queries[leaf_queries], nodes[leaf])
+            # a query can reach several leaves in the same round, the closest one wins
+            order = np.lexsort((leaf_sq, leaf_queries))
+            first = np.unique(leaf_queries[order], return_index=True)[1]
+            winners = order[first]
+            better = leaf_sq[winners] < best_sq[leaf_queries[winners]]
+            winners = winners[better]
+            indices[leaf_queries[winners]] = leaf_indices[winners]
+            best_sq[leaf_queries[winners]] = leaf_sq[winners]
+
+            inner_nodes = nodes[~leaf]
+            open_queries = np.concatenate([open_queries[~leaf], open_queries[~leaf]])
+            nodes = np.concatenate([self.left[inner_nodes], self.right[inner_nodes]])
+        return indices, np.sqrt(best_sq)
+
+    def search_leaves(self, queries: np.ndarray, leaves: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # Closest point and squared distance for every query within its leaf, the leaves are padded to leaf_size
+        m = len(queries)
+        slots = self.start[leaves, None] + np.arange(max(self.leaf_size, 1))
+        valid = slots < self.end[leaves, None]
+        candidates = np.where(valid, self.order[np.minimum(slots, len(self.order) - 1)], -1)
+        delta = self.points[candidates] - queries[:, None, :]
+        distances = np.where(valid, (delta * delta).sum(axis=2), np.inf)
+        best = np.argmin(distances, axis=1) if m else np.zeros(0, dtype=np.int64)
+        return candidates[np.arange(m), best], distances[np.arange(m), best]
+
+class VoronoiLocator:
+    '''
+    Answers which cell of a VoronoiDiagram contains a point. The cell of a point is the cell of the site
+    closest to it, so we search the closest site in a k-d tree over the sites. Points outside the area
+    covered by the cells get -1. The locator is built once, after editing the diagram build a new one.
+    '''
+
+    def __init__(self, diagram: VoronoiDiagram):
+        self.diagram: VoronoiDiagram = diagram
+        sites = np.array([[vertex.point.x(), vertex.point.y()] for vertex in diagram.vertices], dtype=float)
+        self.tree: KDTree = KDTree(sites)
+
+        # the cells together cover the box they were clipped from
+        corners = np.array([[point.x(), point.y()] for cell in diagram.voronoi_cells for point in cell.hull], dtype=float).reshape(-1, 2)
+        self.low: np.ndarray = corners.min(axis=0) if len(corners) else np.zeros(2)
+        self.high: np.ndarray = corners.max(axis=0) if len(corners) else np.zeros(2)
+
+    def locate(self, point: Point) -> int:
+        # Label of the site whose cell contains point (-1 if no cell does)
+        x, y = point.x(), point.y()
+        if not (self.low[0] <= x <= self.high[0] and self.low[1] <= y <= self.high[1]):
+            return -1
+        return self.tree.nearest(x, y)[0]
+
+    def locate_many(self, points: np.ndarray) -> np.ndarray:
+        # Labels for every row of an (m, 2) array of points
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        labels, _ = self.tree.nearest_many(points)
+        inside = np.all((points >= self.low) & (points <= self.high), axis=1)
+        return np.where(inside, labels, -1)
+
+    def cell_at(self, point: Point) -> VoronoiCell | None:
+        label = self.locate(point)
+        return self.diagram.voronoi_cells[label] if label >= 0 else None
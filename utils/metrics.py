@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator
+
+import numpy as np
+
+class Metrics:
+    '''
+    Timings and counters of a session. A frame is timed as a whole and per phase (viewbox, axis, scene, blit, ...),
+    counts made during a frame are kept with it and added to the totals. Builds (set_up_scene, the cells of a
+    voronoi diagram, ...) are timed apart from the frames. Only the last history frames are kept.
+    Everything is in seconds, summary and dump give milliseconds.
+    '''
+
+    def __init__(self, history: int = 600):
+        self.frames: deque[dict] = deque(maxlen=history)
+        self.current: dict | None = None
+        self.totals: dict[str, int] = {}
+        self.builds: dict[str, list[float]] = {}
+        self.start: float = time.perf_counter()
+
+    def reset(self):
+        self.frames.clear()
+        self.current = None
+        self.totals = {}
+        self.builds = {}
+        self.start = time.perf_counter()
+
+    @contextmanager
+    def frame(self) -> Iterator[dict]:
+        # Times one frame, phase and count inside of it go to this frame. The blocks that python allocated
+        # during the frame (and did not free again) are counted as allocated
+        start, blocks = time.perf_counter(), sys.getallocatedblocks()
+        self.current = {'time': start - self.start, 'phases': {}, 'counts': {}}
+        try:
+            yield self.current
+        finally:
+            frame, self.current = self.current, None
+            frame['total'] = time.perf_counter() - start
+            frame['counts']['allocated'] = sys.getallocatedblocks() - blocks
+            self.frames.append(frame)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        # Times a part of the current frame, or of the last frame when no frame is going on (like the blit of
+        # the pixmap in paintEvent, which Qt calls after render)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            frame = self.current if self.current is not None else (self.frames[-1] if self.frames else None)
+            if frame is not None:
+                frame['phases'][name] = frame['phases'].get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name: str, amount: int = 1):
+        self.totals[name] = self.totals.get(name, 0) + amount
+        if self.current is not None:
+            self.current['counts'][name] = self.current['counts'].get(name, 0) + amount
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        # Times a build, every time it runs
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.builds.setdefault(name, []).append(time.perf_counter() - start)
+
+    def last_frame(self) -> dict | None:
+        return self.frames[-1] if self.frames else None
+
+    def summary(self) -> dict:
+        # Statistics in milliseconds of the kept frames per phase, the mean counts per frame, the totals and the builds
+        def statistics(values: list[float]) -> dict[str, float]:
+            values = 1000 * np.asarray(values, dtype=float)
+            return {'count': len(values), 'mean': float(values.mean()), 'p50': float(np.percentile(values, 50)),
+                    'p95': float(np.percentile(values, 95)), 'max': float(values.max())}
+
+        frames = list(self.frames)
+        phases: dict[str, list[float]] = {}
+        counts: dict[str, list[int]] = {}
+        for frame in frames:
+            for name, duration in frame['phases'].items():
+                phases.setdefault(name, []).append(duration)
+            for name, amount in frame['counts'].items():
+                counts.setdefault(name, []).append(amount)
+        return {
+            'frames': len(frames),
+            'session': time.perf_counter() - self.start,
+            'frame': statistics([frame['total'] for frame in frames]) if frames else None,
+            'phases': {name: statistics(durations) for name, durations in phases.items()},
+            'counts': {name: float(np.mean(amounts)) for name, amounts in counts.items()},
+            'totals': dict(self.totals),
+            'builds': {name: statistics(durations) for name, durations in self.builds.items()},
+        }
+
+    def dump(self, path: str | os.PathLike, frames: bool = False):
+        # Writes the summary as json, with frames also every kept frame
+        data = self.summary()
+        if frames:
+            data['frame_log'] = list(self.frames)
+        with open(path, 'w') as file:
+            json.dump(data, file, indent=2)
+
+    def lines(self) -> list[str]:
+        # The text of the heads up display: the last frame and the mean of the kept frames per phase
+        last = self.last_frame()
+        if last is None:
+            return ['no frames yet']
+        summary = self.summary()
+        lines = [f"frame {1000 * last['total']:.1f} ms (mean {summary['frame']['mean']:.1f}, p95 {summary['frame']['p95']:.1f})"]
+        for name, duration in last['phases'].items():
+            lines.append(f"{name} {1000 * duration:.1f} ms (mean {summary['phases'][name]['mean']:.1f})")
+        lines.extend(f"{name} {amount}" for name, amount in last['counts'].items())
+        return lines
+
+# Shared by the canvas and the geometry, so builds deep in the geometry do not need a reference to the canvas
+METRICS = Metrics()
@@ -1,11 +1,22 @@
 from __future__ import annotations
 
-import random
-from PySide6.QtGui import QPainter, QPen, QColor, Qt, QBrush, QPolygonF
+import math
+from typing import Iterator
+
+import numpy as np
+from PySide6.QtGui import QPainter, QColor, Qt, QPolygonF
 from PySide6.QtCore import Qt, QPointF
 
 from utils.shapes import Point, Line, ComplexPolygon, HalfPlane
-from utils.geometry import half_plane_intersection
+from utils.geometry import half_plane_intersection, voronoi_cell
+from utils.parallel import build_voronoi_cells, iter_voronoi_cells
+from utils.spatial import SpatialGrid
+from utils.random_graphs import random_points, uniform_edges, knn_edges, radius_edges
+from utils.fortune import FortuneSweep
+from utils.metrics import METRICS
+from utils.delaunay import DelaunayTriangulation
+from utils.predicates import orientation, in_circle
+from utils.rendering import LineBatch, PointBatch, PolygonBatch
 import utils.colors as Colors
 
 class Vertex: 
@@ -17,8 +28,11 @@ class Vertex:
 
         self.radius = 2
     
+    def bounds(self) -> tuple[float, float, float, float]: 
+        return self.point.bounds()
+
     def draw(self, painter: QPainter): 
-        painter.setBrush(QBrush(Colors.MAROON))
+        painter.setBrush(Colors.brush(Colors.MAROON))
         painter.setPen(Qt.NoPen)
         painter.drawEllipse(self.point.x() - self.radius, self.point.y() - self.radius, 2 * self.radius, 2 * self.radius)
 
@@ -26,10 +40,19 @@ class Edge:
 
     def __init__(self, v1: Vertex, v2: Vertex):
         self.vertices: tuple[Vertex] =  (v1, v2)
-        self.line: Line = Line(v1.point, v2.point, thickness=3, color=Colors.TEAL)
+        self.line: Line = Line(v1.point, v2.point)
+
+    def update_line(self): 
+        # after one of the vertices got a new point
+        self.line = Line(self.vertices[0].point, self.vertices[1].point)
+
+    def bounds(self) -> tuple[float, float, float, float]: 
+        # from the vertices, so it is right even before update_line
+        (x1, y1), (x2, y2) = ((vertex.point.x(), vertex.point.y()) for vertex in self.vertices)
+        return (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
 
     def draw(self, painter: QPainter): 
-        self.line.draw(painter) 
+        self.line.draw(painter, thickness=3, color=Colors.TEAL) 
 
 
 class Network: 
@@ -41,43 +64,294 @@ class Network:
         self.n_vertices = len(vertices)
         self.n_edges = len(edges)
 
+        # the label of a vertex is its index in vertices, and every vertex knows its edges
+        for i, vertex in enumerate(vertices): 
+            vertex.label = i
+            vertex.edges = []
+        for edge in edges: 
+            v1, v2 = edge.vertices
+            v1.edges.append(edge)
+            if v2 is not v1: 
+                v2.edges.append(edge)
+
+    def edge_array(self) -> np.ndarray: 
+        # (m, 2) array with for every edge the labels of its vertices
+        return np.array([[edge.vertices[0].label, edge.vertices[1].label] for edge in self.edges], dtype=np.int64).reshape(-1, 2)
+
+    @classmethod
+    def from_arrays(cls, points: np.ndarray, edges: np.ndarray) -> Network: 
+        # points is an (n, 2) array of coordinates and edges an (m, 2) array of vertex labels
+        vertices = [Vertex(Point.from_xy(x, y), label=i) for i, (x, y) in enumerate(np.asarray(points, dtype=float).tolist())]
+        return cls(vertices, [Edge(vertices[v1], vertices[v2]) for v1, v2 in np.asarray(edges, dtype=np.int64).tolist()])
+
+    # uniform: connectivity edges between random pairs of vertices
+    # knn: an edge from every vertex to its k nearest vertices
+    # radius: an edge between every two vertices at most radius apart (by default about connectivity edges)
+    MODELS: tuple[str] = ('uniform', 'knn', 'radius')
+
     @classmethod
-    def create_random(cls, size: int = 20, max_range: int = 500, connectivity: int = 50):
-        vertices = [Vertex(Point(random.randint(1, max_range), random.randint(1,max_range))) for _ in range(size)]
-        edge_indices = random.sample([(i,j) for i in range(size) for j in range(size) if i < j], connectivity)
-        edges = [ Edge(vertices[v1], vertices[v2]) for v1, v2 in edge_indices ]
-        return Network(vertices, edges)
+    def create_random(cls, size: int = 20, max_range: int = 500, connectivity: int = 50, 
+                      model: str = 'uniform', k: int = 3, radius: float | None = None, seed: int | None = None) -> Network:
+        # The same seed gives the same network, the vertices are spread uniformly over [1, max_range] x [1, max_range]
+        return cls.from_arrays(*cls.random_arrays(size, max_range, connectivity, model, k, radius, seed))
+
+    @staticmethod
+    def random_arrays(size: int = 20, max_range: int = 500, connectivity: int = 50, 
+                      model: str = 'uniform', k: int = 3, radius: float | None = None, seed: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        # The points and edges of create_random as arrays, without making the objects (for very large networks)
+        if model not in Network.MODELS: 
+            raise ValueError(f"The model must be one of {Network.MODELS}")
+        rng = np.random.default_rng(seed)
+        points = random_points(size, max_range, rng)
+        if model == 'uniform': 
+            edges = uniform_edges(size, connectivity, rng)
+        elif model == 'knn': 
+            edges = knn_edges(points, k)
+        else: 
+            if radius is None: 
+                # a pair is closer than radius with a chance of about pi radius^2 / max_range^2
+                radius = max_range * math.sqrt(2 * connectivity / (math.pi * max(size * (size - 1), 1)))
+            edges = radius_edges(points, radius)
+        return points, edges
     
     def draw(self, painter: QPainter): 
-        for edge in self.edges: 
-            edge.draw(painter)
-        for vertex in self.vertices: 
-            vertex.draw(painter)
+        EDGE_BATCH.draw_items(painter, self.edges)
+        VERTEX_BATCH.draw_items(painter, self.vertices)
         
 class VoronoiDiagram:
 
-    def __init__(self, points: list[Point]):
+    # clipping: clip every cell against all other sites, O(n^2)
+    # fortune: find the neighbouring sites with a sweep line, O(n log n), and only clip against those
+    # delaunay: the neighbours are the edges of the delaunay triangulation (the dual of the diagram)
+    # vectorized: clip every cell against all other sites, but with numpy arrays instead of objects
+    # parallel: the vectorized clipping, spread over a pool of worker processes
+    # grid: clip only with the nearby sites, found trough a uniform grid over the sites
+    ENGINES: tuple[str] = ('clipping', 'fortune', 'delaunay', 'vectorized', 'parallel', 'grid')
+
+    def __init__(self, points: list[Point], engine: str = 'clipping', workers: int | None = None, build: bool = True):
+        # with build False every cell stays the starting box, to be filled in chunk by chunk with cell_chunks and add_cells
+        if engine not in VoronoiDiagram.ENGINES: 
+            raise ValueError(f"Unknown engine {engine}, choose one of {VoronoiDiagram.ENGINES}")
+
+        self.engine: str = engine
+        # amount of processes for the parallel engine (None uses all cores)
+        self.workers: int | None = workers
         self.vertices = [Vertex(points[i], label=i) for i in range(len(points))]
-        self.voronoi_cells: list[VoronoiCell] = self.create_voronoi_cells()
+        # for every site the labels of the sites that share a voronoi edge with it (if the engine knows them)
+        self.neighbours: list[set[int]] | None = None
+        self.delaunay: DelaunayTriangulation | None = None
+        # the last site that was edited, the next search for a site starts here
+        self.last_site: int = 0
+        if build: 
+            with METRICS.measure(f'voronoi cells {engine}'): 
+                self.voronoi_cells: list[VoronoiCell] = self.create_voronoi_cells()
+        else: 
+            self.voronoi_cells = [VoronoiCell(vertex) for vertex in self.vertices]
 
     def create_voronoi_cells(self): 
+        if self.engine == 'fortune': 
+            self.neighbours = FortuneSweep([vertex.point for vertex in self.vertices]).neighbours
+            return self.create_voronoi_cells_from_neighbours()
+        if self.engine == 'delaunay': 
+            self.delaunay = DelaunayTriangulation([vertex.point for vertex in self.vertices])
+            self.neighbours = self.delaunay.neighbours()
+            return self.create_voronoi_cells_from_neighbours()
+        if self.engine == 'vectorized': 
+            return self.create_voronoi_cells_vectorized()
+        if self.engine == 'parallel': 
+            return self.create_voronoi_cells_parallel()
+        if self.engine == 'grid': 
+            return self.create_voronoi_cells_grid()
+
         voronoicells = [VoronoiCell(vertex) for vertex in self.vertices]
         for i, cell in enumerate(voronoicells): 
             others = voronoicells[:i] + voronoicells[i+1:]
             cell.generate_cell(others)
         return voronoicells
 
+    def create_voronoi_cells_from_neighbours(self): 
+        # a cell is the intersection of the half planes of its neighbours only
+        voronoicells = [VoronoiCell(vertex) for vertex in self.vertices]
+        for i, cell in enumerate(voronoicells): 
+            cell.generate_cell([voronoicells[j] for j in sorted(self.neighbours[i])])
+        return voronoicells
+
+    def create_voronoi_cells_vectorized(self): 
+        # the coordinates of all sites are only converted to an array once
+        sites = np.array([[vertex.point.x(), vertex.point.y()] for vertex in self.vertices], dtype=float).reshape(-1, 2)
+        voronoicells = [VoronoiCell(vertex) for vertex in self.vertices]
+        for i, cell in enumerate(voronoicells): 
+            others = voronoicells[:i] + voronoicells[i+1:]
+            cell.generate_cell_vectorized(others, np.delete(sites, i, axis=0))
+        return voronoicells
+
+    def create_voronoi_cells_parallel(self): 
+        # only the site coordinates go to the workers and only the vertex and label arrays come back
+        sites = np.array([[vertex.point.x(), vertex.point.y()] for vertex in self.vertices], dtype=float).reshape(-1, 2)
+        voronoicells = [VoronoiCell(vertex) for vertex in self.vertices]
+        if not voronoicells: 
+            return voronoicells
+        box = np.array([[point.x(), point.y()] for point in voronoicells[0].hull], dtype=float)
+        for cell, (polygon, labels) in zip(voronoicells, build_voronoi_cells(sites, box, self.workers)): 
+            cell.set_polygon(polygon, labels, voronoicells)
+        return voronoicells
+
+    def cell_chunks(self, chunk_size: int | None = None) -> Iterator[tuple[int, np.ndarray, np.ndarray, np.ndarray]]: 
+        # The cells as the parallel engine computes them, one chunk at a time in the order they are done (see
+        # iter_voronoi_cells). Only arrays are made, so this can run on another thread than add_cells
+        sites = np.array([[vertex.point.x(), vertex.point.y()] for vertex in self.vertices], dtype=float).reshape(-1, 2)
+        box = np.array([[point.x(), point.y()] for point in VoronoiCell(Vertex(Point(0, 0))).hull], dtype=float)
+        return iter_voronoi_cells(sites, box, self.workers, chunk_size)
+
+    def add_cells(self, chunk: tuple[int, np.ndarray, np.ndarray, np.ndarray]) -> list[VoronoiCell]: 
+        # Sets the cells of a chunk of cell_chunks and returns them
+        start, offsets, polygons, labels = chunk
+        cells = self.voronoi_cells[start:start + len(offsets) - 1]
+        for k, cell in enumerate(cells): 
+            cell.set_polygon(polygons[offsets[k]:offsets[k + 1]], labels[offsets[k]:offsets[k + 1]], self.voronoi_cells)
+        return cells
+
+    def create_voronoi_cells_grid(self): 
+        grid = SpatialGrid([vertex.point for vertex in self.vertices])
+        voronoicells = [VoronoiCell(vertex) for vertex in self.vertices]
+        for cell in voronoicells: 
+            cell.generate_cell_indexed(grid, voronoicells)
+        return voronoicells
+
+    def to_arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: 
+        # The sites (n, 2), and the cells as flat arrays: the corners of cell i are vertices[offsets[i]:offsets[i + 1]]
+        # and labels holds for the edge from every corner to the next the label of the neighbouring site (-1 for the box)
+        sites = np.array([[vertex.point.x(), vertex.point.y()] for vertex in self.vertices], dtype=float).reshape(-1, 2)
+        offsets = np.zeros(len(self.voronoi_cells) + 1, dtype=np.int64)
+        vertices, labels = [], []
+        for i, cell in enumerate(self.voronoi_cells): 
+            # edge k starts at the end of edge k - 1
+            for k, edge in enumerate(cell.edges): 
+                start = cell.edges[k - 1].get_end()
+                vertices.append((start.x(), start.y()))
+                labels.append(edge.cell2.vertex.label if isinstance(edge, VoronoiEdge) else -1)
+            offsets[i + 1] = len(vertices)
+        return sites, offsets, np.array(vertices, dtype=float).reshape(-1, 2), np.array(labels, dtype=np.int64)
+
+    @classmethod
+    def from_arrays(cls, sites: np.ndarray, offsets: np.ndarray, vertices: np.ndarray, labels: np.ndarray, engine: str = 'clipping') -> VoronoiDiagram: 
+        # Rebuilds a diagram from the arrays of to_arrays without computing the cells again
+        points = [Point.from_xy(x, y) for x, y in np.asarray(sites, dtype=float).reshape(-1, 2).tolist()]
+        diagram = cls(points, engine, build=False)
+        diagram.neighbours = []
+        for i, cell in enumerate(diagram.voronoi_cells): 
+            cell_labels = np.asarray(labels[offsets[i]:offsets[i + 1]], dtype=np.int64)
+            cell.set_polygon(np.asarray(vertices[offsets[i]:offsets[i + 1]], dtype=float), cell_labels, diagram.voronoi_cells)
+            diagram.neighbours.append(set(cell_labels[cell_labels >= 0].tolist()))
+        return diagram
+
+    def nearest_site(self, point: Point, start: int = 0) -> int: 
+        # Label of the site closest to point, found by walking from start to the neighbour closest to point
+        # (in a voronoi diagram this greedy walk always ends at the closest site)
+        if not self.vertices: 
+            raise ValueError("The diagram does not have any sites")
+        current = self.voronoi_cells[start]
+        distance = abs(current.vertex.point - point)
+        while True: 
+            closest = min(current.neighbours(), key=lambda cell: abs(cell.vertex.point - point), default=None)
+            if closest is None or abs(closest.vertex.point - point) >= distance: 
+                return current.vertex.label
+            current = closest
+            distance = abs(current.vertex.point - point)
+
+    def insert_site(self, point: Point) -> int: 
+        # Adds a site and only updates the cells of its neighbours, returns the label of the new site
+        vertex = Vertex(point, label=len(self.vertices))
+        cell = VoronoiCell(vertex)
+        start = self.nearest_site(point, self.last_site) if self.vertices else None
+        if start is not None and self.vertices[start].point == point: 
+            raise ValueError(f"There already is a site at {point}")
+        self.vertices.append(vertex)
+        self.voronoi_cells.append(cell)
+        self.invalidate_neighbours()
+
+        if start is not None: 
+            self.generate_local_cell(cell, self.voronoi_cells[start])
+            # the new cell takes its area from exactly the cells it shares an edge with
+            for neighbour in cell.neighbours(): 
+                if neighbour.clip_with_vornoi_edge(VoronoiEdge(neighbour, cell)): 
+                    neighbour.update_hull()
+        self.last_site = vertex.label
+        return vertex.label
+
+    def remove_site(self, label: int): 
+        # Removes a site and gives its area back to its neighbours, the labels after label shift down by one
+        released = self.release_cell(self.voronoi_cells[label])
+
+        del self.vertices[label]
+        del self.voronoi_cells[label]
+        for vertex in self.vertices[label:]: 
+            vertex.label -= 1
+        self.invalidate_neighbours()
+        self.last_site = released[0].vertex.label if released else 0
+
+    def move_site(self, label: int, point: Point): 
+        # Moves a site, which is the same as removing and inserting it but the label stays the same
+        # two sites at one position would get the same cell, so that is refused before anything changes
+        nearest = self.nearest_site(point, label)
+        if nearest != label and self.vertices[nearest].point == point: 
+            raise ValueError(f"There already is a site at {point}")
+        cell = self.voronoi_cells[label]
+        released = self.release_cell(cell)
+        self.invalidate_neighbours()
+
+        cell.vertex.point = point
+        others = released or [other for other in self.voronoi_cells[:2] if other is not cell]
+        if others: 
+            start = self.nearest_site(point, others[0].vertex.label)
+            self.generate_local_cell(cell, self.voronoi_cells[start])
+            for neighbour in cell.neighbours(): 
+                if neighbour.clip_with_vornoi_edge(VoronoiEdge(neighbour, cell)): 
+                    neighbour.update_hull()
+        self.last_site = label
+
+    def release_cell(self, cell: VoronoiCell) -> list[VoronoiCell]: 
+        # Recomputes the cells around cell as if its site was not there anymore and returns them
+        # their new neighbours can only be their old neighbours or the neighbours of cell
+        released = cell.neighbours()
+        for neighbour in released: 
+            candidates = {other.vertex.label: other for other in neighbour.neighbours() + released}
+            others = [other for other in candidates.values() if other is not cell and other is not neighbour]
+            neighbour.reset()
+            neighbour.generate_cell(others)
+        cell.reset()
+        return released
+
+    def generate_local_cell(self, cell: VoronoiCell, start: VoronoiCell): 
+        # Clips cell with start and then keeps adding the neighbours of the cells it touches
+        # the cells that end up touching cell form a connected group around start, so we can not miss one
+        candidates: set[VoronoiCell] = {start}
+        frontier: list[VoronoiCell] = [start]
+        while frontier: 
+            for other in frontier: 
+                cell.clip_with_vornoi_edge(VoronoiEdge(cell, other))
+            frontier = []
+            for neighbour in cell.neighbours(): 
+                for other in neighbour.neighbours(): 
+                    if other is not cell and other not in candidates: 
+                        candidates.add(other)
+                        frontier.append(other)
+        cell.update_hull()
+
+    def invalidate_neighbours(self): 
+        # neighbours and delaunay describe the sites at construction, they are not updated with the diagram
+        self.neighbours = None
+        self.delaunay = None
+
     def draw(self, painter: QPainter): 
-        for voronoi_cell in self.voronoi_cells: 
-            voronoi_cell.draw(painter, color=Colors.WHITE)
-        for vertex in self.vertices: 
-            vertex.point.draw(painter)
+        CELL_BATCH.draw_items(painter, self.voronoi_cells)
+        SITE_BATCH.draw_items(painter, self.vertices)
 
 class VoronoiEdge:
 
     def __init__(self, c1: VoronoiCell, c2: VoronoiCell):
-        self.cell1: Vertex = c1 
-        self.cell2: Vertex = c2 
+        self.cell1: VoronoiCell = c1 
+        self.cell2: VoronoiCell = c2 
         bisector: Line = c1.vertex.point.bi_sector(c2.vertex.point) 
         self.halfplane: HalfPlane = HalfPlane(bisector, c1.vertex.point - bisector.start)
 
@@ -100,65 +374,163 @@ class VoronoiCell:
 
     def __init__(self, vertex: Vertex):
         self.vertex: Vertex = vertex
+        self.reset()
+
+    def reset(self): 
+        # Back to the starting box, before any clipping
         self.hull: list[Point] = [Point(-1000, 1000), Point(1000,1000), Point(1000,-1000), Point(-1000, -1000)]
         self.edges: list[VoronoiEdge | Line] = [Line(self.hull[i], self.hull[(i+1) % len(self.hull)]) for i in range(len(self.hull))]
 
         self.QPolygon: QPolygonF = QPolygonF([QPointF(point.x(), point.y()) for point in self.hull]) 
 
+    def update_hull(self): 
+        # Rebuilds the hull and QPolygon after the edges changed
+        self.hull = [edge.get_end() for edge in self.edges]
+        self.QPolygon = QPolygonF([QPointF(point.x(), point.y()) for point in self.hull]) 
+
+    def neighbours(self) -> list[VoronoiCell]: 
+        # The cells that share an edge with this cell
+        return [edge.cell2 for edge in self.edges if isinstance(edge, VoronoiEdge)]
+
     def generate_cell(self, others: list[VoronoiCell]): 
         possible_edges = [VoronoiEdge(self, other) for other in others]
 
         for edge in possible_edges: 
             self.clip_with_vornoi_edge(edge)
         
-        self.hull = [edge.get_end() for edge in self.edges]
-        self.QPolygon = QPolygonF([QPointF(point.x(), point.y()) for point in self.hull]) 
-    
-    def clip_with_vornoi_edge(self, ve: VoronoiEdge): 
-        intersections: list[Point] = []
-        intersections_i: list[int] = []
-
-        # loop trough all edges and see if there is an intersection of the polygon with the half plane
-        # self.edges here contains a combination of Lines and Voronoiedges
-        for i, edge in enumerate(self.edges): 
-            intersection: Point = edge.intersects(ve.halfplane.line)
-            # we also ensure that we can not add the same end point twice (if it by coincidence goes trough a line endpoint)
-            if intersection and edge.contains_with_tol(intersection) and not (intersection in intersections):
-                intersections_i.append(i)
-                intersections.append(intersection)
-        
-        # if there are intersections there must be 2 (property of polygon being convex)
-        if len(intersections) == 2: 
-            i1 = intersections_i[0]
-            i2 = intersections_i[1]
-            # split them up in two parts 
-            first_part: list[VoronoiEdge | Line] = self.edges[i1 + 1: i2]
-            second_part: list[VoronoiEdge | Line] = self.edges[i2 + 1:] + self.edges[:i1]
-            # check which side of the polygon is contained in the polygon (both line and ve have the get_end command)
-            if ve.halfplane.contains(self.edges[i1].get_end()): 
-                self.edges[i1].set_start(intersections[0])
-                self.edges[i2].set_end(intersections[1])
-                ve.set_start(intersections[1])
-                ve.set_end(intersections[0])
-                self.edges = [ve, self.edges[i1]] + first_part + [self.edges[i2]]
+        self.update_hull()
+
+    def generate_cell_indexed(self, grid: SpatialGrid, cells: list[VoronoiCell], limit: int = 32): 
+        # Same result as generate_cell, but we only clip with the sites close enough to matter
+        # grid holds the sites of cells, which we visit in increasing distance. A site further away than
+        # twice the radius of the current cell has its bisector outside of the cell, and so do all sites after it
+        radius = self.radius()
+        visited = 0
+        for distance, i in grid.nearest(self.vertex.point): 
+            if distance > 2 * radius: 
+                break
+            if visited == limit: 
+                # the cell reaches the box (it is on the outside of the sites) so the radius stays large,
+                # the corners are checked one by one instead
+                self.clip_corners(grid, cells)
+                break
+            visited += 1
+            if cells[i] is self: 
+                continue
+            if self.clip_with_vornoi_edge(VoronoiEdge(self, cells[i])): 
+                radius = self.radius()
+
+        self.update_hull()
+
+    def clip_corners(self, grid: SpatialGrid, cells: list[VoronoiCell]): 
+        # The cell only gets smaller by clipping, so when the site is the nearest site of every corner the cell is
+        # final (the voronoi cell is convex). A corner with a closer site is cut off by the bisector with that site
+        x, y = self.vertex.point.x(), self.vertex.point.y()
+        k = 0
+        while k < len(self.edges): 
+            corner = self.edges[k].get_end()
+            own = math.hypot(corner.x() - x, corner.y() - y)
+            distance, i = next(grid.nearest(corner))
+            k += 1
+            if cells[i] is not self and distance < own - 1e-9 * max(1.0, own): 
+                if self.clip_with_vornoi_edge(VoronoiEdge(self, cells[i])): 
+                    k = 0
+
+    def radius(self) -> float: 
+        # distance from the site to the furthest corner of the cell
+        x, y = self.vertex.point.x(), self.vertex.point.y()
+        return max(math.hypot(edge.get_end().x() - x, edge.get_end().y() - y) for edge in self.edges)
+
+    def generate_cell_vectorized(self, others: list[VoronoiCell], sites: np.ndarray | None = None): 
+        # Same result as generate_cell, but the polygon and the bisectors are kept as numpy arrays while clipping
+        # sites can hold the coordinates of others as a (k, 2) array when the caller already has them
+        if sites is None: 
+            sites = np.array([[other.vertex.point.x(), other.vertex.point.y()] for other in others], dtype=float).reshape(-1, 2)
+        site = np.array([self.vertex.point.x(), self.vertex.point.y()], dtype=float)
+        box = np.array([[point.x(), point.y()] for point in self.hull], dtype=float)
+        polygon, labels = voronoi_cell(site, sites, box)
+        self.set_polygon(polygon, labels, others)
+
+    def set_polygon(self, polygon: np.ndarray, labels: np.ndarray, others: list[VoronoiCell]): 
+        # Creates the edges, hull and QPolygon from the vertices of a cell
+        # labels[i] is the index in others of the cell on the other side of edge i (-1 for the box)
+        points = [Point(float(x), float(y)) for x, y in polygon]
+        self.edges = []
+        for i, label in enumerate(labels.tolist()): 
+            start, end = points[i], points[(i + 1) % len(points)]
+            if label < 0: 
+                self.edges.append(Line(start, end))
             else: 
-                self.edges[i2].set_start(intersections[1])
-                self.edges[i1].set_end(intersections[0])
-                ve.set_start(intersections[0])
-                ve.set_end(intersections[1])
-                self.edges = [ve, self.edges[i2]] + second_part + [self.edges[i1]]
+                edge = VoronoiEdge(self, others[label])
+                edge.set_start(start)
+                edge.set_end(end)
+                self.edges.append(edge)
+
+        self.update_hull()
+    
+    def corner_side(self, i: int, ve: VoronoiEdge) -> int: 
+        # Side of the half plane of ve that the end of edge i lies on (1 inside, 0 on the line, -1 outside)
+        # Between two voronoi edges the corner is the center of the circle trough this site and the two neighbours,
+        # it is closer to the new site exactly when that site lies inside the circle. Testing this on the sites
+        # instead of on the rounded corner keeps points where more than three cells meet exact
+        edge, following = self.edges[i], self.edges[(i + 1) % len(self.edges)]
+        if isinstance(edge, VoronoiEdge) and isinstance(following, VoronoiEdge): 
+            site, a, b, other = (cell.vertex.point for cell in (self, edge.cell2, following.cell2, ve.cell2))
+            site, a, b, other = ((point.x(), point.y()) for point in (site, a, b, other))
+            turn = orientation(site, a, b)
+            if turn != 0: 
+                return -turn * in_circle(site, a, b, other)
+        return ve.halfplane.side(edge.get_end())
+
+    def clip_with_vornoi_edge(self, ve: VoronoiEdge) -> bool: 
+        # Cuts off the part of the cell outside of the half plane of ve, returns whether anything changed
+        # self.edges here contains a combination of Lines and Voronoiedges, edge i goes from the end of edge i - 1 to its own end
+        # every corner is tested once (exactly) against the half plane, so a line trough a corner is found only once
+        halfplane = ve.halfplane
+        corners: list[Point] = [edge.get_end() for edge in self.edges]
+        sides: list[int] = [self.corner_side(i, ve) for i in range(len(corners))]
+        if -1 not in sides or 1 not in sides: 
+            return False
+
+        # the edge where the boundary leaves the half plane and the edge where it comes back in (a corner on the line counts as inside)
+        m = len(corners)
+        leaving = next(i for i in range(m) if sides[i - 1] >= 0 and sides[i] < 0)
+        entering = next(i for i in range(m) if sides[i - 1] < 0 and sides[i] >= 0)
+
+        kept: list[VoronoiEdge | Line] = [self.edges[(entering + k) % m] for k in range((leaving - entering) % m + 1)]
+        if sides[leaving - 1] == 0: 
+            # the boundary leaves at a corner, the leaving edge lies completely outside
+            cut_start = corners[leaving - 1]
+            kept.pop()
+        else: 
+            cut_start = halfplane.crossing(corners[leaving - 1], corners[leaving])
+            self.edges[leaving].set_end(cut_start)
+        if sides[entering] == 0: 
+            cut_end = corners[entering]
+            kept.pop(0)
+        else: 
+            cut_end = halfplane.crossing(corners[entering], corners[entering - 1])
+            self.edges[entering].set_start(cut_end)
+
+        ve.set_start(cut_start)
+        ve.set_end(cut_end)
+        self.edges = [ve] + kept
+        return True
+
+    def bounds(self) -> tuple[float, float, float, float]: 
+        xs = [point.x() for point in self.hull]
+        ys = [point.y() for point in self.hull]
+        return (min(xs), min(ys), max(xs), max(ys))
 
     def draw(self, painter: QPainter, color: QColor = Colors.MAROON): 
-        # for the inside
-        brush = QBrush(color)
-        painter.setBrush(brush)
-
-        # for the outline
-        pen = QPen()
-        pen.setWidth(1)
-        pen.setColor(Colors.GREY)
-        pen.setStyle(Qt.PenStyle.SolidLine)
-        pen.setCapStyle(Qt.PenCapStyle.RoundCap)
-        painter.setPen(pen)
+        # the inside and the outline
+        painter.setBrush(Colors.brush(color))
+        painter.setPen(Colors.pen(Colors.GREY, 1))
 
         painter.drawPolygon(self.QPolygon)
+
+# Edge.draw, Vertex.draw and the cells and sites of VoronoiDiagram as batches, for drawing many at once
+EDGE_BATCH = LineBatch(Colors.pen(Colors.TEAL, 3))
+VERTEX_BATCH = PointBatch(Colors.MAROON)
+CELL_BATCH = PolygonBatch(Colors.brush(Colors.WHITE), Colors.pen(Colors.GREY, 1))
+SITE_BATCH = PointBatch(Colors.MAROON, radius=3)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator
+
+import numpy as np
+
+from utils.geometry import voronoi_cell
+
+# every worker process keeps its own reference to the site coordinates, they are sent once when it starts
+_sites: np.ndarray | None = None
+_box: np.ndarray | None = None
+
+def _init_worker(sites: np.ndarray, box: np.ndarray):
+    global _sites, _box
+    _sites = sites
+    _box = box
+
+def _build_chunk(bounds: tuple[int, int]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Computes the cells start..stop and packs them into flat arrays:
+    # offsets (stop - start + 1), vertices (total x 2) and the labels of the neighbours (total)
+    start, stop = bounds
+    polygons, labels = [], []
+    offsets = np.zeros(stop - start + 1, dtype=np.int64)
+    for k, i in enumerate(range(start, stop)):
+        others = np.delete(_sites, i, axis=0)
+        polygon, cell_labels = voronoi_cell(_sites[i], others, _box)
+        # the labels point into others, which misses site i
+        cell_labels = np.where(cell_labels >= i, cell_labels + 1, cell_labels)
+        polygons.append(polygon)
+        labels.append(cell_labels)
+        offsets[k + 1] = offsets[k] + len(polygon)
+    return offsets, np.concatenate(polygons).reshape(-1, 2), np.concatenate(labels).astype(np.int64)
+
+def build_voronoi_cells(sites: np.ndarray, box: np.ndarray, workers: int | None = None, chunk_size: int | None = None) -> list[tuple[np.ndarray, np.ndarray]]:
+    '''
+    Builds the voronoi cells of all sites (n x 2 array) within box over a pool of processes.
+    Returns for every site the vertices of its cell and for every edge the index of the neighbouring site
+    (-1 for the sides of the box). Sites are split in chunks that are handed out to the workers, a few
+    chunks per worker so that a slow chunk does not keep the other workers waiting.
+    '''
+    cells: list[tuple[np.ndarray, np.ndarray]] = [None] * len(sites)
+    for start, offsets, polygons, labels in iter_voronoi_cells(sites, box, workers, chunk_size):
+        for k in range(len(offsets) - 1):
+            cells[start + k] = (polygons[offsets[k]:offsets[k + 1]], labels[offsets[k]:offsets[k + 1]])
+    return cells
+
+def iter_voronoi_cells(sites: np.ndarray, box: np.ndarray, workers: int | None = None, chunk_size: int | None = None) -> Iterator[tuple[int, np.ndarray, np.ndarray, np.ndarray]]:
+    # The cells of build_voronoi_cells one chunk at a time, in the order the chunks are done, as (start, offsets,
+    # vertices, labels) for the sites start, start + 1, ... Closing the generator cancels the chunks that did not start
+    n = len(sites)
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(n / (4 * workers)))
+    bounds = [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(sites, box))
+    try:
+        futures = {executor.submit(_build_chunk, chunk): chunk[0] for chunk in bounds}
+        for future in as_completed(futures):
+            yield (futures[future], *future.result())
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
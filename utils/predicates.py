@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from fractions import Fraction
+
+import numpy as np
+
+# Geometric predicates that always give the right sign. The result is first computed with floats, together
+# with a bound on the rounding error of that computation (Shewchuk, Adaptive Precision Floating-Point
+# Arithmetic and Fast Robust Geometric Predicates). Only when the value is within the bound, so too close
+# to zero to trust its sign, it is computed again with exact fractions. That only happens for (nearly)
+# degenerate input, like collinear or cocircular points.
+
+EPSILON = 2 ** -53
+_CROSS_BOUND = (3 + 16 * EPSILON) * EPSILON
+_INCIRCLE_BOUND = (10 + 96 * EPSILON) * EPSILON
+
+def _sign(value: float | Fraction) -> int:
+    return (value > 0) - (value < 0)
+
+def cross_sign(a: tuple[float, float], b: tuple[float, float], c: tuple[float, float], d: tuple[float, float]) -> int:
+    # Sign of the cross product (b - a) x (d - c): > 0 if d - c turns left from b - a and 0 if they are parallel
+    left = (b[0] - a[0]) * (d[1] - c[1])
+    right = (b[1] - a[1]) * (d[0] - c[0])
+    det = left - right
+    if abs(det) > _CROSS_BOUND * (abs(left) + abs(right)):
+        return 1 if det > 0 else -1
+
+    ax, ay, bx, by, cx, cy, dx, dy = map(Fraction, (*a, *b, *c, *d))
+    return _sign((bx - ax) * (dy - cy) - (by - ay) * (dx - cx))
+
+def orientation(a: tuple[float, float], b: tuple[float, float], c: tuple[float, float]) -> int:
+    # 1 if a, b, c make a left turn, -1 for a right turn and 0 if they are collinear
+    return cross_sign(a, b, a, c)
+
+def side_of_line(origin: tuple[float, float], normal: tuple[float, float], point: tuple[float, float]) -> int:
+    # Sign of (point - origin) . normal: 1 on the side the normal points to, -1 on the other side and 0 on the line
+    first = (point[0] - origin[0]) * normal[0]
+    second = (point[1] - origin[1]) * normal[1]
+    dot = first + second
+    if abs(dot) > _CROSS_BOUND * (abs(first) + abs(second)):
+        return 1 if dot > 0 else -1
+
+    ox, oy, nx, ny, px, py = map(Fraction, (*origin, *normal, *point))
+    return _sign((px - ox) * nx + (py - oy) * ny)
+
+def in_circle(a: tuple[float, float], b: tuple[float, float], c: tuple[float, float], d: tuple[float, float]) -> int:
+    # 1 if d lies inside the circle trough the counter clockwise triangle a, b, c, -1 outside and 0 on it
+    adx, ady = a[0] - d[0], a[1] - d[1]
+    bdx, bdy = b[0] - d[0], b[1] - d[1]
+    cdx, cdy = c[0] - d[0], c[1] - d[1]
+    bdxcdy, cdxbdy = bdx * cdy, cdx * bdy
+    cdxady, adxcdy = cdx * ady, adx * cdy
+    adxbdy, bdxady = adx * bdy, bdx * ady
+    alift = adx * adx + ady * ady
+    blift = bdx * bdx + bdy * bdy
+    clift = cdx * cdx + cdy * cdy
+
+    det = alift * (bdxcdy - cdxbdy) + blift * (cdxady - adxcdy) + clift * (adxbdy - bdxady)
+    permanent = ((abs(bdxcdy) + abs(cdxbdy)) * alift
+                 + (abs(cdxady) + abs(adxcdy)) * blift
+                 + (abs(adxbdy) + abs(bdxady)) * clift)
+    if abs(det) > _INCIRCLE_BOUND * permanent:
+        return 1 if det > 0 else -1
+
+    ax, ay, bx, by, cx, cy, dx, dy = map(Fraction, (*a, *b, *c, *d))
+    adx, ady, bdx, bdy, cdx, cdy = ax - dx, ay - dy, bx - dx, by - dy, cx - dx, cy - dy
+    return _sign((adx * adx + ady * ady) * (bdx * cdy - cdx * bdy)
+                 + (bdx * bdx + bdy * bdy) * (cdx * ady - adx * cdy)
+                 + (cdx * cdx + cdy * cdy) * (adx * bdy - bdx * ady))
+
+def orientation_array(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    # orientation for every row of three (k, 2) arrays, only the rows the filter can not decide are done exactly
+    left = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1])
+    right = (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    det = left - right
+    signs = np.sign(det).astype(np.int64)
+    for i in np.nonzero(np.abs(det) <= _CROSS_BOUND * (np.abs(left) + np.abs(right)))[0].tolist():
+        signs[i] = orientation(tuple(a[i].tolist()), tuple(b[i].tolist()), tuple(c[i].tolist()))
+    return signs
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+# Generators for the vertices and edges of random networks as numpy arrays, in about linear time and memory.
+# Points are (n, 2) float arrays and edges (m, 2) arrays of vertex indices with the smallest index first.
+
+def random_points(size: int, max_range: float, rng: np.random.Generator) -> np.ndarray:
+    return rng.uniform(1, max_range, (size, 2))
+
+def uniform_edges(size: int, count: int, rng: np.random.Generator) -> np.ndarray:
+    # count different pairs of vertices, every pair equally likely
+    total = size * (size - 1) // 2
+    if count > total:
+        raise ValueError(f"There are only {total} pairs of vertices, so there can not be {count} edges")
+    if count > total // 2:
+        # dense, so we can just as well list all pairs
+        first, second = np.triu_indices(size, k=1)
+        chosen = rng.choice(total, count, replace=False)
+        return np.column_stack([first[chosen], second[chosen]]).astype(np.int64)
+
+    keys = np.zeros(0, dtype=np.int64)
+    while len(keys) < count:
+        # draw a few more pairs than needed, the doubles and loops are dropped
+        draw = int((count - len(keys)) * 1.1) + 16
+        first, second = rng.integers(0, size, draw), rng.integers(0, size, draw)
+        new = np.minimum(first, second) * size + np.maximum(first, second)
+        keys = np.unique(np.concatenate([keys, new[first != second]]))
+    keys = rng.choice(keys, count, replace=False)
+    return np.column_stack([keys // size, keys % size])
+
+class _Grid:
+    '''Points sorted on the uniform grid cell they are in, so the points of a cell are consecutive'''
+
+    def __init__(self, points: np.ndarray, cell_size: float):
+        self.points: np.ndarray = points
+        self.cell_size: float = cell_size
+        self.low: np.ndarray = points.min(axis=0) if len(points) else np.zeros(2)
+        self.cells: np.ndarray = np.floor((points - self.low) / cell_size).astype(np.int64)
+        self.height: int = int(self.cells[:, 1].max()) + 1 if len(points) else 1
+        keys = self.key(self.cells[:, 0], self.cells[:, 1])
+        self.order: np.ndarray = np.argsort(keys, kind='stable')
+        self.keys: np.ndarray = keys[self.order]
+        # the most points in one grid cell
+        self.max_count: int = int(np.unique(self.keys, return_counts=True)[1].max()) if len(points) else 0
+
+    def key(self, cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+        return cx * self.height + cy
+
+    def cell_range(self, queries: np.ndarray, dx: int, dy: int) -> tuple[np.ndarray, np.ndarray]:
+        # Where the points of the cell at (dx, dy) from the cell of each query start in self.order, and how many there are
+        cy = self.cells[queries, 1] + dy
+        keys = self.key(self.cells[queries, 0] + dx, cy)
+        left = np.searchsorted(self.keys, keys, side='left')
+        # a row outside of the grid would give the key of a cell in the next or previous column
+        counts = np.where((cy >= 0) & (cy < self.height), np.searchsorted(self.keys, keys, side='right') - left, 0)
+        return left, counts
+
+    def pairs(self, queries: np.ndarray, offsets: list[tuple[int, int]]) -> tuple[np.ndarray, np.ndarray]:
+        # (query, point) for every point in the grid cells at the offsets from the cell of each query
+        firsts, seconds = [], []
+        for dx, dy in offsets:
+            left, counts = self.cell_range(queries, dx, dy)
+            slots = np.repeat(left - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            firsts.append(np.repeat(queries, counts))
+            seconds.append(self.order[slots])
+        return np.concatenate(firsts), np.concatenate(seconds)
+
+    def block(self, queries: np.ndarray, offsets: list[tuple[int, int]]) -> np.ndarray:
+        # The same points as pairs, as one row per query filled from the left (-1 for the empty places at the end)
+        result = np.full((len(queries), len(offsets) * self.max_count), -1, dtype=np.int64)
+        filled = np.zeros(len(queries), dtype=np.int64)
+        for dx, dy in offsets:
+            left, counts = self.cell_range(queries, dx, dy)
+            within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            rows = np.repeat(np.arange(len(queries)), counts)
+            result[rows, filled[rows] + within] = self.order[np.repeat(left, counts) + within]
+            filled += counts
+        return result[:, :filled.max() if len(queries) else 0]
+
+    def border_distance(self, queries: np.ndarray, r: int) -> np.ndarray:
+        # Distance from each query to the outside of the block of (2r + 1) x (2r + 1) cells around its cell
+        corner = self.low + (self.cells[queries] - r) * self.cell_size
+        inside = self.points[queries] - corner
+        return np.minimum(inside, (2 * r + 1) * self.cell_size - inside).min(axis=1)
+
+def _unique_edges(first: np.ndarray, second: np.ndarray, size: int) -> np.ndarray:
+    keys = np.unique(np.minimum(first, second) * size + np.maximum(first, second))
+    return np.column_stack([keys // size, keys % size])
+
+def radius_edges(points: np.ndarray, radius: float, chunk_size: int = 100_000) -> np.ndarray:
+    # All pairs of points at most radius apart, only the points in neighbouring cells of a grid with cells of radius are tested
+    n = len(points)
+    if n < 2 or radius <= 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    grid = _Grid(points, radius)
+    # half of the neighbouring cells, the other half is found from the other side
+    offsets = [(0, 0), (1, -1), (1, 0), (1, 1), (0, 1)]
+    edges = []
+    for start in range(0, n, chunk_size):
+        first, second = grid.pairs(grid.order[start:start + chunk_size], offsets)
+        delta = points[first] - points[second]
+        same_cell = (grid.cells[first] == grid.cells[second]).all(axis=1)
+        keep = ((delta * delta).sum(axis=1) <= radius * radius) & (~same_cell | (first < second))
+        edges.append(np.column_stack([np.minimum(first, second)[keep], np.maximum(first, second)[keep]]))
+    return np.concatenate(edges)
+
+def knn_edges(points: np.ndarray, k: int, budget: int = 20_000_000) -> np.ndarray:
+    # Edges from every point to its k nearest points (an edge found from both sides is kept once)
+    # budget limits the number of candidates that are looked at in one go
+    n = len(points)
+    k = min(k, n - 1)
+    if k < 1:
+        return np.zeros((0, 2), dtype=np.int64)
+    # about k points per cell, so the 3 x 3 block around a point usually holds its k nearest. The size comes from
+    # the largest extent and not from the area, which goes to 0 for points on a line and the cells with it
+    extent = float((points.max(axis=0) - points.min(axis=0)).max())
+    grid = _Grid(points, extent * math.sqrt(k / n) if extent > 0 else 1.0)
+
+    firsts, seconds = [], []
+    # in grid order the searches for neighbouring cells go trough the keys in order, which is a lot faster
+    queries = grid.order.copy()
+    r = 1
+    while queries.size:
+        offsets = [(dx, dy) for dx in range(-r, r + 1) for dy in range(-r, r + 1)]
+        chunk_size = max(1, budget // (len(offsets) * grid.max_count))
+        left_over = []
+        for start in range(0, len(queries), chunk_size):
+            chunk = queries[start:start + chunk_size]
+            candidates = grid.block(chunk, offsets)
+            delta = points[np.maximum(candidates, 0)] - points[chunk, None, :]
+            distance_sq = (delta * delta).sum(axis=2)
+            # the empty places and the point itself never count
+            distance_sq[(candidates < 0) | (candidates == chunk[:, None])] = np.inf
+            if distance_sq.shape[1] > k:
+                nearest = np.argpartition(distance_sq, k - 1, axis=1)[:, :k]
+            else:
+                nearest = np.broadcast_to(np.arange(distance_sq.shape[1]), (len(chunk), distance_sq.shape[1]))
+            nearest_sq = np.take_along_axis(distance_sq, nearest, axis=1)
+
+            # the k nearest are certain when the k-th is closer than anything outside the block
+            border = grid.border_distance(chunk, r)
+            kth = nearest_sq.max(axis=1) if nearest_sq.shape[1] == k else np.full(len(chunk), np.inf)
+            done = kth <= border * border
+            firsts.append(np.repeat(chunk[done], k))
+            seconds.append(np.take_along_axis(candidates[done], nearest[done], axis=1).reshape(-1))
+            left_over.append(chunk[~done])
+        queries = np.concatenate(left_over)
+        r *= 2
+    return _unique_edges(np.concatenate(firsts), np.concatenate(seconds), n)
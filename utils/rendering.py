@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+import numpy as np
+from PySide6.QtGui import QPainter, QPen, QBrush, QColor, QPolygonF
+from PySide6.QtCore import Qt, QLineF, QRectF, QPointF
+
+from utils.shapes import Rectangle, Line, Point
+from utils.spatial import BoxTree
+from utils.detail import simplify_polygon, cluster_points, snap_segments
+import utils.colors as Colors
+from utils.metrics import METRICS
+
+# A batch draws many items of one style at once: the pen and brush are set once, and the Qt primitive of every
+# item is made by primitive(item) so a layer can keep them between frames. This saves a QPen, a QBrush and the
+# state changes per item. Whether one Qt call for the whole batch beats a loop of one call per primitive depends on
+# the case, benchmarks/draw_calls.py measures them: drawLines is faster for thin or aliased lines, but for wide
+# antialiased lines Qt strokes them as one path and a loop is faster, as it is for markers and polygons.
+# simplify(items, pixel) gives the primitives and their boxes (k, 4) for drawing at a zoom where a pixel is pixel
+# world units, with nothing off by more than a pixel and the number of primitives bounded by the number of pixels.
+
+def _boxes(corners: np.ndarray) -> np.ndarray:
+    # boxes of the segments (k, 4) or the points (k, 2)
+    if not len(corners):
+        return np.zeros((0, 4))
+    corners = corners.reshape(len(corners), -1, 2)
+    return np.column_stack([corners.min(axis=1), corners.max(axis=1)]).reshape(-1, 4)
+
+class LineBatch:
+    '''Lines with one pen, line(item) gives the Line of an item (by default item.line, as for an Edge)'''
+
+    def __init__(self, pen: QPen, line: Callable[[Any], Line] | None = None, snap_size: float = 2):
+        self.pen: QPen = pen
+        self.line: Callable[[Any], Line] = line or (lambda item: item.line)
+        # when simplified the ends go to a grid of snap_size pixels, so they move at most a pixel for the default
+        self.snap_size: float = snap_size
+
+    def primitive(self, item) -> QLineF:
+        line = self.line(item)
+        return QLineF(line.start.x(), line.start.y(), line.end.x(), line.end.y())
+
+    def draw(self, painter: QPainter, primitives: list[QLineF]):
+        painter.setPen(self.pen)
+        if self.pen.widthF() <= 1 or not painter.testRenderHint(QPainter.Antialiasing):
+            painter.drawLines(primitives)
+            return
+        draw_line = painter.drawLine
+        for line in primitives:
+            draw_line(line)
+
+    def draw_items(self, painter: QPainter, items: list):
+        self.draw(painter, [self.primitive(item) for item in items])
+
+    def simplify(self, items: list, pixel: float) -> tuple[list[QLineF], np.ndarray]:
+        # the ends go to the grid, lines within one grid cell disappear and lines between the same grid points are drawn once
+        lines = [self.line(item) for item in items]
+        segments = snap_segments(np.array([(line.start.x(), line.start.y(), line.end.x(), line.end.y()) for line in lines], dtype=float), self.snap_size * pixel)
+        return [QLineF(*segment) for segment in segments.tolist()], _boxes(segments)
+
+class PointBatch:
+    '''
+    Round markers in one color, point(item) gives the Point of an item (by default item.point, as for a Vertex)
+    and the radius is the same for all of them or else item.radius. A loop of drawEllipse is faster here than
+    drawPoints with a round pen, antialiased round caps are slow to fill.
+    '''
+
+    def __init__(self, color: QColor, radius: float | None = None, point: Callable[[Any], Point] | None = None, cluster_size: float = 4):
+        self.brush: QBrush = Colors.brush(color)
+        self.radius: float | None = radius
+        self.point: Callable[[Any], Point] = point or (lambda item: item.point)
+        # when simplified the markers within cluster_size pixels of each other become one
+        self.cluster_size: float = cluster_size
+
+    def primitive(self, item) -> QRectF:
+        point = self.point(item)
+        radius = self.radius if self.radius is not None else item.radius
+        return QRectF(point.x() - radius, point.y() - radius, 2 * radius, 2 * radius)
+
+    def draw(self, painter: QPainter, primitives: list[QRectF]):
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.brush)
+        draw_ellipse = painter.drawEllipse
+        for rectangle in primitives:
+            draw_ellipse(rectangle)
+
+    def draw_items(self, painter: QPainter, items: list):
+        self.draw(painter, [self.primitive(item) for item in items])
+
+    def simplify(self, items: list, pixel: float) -> tuple[list[QRectF], np.ndarray]:
+        # one marker per cluster at its center of mass, larger for more points (an area of about one marker per point)
+        # but not larger than the cluster cell
+        if not items:
+            return [], np.zeros((0, 4))
+        points = np.array([(point.x(), point.y()) for point in map(self.point, items)], dtype=float)
+        cell_size = self.cluster_size * pixel
+        centers, counts = cluster_points(points, cell_size)
+        radius = self.radius if self.radius is not None else np.mean([item.radius for item in items])
+        radii = np.minimum(radius * np.sqrt(counts), cell_size / 2)
+        rectangles = [QRectF(x - r, y - r, 2 * r, 2 * r) for (x, y), r in zip(centers.tolist(), radii.tolist())]
+        return rectangles, _boxes(centers)
+
+class PolygonBatch:
+    '''
+    Filled polygons with one brush and outline, polygon(item) gives the QPolygonF of an item (by default
+    item.QPolygon, as for a VoronoiCell or ComplexPolygon). One QPainterPath for all of them is slower to fill.
+    '''
+
+    def __init__(self, brush: QBrush, pen: QPen, polygon: Callable[[Any], QPolygonF] | None = None,
+                 hull: Callable[[Any], list[Point]] | None = None):
+        self.brush: QBrush = brush
+        self.pen: QPen = pen
+        self.polygon: Callable[[Any], QPolygonF] = polygon or (lambda item: item.QPolygon)
+        # the corners of an item, for simplifying
+        self.hull: Callable[[Any], list[Point]] = hull or (lambda item: item.hull)
+
+    def primitive(self, item) -> QPolygonF:
+        return self.polygon(item)
+
+    def draw(self, painter: QPainter, primitives: list[QPolygonF]):
+        painter.setPen(self.pen)
+        painter.setBrush(self.brush)
+        draw_polygon = painter.drawPolygon
+        for polygon in primitives:
+            draw_polygon(polygon)
+
+    def draw_items(self, painter: QPainter, items: list):
+        self.draw(painter, [self.primitive(item) for item in items])
+
+    def simplify(self, items: list, pixel: float) -> tuple[list[QPolygonF], np.ndarray]:
+        # polygons smaller than a pixel disappear, the others keep the corners that douglas peucker keeps
+        polygons, boxes = [], []
+        for item in items:
+            corners = np.array([(point.x(), point.y()) for point in self.hull(item)], dtype=float).reshape(-1, 2)
+            if not len(corners):
+                continue
+            low, high = corners.min(axis=0), corners.max(axis=0)
+            if (high - low).max() < pixel:
+                continue
+            polygons.append(QPolygonF([QPointF(x, y) for x, y in simplify_polygon(corners, pixel).tolist()]))
+            boxes.append((*low, *high))
+        return polygons, np.array(boxes, dtype=float).reshape(-1, 4)
+
+Batch = LineBatch | PointBatch | PolygonBatch
+
+class DrawLayer:
+    '''
+    A list of drawables with a BoxTree over their bounds, so only the ones in view get drawn. With a batch the
+    items are drawn by it and their Qt primitives are kept with the tree, otherwise an item is drawn with
+    draw(painter, item), by default item.draw(painter). The box of an item is bounds(item), by default item.bounds().
+    The layer keeps the list itself, so after items were added or removed it has to be invalidated.
+    Below zoom band detail_band a layer with a batch draws the simplified primitives of that band instead,
+    they are made the first time the band is drawn and kept until the items change.
+    '''
+
+    def __init__(self, items: list, draw: Callable[[QPainter, Any], None] | None = None,
+                 bounds: Callable[[Any], tuple[float, float, float, float]] | None = None, batch: Batch | None = None,
+                 detail_band: int = 0):
+        self.items: list = items
+        self.draw_item: Callable[[QPainter, Any], None] = draw or (lambda painter, item: item.draw(painter))
+        self.bounds: Callable[[Any], tuple[float, float, float, float]] = bounds or (lambda item: item.bounds())
+        self.batch: Batch | None = batch
+        self.tree: BoxTree | None = None
+        self.primitives: list = []
+        self.detail_band: int = detail_band
+        self.levels: dict[int, tuple[list, BoxTree]] = {}
+
+    def invalidate(self):
+        # the tree is built again the next time it is needed
+        self.tree = None
+        self.levels = {}
+
+    def update(self, indices: list[int]):
+        # Only the items at indices moved or changed shape
+        self.levels = {}
+        if self.tree is None or len(self.tree.order) != len(self.items):
+            self.tree = None
+        elif len(indices):
+            self.tree.update(indices, [self.bounds(self.items[i]) for i in indices])
+            if self.batch is not None:
+                for i in indices:
+                    self.primitives[i] = self.batch.primitive(self.items[i])
+                METRICS.count('primitives made', len(indices))
+
+    def build(self):
+        if self.tree is None:
+            with METRICS.measure('index'):
+                self.tree = BoxTree([self.bounds(item) for item in self.items])
+                self.primitives = [self.batch.primitive(item) for item in self.items] if self.batch is not None else []
+            METRICS.count('primitives made', len(self.primitives))
+
+    def visible(self, box: tuple[float, float, float, float]) -> np.ndarray:
+        # Indices of the items whose bounds intersect box, in the order of the list
+        self.build()
+        return self.tree.query(box)
+
+    def extent(self) -> np.ndarray:
+        # The box around all items as a (1, 4) array, (0, 4) without items
+        if not len(self.items):
+            return np.zeros((0, 4))
+        self.build()
+        return self.tree.levels[-1]
+
+    def level(self, band: int) -> tuple[list, BoxTree]:
+        # The simplified primitives of a zoom band with a tree over them
+        if band not in self.levels:
+            # a band goes from zoom 2^band to 2^(band + 1), with the pixel of the largest zoom nothing is off by more than a pixel
+            with METRICS.measure('detail level'):
+                primitives, boxes = self.batch.simplify(self.items, 2.0 ** -(band + 1))
+                self.levels[band] = (primitives, BoxTree(boxes))
+            METRICS.count('primitives made', len(primitives))
+        return self.levels[band]
+
+    def draw(self, painter: QPainter, box: tuple[float, float, float, float], band: int | None = None) -> int:
+        # Draws the items in box at the detail of zoom band (all detail without one) and returns how many were drawn
+        if self.batch is not None and band is not None and band < self.detail_band:
+            primitives, tree = self.level(band)
+            indices = tree.query(box).tolist()
+            self.batch.draw(painter, [primitives[i] for i in indices])
+            return len(indices)
+        indices = self.visible(box)
+        if self.batch is not None:
+            primitives = self.primitives
+            self.batch.draw(painter, [primitives[i] for i in indices.tolist()])
+        else:
+            for i in indices.tolist():
+                self.draw_item(painter, self.items[i])
+        return len(indices)
+
+class SceneIndex:
+    '''
+    The layers of a scene in drawing order. The bounds of the items are the bare geometry, margin (in world
+    units) is added around the view so points and thick lines just outside of it still show their edge.
+    '''
+
+    def __init__(self, margin: float = 5.0):
+        self.layers: list[DrawLayer] = []
+        self.margin: float = margin
+
+    def add_layer(self, items: list, draw: Callable[[QPainter, Any], None] | None = None,
+                  bounds: Callable[[Any], tuple[float, float, float, float]] | None = None, batch: Batch | None = None,
+                  detail_band: int = 0) -> DrawLayer:
+        layer = DrawLayer(items, draw, bounds, batch, detail_band)
+        self.layers.append(layer)
+        return layer
+
+    def clear(self):
+        self.layers = []
+
+    def invalidate(self):
+        for layer in self.layers:
+            layer.invalidate()
+
+    def bounds(self) -> tuple[float, float, float, float] | None: 
+        # The box around the items of every layer, None without items
+        boxes = np.concatenate([np.zeros((0, 4))] + [layer.extent() for layer in self.layers])
+        if not len(boxes): 
+            return None
+        return (*boxes[:, :2].min(axis=0).tolist(), *boxes[:, 2:].max(axis=0).tolist())
+
+    def view_bounds(self, view_box: Rectangle) -> tuple[float, float, float, float]:
+        min_x, min_y, max_x, max_y = view_box.bounds()
+        return (min_x - self.margin, min_y - self.margin, max_x + self.margin, max_y + self.margin)
+
+    def draw(self, painter: QPainter, view_box: Rectangle, band: int | None = None) -> int:
+        # Draws every layer, only the items that intersect view_box, and returns the number of items drawn
+        box = self.view_bounds(view_box)
+        return sum(layer.draw(painter, box, band) for layer in self.layers)
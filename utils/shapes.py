@@ -3,12 +3,17 @@ from __future__ import annotations
 from typing import overload
 
 import math 
-from PySide6.QtGui import QPainter, QPen, QColor, QBrush, QPolygonF
+import numpy as np
+from PySide6.QtGui import QPainter, QColor, QPolygonF
 from PySide6.QtCore import Qt, QPointF
 from utils.vectors import Vector
+from utils.predicates import orientation, cross_sign, side_of_line
 import utils.colors as Colors 
 
 class Point(Vector): 
+    # A point only ever has two coordinates, so we keep them in two slots instead of a list
+    # (the slots of Vector stay unused, data and length are properties here)
+    __slots__ = ('_x', '_y')
 
     @overload
     def __init__(self, x: float = 0.0, y: float = 0.0) -> None: ...
@@ -20,12 +25,12 @@ class Point(Vector):
     def __init__(self, vector: Vector) -> None: ...
 
     def __init__(self, *args):
-        if (len(args) == 1 and isinstance(args[0], QPointF)): 
-            super().__init__([args[0].x(), args[0].y()])
+        if (len(args) == 2 and isinstance(args[0], (float, int)) and isinstance(args[1], (float, int))): 
+            self._x, self._y = args
+        elif (len(args) == 1 and isinstance(args[0], QPointF)): 
+            self._x, self._y = args[0].x(), args[0].y()
         elif (len(args) == 1 and isinstance(args[0], Vector)): 
-            super().__init__([args[0].data[0], args[0].data[1]])
-        elif (len(args) == 2 and isinstance(args[0], (float, int)) and isinstance(args[1], (float, int))): 
-            super().__init__([args[0], args[1]])
+            self._x, self._y = args[0].x(), args[0].y()
         else: 
             raise TypeError("Invalid arguments for Point")
             
@@ -33,6 +38,73 @@ class Point(Vector):
     def from_Q(cls, qpoint: QPointF): 
         return cls(qpoint.x(), qpoint.y())
 
+    @classmethod
+    def from_xy(cls, x: float, y: float) -> Point: 
+        # Skips the argument checks of the constructor, for the arithmetic below
+        point = cls.__new__(cls)
+        point._x = x
+        point._y = y
+        return point
+
+    @property
+    def data(self) -> list[float]: 
+        return [self._x, self._y]
+
+    @property
+    def length(self) -> int: 
+        return 2
+
+    def x(self) -> float: 
+        return self._x
+
+    def y(self) -> float: 
+        return self._y
+
+    def get(self, index: int) -> float: 
+        if (index < 0 or index >= 2): 
+            raise ValueError(f"The index must be > 0 and < 2")
+        return self._x if index == 0 else self._y
+
+    def set(self, index: int, value: float): 
+        if (index < 0 or index >= 2): 
+            raise ValueError(f"The index must be > 0 and < 2")
+        if index == 0: 
+            self._x = value
+        else: 
+            self._y = value
+
+    def get_data(self) -> list[float]: 
+        return [self._x, self._y]
+
+    def copy(self) -> Point: 
+        return Point.from_xy(self._x, self._y)
+
+    def add(self, other: Vector): 
+        self.check_length_error(len(other))
+        self._x += other.x()
+        self._y += other.y()
+
+    def sub(self, other: Vector): 
+        self.check_length_error(len(other))
+        self._x -= other.x()
+        self._y -= other.y()
+
+    def mul(self, other: Vector): 
+        self.check_length_error(len(other))
+        self._x *= other.x()
+        self._y *= other.y()
+
+    def scale(self, number: float): 
+        self._x *= number
+        self._y *= number
+
+    def dot_product(self, other: Vector) -> float: 
+        self.check_length_error(len(other))
+        return self._x * other.x() + self._y * other.y()
+
+    def magnitude(self) -> float: 
+        return math.hypot(self._x, self._y)
+
     def bi_sector(self, other: Point) -> Line: 
         connection: Line = Line(self, other)
         midpoint: Point = connection.get_midpoint()
@@ -40,26 +112,37 @@ class Point(Vector):
         return Line(midpoint, secondpoint)
 
     def angle(self) -> float: 
-        return math.atan2(self.y(), self.x())
+        return math.atan2(self._y, self._x)
     
+    def bounds(self) -> tuple[float, float, float, float]: 
+        # (min_x, min_y, max_x, max_y) of what is drawn, without the size of the marker
+        return (self._x, self._y, self._x, self._y)
+
     def draw(self, painter: QPainter): 
         radius = 3
-        painter.setBrush(QBrush(Colors.MAROON))
+        painter.setBrush(Colors.brush(Colors.MAROON))
         painter.setPen(Qt.NoPen)
 
         painter.drawEllipse(self.x() - radius, self.y() - radius, 2 * radius, 2 * radius)
 
+    def __len__(self) -> int: 
+        return 2
+
     def __add__(self, other: Point) -> Point: 
         self.check_length_error(len(other))
-        return Point(self.x() + other.x(), self.y() + other.y())
+        return Point.from_xy(self._x + other.x(), self._y + other.y())
     
     def __sub__(self, other: Point) -> Point: 
         self.check_length_error(len(other))
-        return Point(self.x() - other.x(), self.y() - other.y())
+        return Point.from_xy(self._x - other.x(), self._y - other.y())
     
     def __mul__(self, other: Point) -> Point: 
         self.check_length_error(len(other))
-        return Point(self.x() * other.x(), self.y() * other.y())
+        return Point.from_xy(self._x * other.x(), self._y * other.y())
+
+    def __eq__(self, other: Vector) -> bool: 
+        self.check_length_error(len(other))
+        return self._x == other.x() and self._y == other.y()
     
     def __repr__(self) -> str:
         return f'Point({self.x()}, {self.y()})'
@@ -68,7 +151,102 @@ class Point(Vector):
         return f'Point({self.x()}, {self.y()})'
     
     def __hash__(self):
-        return hash((self.x, self.y))
+        return hash((self._x, self._y))
+
+class PointArray: 
+    '''
+    Many points in one contiguous (n, 2) float64 array. The operations work on all points at once and
+    accept another PointArray of the same size, a single Point or an (n, 2) array.
+    '''
+    __slots__ = ('data',)
+
+    def __init__(self, data: np.ndarray | list[Point]): 
+        if isinstance(data, np.ndarray): 
+            self.data: np.ndarray = np.ascontiguousarray(data, dtype=np.float64).reshape(-1, 2)
+        else: 
+            self.data: np.ndarray = np.array([[point.x(), point.y()] for point in data], dtype=np.float64).reshape(-1, 2)
+
+    @classmethod
+    def zeros(cls, size: int) -> PointArray: 
+        return cls(np.zeros((size, 2)))
+
+    @staticmethod
+    def as_array(other: PointArray | Point | np.ndarray) -> np.ndarray: 
+        if isinstance(other, PointArray): 
+            return other.data
+        if isinstance(other, Vector): 
+            return np.array([other.x(), other.y()], dtype=np.float64)
+        return np.asarray(other, dtype=np.float64)
+
+    def x(self) -> np.ndarray: 
+        return self.data[:, 0]
+
+    def y(self) -> np.ndarray: 
+        return self.data[:, 1]
+
+    def to_points(self) -> list[Point]: 
+        return [Point.from_xy(x, y) for x, y in self.data.tolist()]
+
+    def copy(self) -> PointArray: 
+        return PointArray(self.data.copy())
+
+    def add(self, other: PointArray | Point | np.ndarray): 
+        self.data += PointArray.as_array(other)
+
+    def sub(self, other: PointArray | Point | np.ndarray): 
+        self.data -= PointArray.as_array(other)
+
+    def scale(self, number: float | np.ndarray): 
+        # number can also be an array with a factor per point
+        self.data *= np.asarray(number, dtype=np.float64).reshape(-1, 1) if np.ndim(number) else number
+
+    def get_scaled(self, number: float | np.ndarray) -> PointArray: 
+        scaled = self.copy()
+        scaled.scale(number)
+        return scaled
+
+    def dot_product(self, other: PointArray | Point | np.ndarray) -> np.ndarray: 
+        return (self.data * PointArray.as_array(other)).sum(axis=1)
+
+    def magnitude(self) -> np.ndarray: 
+        return np.hypot(self.data[:, 0], self.data[:, 1])
+
+    def get_normalized(self) -> PointArray: 
+        return self.get_scaled(1 / self.magnitude())
+
+    def bi_sectors(self, other: PointArray | Point | np.ndarray) -> tuple[PointArray, PointArray]: 
+        # Start and end points of the bisectors between every point and other, the same lines as Point.bi_sector
+        other = PointArray.as_array(other)
+        midpoints = (self.data + other) * 0.5
+        direction = other - self.data
+        normals = np.column_stack([-direction[:, 1], direction[:, 0]])
+        return PointArray(midpoints), PointArray(midpoints + normals)
+
+    def __add__(self, other: PointArray | Point | np.ndarray) -> PointArray: 
+        return PointArray(self.data + PointArray.as_array(other))
+
+    def __sub__(self, other: PointArray | Point | np.ndarray) -> PointArray: 
+        return PointArray(self.data - PointArray.as_array(other))
+
+    def __mul__(self, number: float | np.ndarray) -> PointArray: 
+        return self.get_scaled(number)
+
+    def __len__(self) -> int: 
+        return len(self.data)
+
+    def __getitem__(self, index: int | slice | np.ndarray) -> Point | PointArray: 
+        if isinstance(index, (int, np.integer)): 
+            return Point.from_xy(float(self.data[index, 0]), float(self.data[index, 1]))
+        return PointArray(self.data[index])
+
+    def __iter__(self): 
+        return iter(self.to_points())
+
+    def __repr__(self) -> str: 
+        return f'PointArray({self.data.tolist()})'
+
+    def __str__(self) -> str: 
+        return f'PointArray({self.data.tolist()})'
 
 
 class Line:
@@ -114,8 +292,10 @@ class Line:
         return point.x() >= min(self.start.x(), self.end.x()) and point.x() <= max(self.start.x(), self.end.x()) 
     
     def contains(self, point: Point) -> bool: 
-        on_line: bool = self.a * point.x() + self.b * point.y() == self.c 
-        within_bounds: bool = point >= self.start and point <= self.end 
+        # exact, the point has to be on the segment itself
+        on_line: bool = orientation((self.start.x(), self.start.y()), (self.end.x(), self.end.y()), (point.x(), point.y())) == 0
+        within_bounds: bool = (min(self.start.x(), self.end.x()) <= point.x() <= max(self.start.x(), self.end.x()) 
+                               and min(self.start.y(), self.end.y()) <= point.y() <= max(self.start.y(), self.end.y()))
         return on_line and within_bounds
     
     def contains_with_tol(self, point: Point, tol: float = 1e-9) -> bool: 
@@ -134,8 +314,9 @@ class Line:
         # Here we handle both lines as being infinite
         det = self.a * other.b - other.a * self.b
 
-        # Lines are parallel or coincident
-        if abs(det) < 1e-9:
+        # Lines are parallel or coincident, decided exactly on the end points
+        if det == 0 or cross_sign((self.start.x(), self.start.y()), (self.end.x(), self.end.y()), 
+                                  (other.start.x(), other.start.y()), (other.end.x(), other.end.y())) == 0:
             return None  
 
         # Solve using Cramer's Rule
@@ -231,6 +412,9 @@ class Line:
         painter.drawLine(left.start.x(), left.start.y(), left.end.x(), left.end.y())
         painter.drawLine(right.start.x(), right.start.y(), right.end.x(), right.end.y())
 
+    def bounds(self) -> tuple[float, float, float, float]: 
+        return (min(self.start.x(), self.end.x()), min(self.start.y(), self.end.y()), max(self.start.x(), self.end.x()), max(self.start.y(), self.end.y()))
+
     def draw(self, painter: QPainter, 
              thickness: float = 2, 
              color: QColor = Colors.TEAL, 
@@ -238,12 +422,7 @@ class Line:
              cap_style: Qt.PenCapStyle = Qt.PenCapStyle.RoundCap,
              arrow_head: bool = False
         ): 
-        pen = QPen()
-        pen.setWidth(thickness)
-        pen.setColor(color)
-        pen.setStyle(pen_style)
-        pen.setCapStyle(cap_style)
-        painter.setPen(pen)
+        painter.setPen(Colors.pen(color, thickness, pen_style, cap_style))
 
         painter.drawLine(self.start.x(), self.start.y(), self.end.x(), self.end.y())
         if arrow_head: 
@@ -255,12 +434,7 @@ class Line:
              pen_style: Qt.PenStyle = Qt.PenStyle.SolidLine, 
              cap_style: Qt.PenCapStyle = Qt.PenCapStyle.RoundCap
         ): 
-        pen = QPen()
-        pen.setWidth(thickness)
-        pen.setColor(color)
-        pen.setStyle(pen_style)
-        pen.setCapStyle(cap_style)
-        painter.setPen(pen)
+        painter.setPen(Colors.pen(color, thickness, pen_style, cap_style))
 
         inf_line: Line| None = self.clip_by_rect(view_box)
         if inf_line: 
@@ -300,6 +474,11 @@ class Rectangle:
         else: 
             raise TypeError("Invalid arguments for Point")
     
+    def bounds(self) -> tuple[float, float, float, float]: 
+        xs = [side.start.x() for side in self.sides] + [side.end.x() for side in self.sides]
+        ys = [side.start.y() for side in self.sides] + [side.end.y() for side in self.sides]
+        return (min(xs), min(ys), max(xs), max(ys))
+
     def draw(self, painter: QPainter): 
         for side in self.sides: 
             side.draw(painter)
@@ -311,8 +490,25 @@ class HalfPlane:
         self.normal: Point = normal
 
     def contains(self, point: Point): 
-        delta = point - self.line.start
-        return delta.dot_product(self.normal) >= 0 
+        return self.side(point) >= 0 
+
+    def side(self, point: Point) -> int: 
+        # 1 strictly inside, 0 on the line and -1 outside, this is exact
+        start = self.line.start
+        return side_of_line((start.x(), start.y()), (self.normal.x(), self.normal.y()), (point.x(), point.y()))
+
+    def offset(self, point: Point) -> float: 
+        # (point - start) . normal, the signed distance to the line times the length of the normal
+        start = self.line.start
+        return (point.x() - start.x()) * self.normal.x() + (point.y() - start.y()) * self.normal.y()
+
+    def crossing(self, inside: Point, outside: Point) -> Point: 
+        # The point where the segment from a point inside to a point outside crosses the line
+        # the offsets have opposite signs, only for nearly touching points rounding can take t off the segment
+        inside_offset, outside_offset = self.offset(inside), self.offset(outside)
+        difference = inside_offset - outside_offset
+        t = min(max(inside_offset / difference, 0.0), 1.0) if difference != 0 else 0.5
+        return Point(inside.x() + t * (outside.x() - inside.x()), inside.y() + t * (outside.y() - inside.y()))
     
     def draw(self, painter: QPainter, view_box: Rectangle): 
         normal_line: Line = Line(self.line.end, self.line.end + self.normal.get_normalized().get_scaled(10))
@@ -337,44 +533,34 @@ class ComplexPolygon:
         # A few assumptions I will make:
         # 1. The polygon is convex
         # 2. The list of edges (or points) is defined as clockwise in my polygon
-        intersections: list[Point] = []
-        intersections_i: list[int] = []
-        new_hull: list[Point] = []
-
-        # loop trough all edges and see if there is an intersection with the half plane
-        for i, edge in enumerate(self.edges): 
-            intersection: Point = edge.intersects(halfplane.line)
-            # we also ensure that we can not add the same end point twice (if it by coincidence goes trough a line endpoint)
-            if intersection and edge.contains_with_tol(intersection) and not (intersection in intersections):
-                intersections_i.append(i)
-                intersections.append(intersection)
-        
-        # if there are intersections there must be 2 (property of polygon being convex)
-        if len(intersections) == 2: 
-            # split them up in two parts 
-            first_part: list[Point] = self.hull[intersections_i[0] + 1: intersections_i[1] + 1]
-            second_part: list[Point] = self.hull[intersections_i[1] + 1:] + self.hull[:intersections_i[0] + 1]
-            # check which side of the polygon is contained in the polygon
-            if halfplane.contains(second_part[0]): 
-                new_hull =  [intersections[1]] + second_part + [intersections[0]]
-            else: 
-                new_hull = [intersections[0]] + first_part + [intersections[1]]
-        else: # there is no intersection with the polygon 
+        # Every corner is tested once against the half plane, corners exactly on the line are kept as they are
+        # so the new polygon never gets the same point twice
+        sides: list[int] = [halfplane.side(point) for point in self.hull]
+        # if the line does not go trough the polygon there is nothing to clip
+        if -1 not in sides or 1 not in sides: 
             return self 
+
+        new_hull: list[Point] = []
+        for i, point in enumerate(self.hull): 
+            following = (i + 1) % self.size
+            if sides[i] >= 0: 
+                new_hull.append(point)
+            if sides[i] * sides[following] < 0: 
+                if sides[i] > 0: 
+                    new_hull.append(halfplane.crossing(point, self.hull[following]))
+                else: 
+                    new_hull.append(halfplane.crossing(self.hull[following], point))
         return ComplexPolygon(new_hull)
     
+    def bounds(self) -> tuple[float, float, float, float]: 
+        xs = [point.x() for point in self.hull]
+        ys = [point.y() for point in self.hull]
+        return (min(xs), min(ys), max(xs), max(ys))
+
     def draw(self, painter: QPainter, color: QColor = Colors.MAROON): 
-        # for the inside
-        brush = QBrush(color)
-        painter.setBrush(brush)
-
-        # for the outline
-        pen = QPen()
-        pen.setWidth(1)
-        pen.setColor(Colors.GREY)
-        pen.setStyle(Qt.PenStyle.SolidLine)
-        pen.setCapStyle(Qt.PenCapStyle.RoundCap)
-        painter.setPen(pen)
+        # the inside and the outline
+        painter.setBrush(Colors.brush(color))
+        painter.setPen(Colors.pen(Colors.GREY, 1))
 
         painter.drawPolygon(self.QPolygon)
 
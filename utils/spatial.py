@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Iterator
+
+import numpy as np
+
+from utils.shapes import Point
+
+class SpatialGrid:
+    '''
+    Uniform grid over a set of points, every grid cell holds the indices of the points inside it.
+    By default the cell size is the largest extent of the points over sqrt(n), about one point per cell for points
+    spread over a square and sqrt(n) cells along the points when they lie on a line.
+    '''
+
+    def __init__(self, points: list[Point], cell_size: float | None = None):
+        self.coordinates: list[tuple[float, float]] = [(point.x(), point.y()) for point in points]
+        self.buckets: dict[tuple[int, int], list[int]] = {}
+
+        if self.coordinates:
+            xs = [x for x, _ in self.coordinates]
+            ys = [y for _, y in self.coordinates]
+            self.min_x, self.min_y = min(xs), min(ys)
+            self.max_x, self.max_y = max(xs), max(ys)
+        else:
+            self.min_x = self.min_y = self.max_x = self.max_y = 0.0
+
+        if cell_size is None:
+            # not from the area, that goes to 0 for points on a line and the cells with it
+            extent = max(self.max_x - self.min_x, self.max_y - self.min_y)
+            cell_size = extent / math.sqrt(max(len(self.coordinates), 1))
+        self.cell_size: float = cell_size if cell_size > 0 else 1.0
+
+        for i, (x, y) in enumerate(self.coordinates):
+            self.buckets.setdefault(self.cell_of(x, y), []).append(i)
+
+    def cell_of(self, x: float, y: float) -> tuple[int, int]:
+        return (math.floor((x - self.min_x) / self.cell_size), math.floor((y - self.min_y) / self.cell_size))
+
+    def ring(self, center: tuple[int, int], r: int, low: tuple[int, int] | None = None, high: tuple[int, int] | None = None) -> Iterator[tuple[int, int]]:
+        # All grid cells at chebyshev distance r from center, only the ones from low to high (inclusive) if given
+        cx, cy = center
+        (low_x, low_y), (high_x, high_y) = low or (-math.inf, -math.inf), high or (math.inf, math.inf)
+        if r == 0:
+            yield center
+            return
+        x_range = range(max(cx - r, low_x), min(cx + r, high_x) + 1)
+        y_range = range(max(cy - r + 1, low_y), min(cy + r - 1, high_y) + 1)
+        for y in (cy - r, cy + r):
+            if low_y <= y <= high_y:
+                for x in x_range:
+                    yield (x, y)
+        for x in (cx - r, cx + r):
+            if low_x <= x <= high_x:
+                for y in y_range:
+                    yield (x, y)
+
+    def nearest(self, point: Point) -> Iterator[tuple[float, int]]:
+        # Yields (distance, index) of all points in increasing distance to point
+        # Rings of grid cells are added to a heap one by one, a point is only given once no unvisited ring can be closer
+        qx, qy = point.x(), point.y()
+        center = self.cell_of(qx, qy)
+        # only the grid cells from low to high can hold points, the rings before first_ring miss them and the ones
+        # after last_ring too. Far from the points (like from the corners of the box of a voronoi diagram) this
+        # skips the empty rings instead of visiting every one of their cells
+        low, high = self.cell_of(self.min_x, self.min_y), self.cell_of(self.max_x, self.max_y)
+        last_ring = max(abs(c - o) for c, o in zip(center + center, low + high))
+        first_ring = max(0, low[0] - center[0], center[0] - high[0], low[1] - center[1], center[1] - high[1])
+
+        heap: list[tuple[float, int]] = []
+        r = first_ring
+        while r <= last_ring or heap:
+            if r <= last_ring:
+                for cell in self.ring(center, r, low, high):
+                    for i in self.buckets.get(cell, ()):
+                        x, y = self.coordinates[i]
+                        heapq.heappush(heap, (math.hypot(x - qx, y - qy), i))
+                # the rings up to r cover a square, everything outside it is at least this far away
+                left = self.min_x + (center[0] - r) * self.cell_size
+                bottom = self.min_y + (center[1] - r) * self.cell_size
+                right = left + (2 * r + 1) * self.cell_size
+                top = bottom + (2 * r + 1) * self.cell_size
+                bound = min(qx - left, right - qx, qy - bottom, top - qy)
+                r += 1
+            else:
+                bound = math.inf
+            while heap and heap[0][0] <= bound:
+                yield heapq.heappop(heap)
+
+class BoxTree:
+    '''
+    Packed R-tree over axis aligned boxes (min_x, min_y, max_x, max_y), stored as one flat array of boxes per level.
+    The boxes are sorted in vertical slices on their centers (sort tile recursive), every node_size consecutive
+    boxes of a level get one box around them in the level above, up to a single root.
+    '''
+
+    def __init__(self, boxes: np.ndarray, node_size: int = 16):
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        self.node_size: int = node_size
+        centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+        slice_size = node_size * max(1, math.ceil(math.sqrt(len(boxes) / node_size)))
+        slices = np.empty(len(boxes), dtype=np.int64)
+        slices[np.argsort(centers[:, 0], kind='stable')] = np.arange(len(boxes)) // slice_size
+        # the boxes of levels[0] are boxes[order], rank is the place of every box in levels[0]
+        self.order: np.ndarray = np.lexsort((centers[:, 1], slices))
+        self.rank: np.ndarray = np.empty(len(boxes), dtype=np.int64)
+        self.rank[self.order] = np.arange(len(boxes))
+        self.levels: list[np.ndarray] = [boxes[self.order]]
+        self.refit()
+
+    def refit(self):
+        # Recomputes the boxes of all levels above the boxes themselves
+        del self.levels[1:]
+        while len(self.levels[-1]) > 1:
+            below = self.levels[-1]
+            starts = np.arange(0, len(below), self.node_size)
+            self.levels.append(np.column_stack([np.minimum.reduceat(below[:, 0], starts), np.minimum.reduceat(below[:, 1], starts),
+                                                np.maximum.reduceat(below[:, 2], starts), np.maximum.reduceat(below[:, 3], starts)]))
+
+    def update(self, indices: np.ndarray, boxes: np.ndarray):
+        # New boxes for the boxes at indices, the tree keeps its order so it gets a bit worse when boxes move far
+        self.levels[0][self.rank[np.asarray(indices, dtype=np.int64)]] = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        self.refit()
+
+    def query(self, box: tuple[float, float, float, float]) -> np.ndarray:
+        # Indices (in increasing order) of the boxes that intersect box, one level of the tree at a time
+        min_x, min_y, max_x, max_y = box
+        frontier = np.arange(len(self.levels[-1]))
+        for depth in range(len(self.levels) - 1, -1, -1):
+            boxes = self.levels[depth][frontier]
+            frontier = frontier[(boxes[:, 0] <= max_x) & (boxes[:, 2] >= min_x) & (boxes[:, 1] <= max_y) & (boxes[:, 3] >= min_y)]
+            if depth > 0:
+                children = (frontier[:, None] * self.node_size + np.arange(self.node_size)).reshape(-1)
+                frontier = children[children < len(self.levels[depth - 1])]
+        return np.sort(self.order[frontier])
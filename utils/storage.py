@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+import os
+
+import numpy as np
+
+from utils.network import Network, VoronoiDiagram
+
+# File layout: MAGIC, the length of the header as a little endian uint64, the header as json and then the
+# arrays, every one starting at a multiple of ALIGNMENT bytes. The header names the kind of data and gives
+# for every array its dtype, shape and offset in the file, so an array can be opened as a numpy.memmap
+# without reading anything else. Only the pages of an array that are actually used get read from disk.
+MAGIC = b'THESISPG'
+VERSION = 1
+ALIGNMENT = 64
+
+def _aligned(position: int) -> int:
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+def save_arrays(path: str | os.PathLike, kind: str, arrays: dict[str, np.ndarray], meta: dict | None = None):
+    # Writes the arrays to path, meta can hold anything else that json can store
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    entries = {name: {'dtype': array.dtype.str, 'shape': list(array.shape)} for name, array in arrays.items()}
+
+    # the offsets depend on the length of the header, which contains the offsets, so we reserve room for
+    # the longest offsets and pad the real header with spaces
+    header = {'version': VERSION, 'kind': kind, 'meta': meta or {}, 'arrays': entries}
+    for entry in entries.values():
+        entry['offset'] = 10 ** 19
+    data_start = _aligned(len(MAGIC) + 8 + len(json.dumps(header).encode()))
+    position = data_start
+    for name, array in arrays.items():
+        entries[name]['offset'] = position
+        position = _aligned(position + array.nbytes)
+    encoded = json.dumps(header).encode().ljust(data_start - len(MAGIC) - 8)
+
+    with open(path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(np.uint64(len(encoded)).astype('<u8').tobytes())
+        file.write(encoded)
+        for name, array in arrays.items():
+            file.seek(entries[name]['offset'])
+            array.tofile(file)
+
+def read_header(path: str | os.PathLike) -> dict:
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a network file")
+        length = int(np.frombuffer(file.read(8), dtype='<u8')[0])
+        header = json.loads(file.read(length).decode())
+    if header['version'] > VERSION:
+        raise ValueError(f"{path} has version {header['version']}, only up to version {VERSION} can be read")
+    return header
+
+def load_arrays(path: str | os.PathLike, kind: str | None = None, mode: str = 'r') -> tuple[dict[str, np.ndarray], dict]:
+    # Opens every array of the file as a memmap (mode 'r' is read only, 'c' is copy on write), returns the arrays and meta
+    header = read_header(path)
+    if kind is not None and header['kind'] != kind:
+        raise ValueError(f"{path} holds a {header['kind']}, not a {kind}")
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        shape = tuple(entry['shape'])
+        if 0 in shape:
+            # a memmap can not be empty
+            arrays[name] = np.zeros(shape, dtype=entry['dtype'])
+        else:
+            arrays[name] = np.memmap(path, dtype=entry['dtype'], mode=mode, offset=entry['offset'], shape=shape)
+    return arrays, header['meta']
+
+def save_network(path: str | os.PathLike, network: Network):
+    points = np.array([[vertex.point.x(), vertex.point.y()] for vertex in network.vertices], dtype=float).reshape(-1, 2)
+    save_network_arrays(path, points, network.edge_array())
+
+def save_network_arrays(path: str | os.PathLike, points: np.ndarray, edges: np.ndarray):
+    # For networks that only exist as arrays, like the ones of Network.random_arrays
+    save_arrays(path, 'network', {'points': np.asarray(points, dtype='<f8'), 'edges': np.asarray(edges, dtype='<i8')})
+
+def load_network_arrays(path: str | os.PathLike) -> tuple[np.ndarray, np.ndarray]:
+    # The points (n, 2) and edges (m, 2) of a saved network as memmaps
+    arrays, _ = load_arrays(path, 'network')
+    return arrays['points'], arrays['edges']
+
+def load_network(path: str | os.PathLike) -> Network:
+    return Network.from_arrays(*load_network_arrays(path))
+
+def save_voronoi(path: str | os.PathLike, diagram: VoronoiDiagram):
+    sites, offsets, vertices, labels = diagram.to_arrays()
+    save_arrays(path, 'voronoi', {'sites': sites, 'offsets': offsets, 'vertices': vertices, 'labels': labels}, {'engine': diagram.engine})
+
+def load_voronoi_arrays(path: str | os.PathLike) -> dict[str, np.ndarray]:
+    # The sites, offsets, vertices and labels of a saved diagram (see VoronoiDiagram.to_arrays) as memmaps
+    arrays, _ = load_arrays(path, 'voronoi')
+    return arrays
+
+def load_voronoi(path: str | os.PathLike) -> VoronoiDiagram:
+    arrays, meta = load_arrays(path, 'voronoi')
+    return VoronoiDiagram.from_arrays(arrays['sites'], arrays['offsets'], arrays['vertices'], arrays['labels'], meta.get('engine', 'clipping'))
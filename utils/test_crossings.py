@@ -0,0 +1,56 @@
+import unittest
+import random
+import itertools
+
+from utils.shapes import Point
+from utils.network import Network, Vertex, Edge
+from utils.crossings import CrossingIndex, find_crossings, segments_intersect
+
+def brute_force(network: Network) -> list[tuple[int, int]]:
+    pairs = []
+    for (e, edge), (f, other) in itertools.combinations(enumerate(network.edges), 2):
+        if set(edge.vertices) & set(other.vertices):
+            continue
+        p1, p2, q1, q2 = ((vertex.point.x(), vertex.point.y()) for vertex in edge.vertices + other.vertices)
+        if segments_intersect(p1, p2, q1, q2):
+            pairs.append((e, f))
+    return pairs
+
+class TestCrossings(unittest.TestCase):
+
+    def test_cross(self):
+        vertices = [Vertex(Point(0, 0)), Vertex(Point(10, 10)), Vertex(Point(0, 10)), Vertex(Point(10, 0)), Vertex(Point(20, 0))]
+        network = Network(vertices, [Edge(vertices[0], vertices[1]), Edge(vertices[2], vertices[3]), Edge(vertices[3], vertices[4])])
+        pairs, points = find_crossings(network)
+        # the edges sharing vertex 3 do not cross
+        self.assertEqual([(0, 1)], pairs)
+        self.assertAlmostEqual(5, points[0].x())
+        self.assertAlmostEqual(5, points[0].y())
+
+    def test_touching_and_overlapping(self):
+        vertices = [Vertex(Point(0, 0)), Vertex(Point(10, 0)), Vertex(Point(5, 0)), Vertex(Point(5, 5)), Vertex(Point(8, 0)), Vertex(Point(20, 0))]
+        network = Network(vertices, [Edge(vertices[0], vertices[1]), Edge(vertices[2], vertices[3]), Edge(vertices[4], vertices[5])])
+        # a station on an edge and two edges on top of each other both count
+        self.assertEqual([(0, 1), (0, 2)], CrossingIndex(network).pairs())
+
+    def test_same_as_brute_force(self):
+        random.seed(3)
+        for grid in (False, True):
+            vertices = [Vertex(Point(random.randint(0, 10) * 10, random.randint(0, 10) * 10) if grid else Point(random.uniform(0, 100), random.uniform(0, 100))) for _ in range(40)]
+            edges = [Edge(*random.sample(vertices, 2)) for _ in range(60)]
+            network = Network(vertices, edges)
+            self.assertEqual(brute_force(network), CrossingIndex(network).pairs())
+
+    def test_move_vertex(self):
+        random.seed(4)
+        vertices = [Vertex(Point(random.uniform(0, 100), random.uniform(0, 100))) for _ in range(30)]
+        network = Network(vertices, [Edge(*random.sample(vertices, 2)) for _ in range(50)])
+        index = CrossingIndex(network)
+        for _ in range(30):
+            count = index.move_vertex(random.randrange(30), Point(random.uniform(-20, 120), random.uniform(-20, 120)))
+            expected = brute_force(network)
+            self.assertEqual(len(expected), count)
+            self.assertEqual(expected, index.pairs())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import random
+
+from utils.shapes import Point
+from utils.delaunay import DelaunayTriangulation, in_circle
+from utils.network import VoronoiDiagram
+
+class TestDelaunay(unittest.TestCase):
+
+    def test_single_triangle(self): 
+        triangulation = DelaunayTriangulation([Point(0, 0), Point(10, 0), Point(5, 8)])
+        self.assertEqual(1, len(triangulation.triangles))
+        self.assertEqual([{1, 2}, {0, 2}, {0, 1}], triangulation.neighbours())
+        center = triangulation.circumcenters()[0]
+        self.assertAlmostEqual(5, center.x())
+
+    def test_collinear(self): 
+        triangulation = DelaunayTriangulation([Point(20, 0), Point(0, 0), Point(10, 0)])
+        self.assertEqual([], triangulation.triangles)
+        self.assertEqual([{2}, {2}, {0, 1}], triangulation.neighbours())
+        # a point off the line starts the triangulation
+        triangulation.insert(Point(10, 10))
+        self.assertEqual(2, len(triangulation.triangles))
+
+    def test_empty_circles(self): 
+        random.seed(5)
+        points = [Point(random.randint(-800, 800), random.randint(-800, 800)) for _ in range(200)]
+        triangulation = DelaunayTriangulation(points)
+        for a, b, c in triangulation.triangles: 
+            for p in triangulation.points: 
+                self.assertLessEqual(in_circle(triangulation.points[a], triangulation.points[b], triangulation.points[c], p), 0)
+
+    def test_incremental_insert(self): 
+        triangulation = DelaunayTriangulation()
+        for point in [Point(0, 0), Point(10, 0), Point(0, 10), Point(10, 10), Point(5, 5)]: 
+            triangulation.insert(point)
+        self.assertEqual(4, len(triangulation.triangles))
+        self.assertEqual({0, 1, 2, 3}, triangulation.neighbours()[4])
+
+    def test_same_cells_as_clipping(self): 
+        random.seed(7)
+        points = [Point(random.randint(-800, 800), random.randint(-800, 800)) for _ in range(60)]
+        clipped = VoronoiDiagram(points)
+        dual = VoronoiDiagram(points, engine='delaunay')
+        for c1, c2 in zip(clipped.voronoi_cells, dual.voronoi_cells): 
+            h1 = sorted((round(p.x(), 6), round(p.y(), 6)) for p in c1.hull)
+            h2 = sorted((round(p.x(), 6), round(p.y(), 6)) for p in c2.hull)
+            self.assertListEqual(h1, h2)
+
+
+if __name__ == '__main__':
+    unittest.main()
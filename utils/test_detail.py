@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+
+from utils.detail import douglas_peucker, simplify_polygon, cluster_points, snap_segments
+
+def distance_to_segment(point: np.ndarray, a: np.ndarray, b: np.ndarray) -> float: 
+    t = np.clip(np.dot(point - a, b - a) / max(np.dot(b - a, b - a), 1e-300), 0, 1)
+    return float(np.hypot(*(a + t * (b - a) - point)))
+
+class TestDetail(unittest.TestCase):
+
+    def test_douglas_peucker(self): 
+        x = np.linspace(0, 10, 200)
+        points = np.column_stack([x, np.sin(x)])
+        kept = douglas_peucker(points, 0.05)
+        self.assertEqual([0, 199], [kept[0], kept[-1]])
+        self.assertLess(len(kept), 40)
+        # every dropped point is within the tolerance of the simplified line around it
+        for i in range(200): 
+            k = np.searchsorted(kept, i)
+            if kept[min(k, len(kept) - 1)] != i: 
+                self.assertLessEqual(distance_to_segment(points[i], points[kept[k - 1]], points[kept[k]]), 0.05 + 1e-12)
+        # a straight line keeps only its ends
+        self.assertEqual([0, 9], douglas_peucker(np.column_stack([np.arange(10), np.arange(10)]), 1e-9).tolist())
+
+    def test_simplify_polygon(self): 
+        angles = np.linspace(0, 2 * np.pi, 100, endpoint=False)
+        circle = np.column_stack([np.cos(angles), np.sin(angles)])
+        simplified = simplify_polygon(circle, 0.05)
+        self.assertLess(len(simplified), 20)
+        self.assertGreaterEqual(len(simplified), 4)
+        square = [(0, 0), (0, 1), (0.5, 1.001), (1, 1), (1, 0)]
+        self.assertEqual(4, len(simplify_polygon(np.array(square), 0.01)))
+
+    def test_cluster_points(self): 
+        points = np.array([[0.1, 0.1], [0.3, 0.5], [5.5, 5.5], [0.9, 0.2]])
+        centers, counts = cluster_points(points, 1.0)
+        self.assertEqual([3, 1], counts.tolist())
+        self.assertTrue(np.allclose([[13 / 30, 0.8 / 3], [5.5, 5.5]], centers))
+        self.assertEqual(0, len(cluster_points(np.zeros((0, 2)), 1.0)[1]))
+
+    def test_snap_segments(self): 
+        segments = np.array([[0, 0, 10, 0], [10.2, 0.1, 0.1, -0.2], [3, 3, 3.2, 3.1], [0, 0, 0, 10]])
+        self.assertEqual([[0, 0, 0, 10], [0, 0, 10, 0]], snap_segments(segments, 1.0).tolist())
+
+if __name__ == '__main__':
+    unittest.main()
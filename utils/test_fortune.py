@@ -0,0 +1,48 @@
+import unittest
+import random
+
+from utils.shapes import Point
+from utils.fortune import FortuneSweep
+from utils.network import VoronoiDiagram
+
+class TestFortune(unittest.TestCase):
+
+    def test_square_neighbours(self): 
+        # the center site cuts the diagonals of the square apart
+        sweep = FortuneSweep([Point(0, 0), Point(10, 0), Point(0, 10), Point(10, 10), Point(5, 5)])
+        self.assertEqual({1, 2, 4}, sweep.neighbours[0])
+        self.assertEqual({1, 2, 4}, sweep.neighbours[3])
+        self.assertEqual({0, 1, 2, 3}, sweep.neighbours[4])
+
+    def test_triangle(self): 
+        sweep = FortuneSweep([Point(0, 0), Point(10, 0), Point(5, 8)])
+        self.assertEqual([{1, 2}, {0, 2}, {0, 1}], sweep.neighbours)
+        self.assertEqual(1, len(sweep.vertices))
+        center = sweep.vertices[0]
+        self.assertAlmostEqual(5, center.x())
+
+    def test_same_row(self): 
+        sweep = FortuneSweep([Point(0, 0), Point(10, 0), Point(20, 0)])
+        self.assertEqual([{1}, {0, 2}, {1}], sweep.neighbours)
+
+    def test_duplicates(self): 
+        sweep = FortuneSweep([Point(0, 0), Point(10, 0), Point(0, 0)])
+        self.assertEqual(sweep.neighbours[0], sweep.neighbours[2])
+
+    def test_same_cells_as_clipping(self): 
+        random.seed(3)
+        points = [Point(random.randint(-800, 800), random.randint(-800, 800)) for _ in range(60)]
+        clipped = VoronoiDiagram(points)
+        swept = VoronoiDiagram(points, engine='fortune')
+        for c1, c2 in zip(clipped.voronoi_cells, swept.voronoi_cells): 
+            h1 = sorted((round(p.x(), 6), round(p.y(), 6)) for p in c1.hull)
+            h2 = sorted((round(p.x(), 6), round(p.y(), 6)) for p in c2.hull)
+            self.assertListEqual(h1, h2)
+
+    def test_unknown_engine(self): 
+        with self.assertRaises(ValueError): 
+            VoronoiDiagram([Point(0, 0)], engine='magic')
+
+
+if __name__ == '__main__':
+    unittest.main()
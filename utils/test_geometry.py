@@ -0,0 +1,149 @@
+import unittest
+import random
+import numpy as np
+
+from utils.shapes import Point, Line, HalfPlane, ComplexPolygon
+from utils.geometry import clip_convex_polygon, clip_convex_polygon_batch, circumcenter, half_plane_intersection
+from utils.network import VoronoiDiagram
+
+class TestClipping(unittest.TestCase):
+
+    def test_circumcenter(self): 
+        self.assertEqual((5, 5), circumcenter((0, 0), (10, 0), (0, 10)))
+        self.assertIsNone(circumcenter((0, 0), (1, 1), (2, 2)))
+
+    def test_clip_square(self): 
+        square = np.array([[0, 0], [0, 10], [10, 10], [10, 0]], dtype=float)
+        labels = np.full(4, -1)
+        # keep x <= 5
+        polygon, new_labels = clip_convex_polygon(square, labels, 1, 0, 5, 7)
+        self.assertEqual({(0, 0), (0, 10), (5, 10), (5, 0)}, {tuple(p) for p in polygon.tolist()})
+        self.assertEqual(1, (new_labels == 7).sum())
+
+    def test_clip_trough_vertex(self): 
+        square = np.array([[0, 0], [0, 10], [10, 10], [10, 0]], dtype=float)
+        # keep y <= x, the line goes trough two corners
+        polygon, _ = clip_convex_polygon(square, np.full(4, -1), -1, 1, 0, 0)
+        self.assertEqual(3, len(polygon))
+
+    def test_batch(self): 
+        square = np.array([[0, 0], [0, 10], [10, 10], [10, 0]], dtype=float)
+        a, b, c = np.array([1.0, 0.0, 1.0]), np.array([0.0, 1.0, 0.0]), np.array([5.0, 5.0, 8.0])
+        polygon, labels = clip_convex_polygon_batch(square, np.full(4, -1), a, b, c)
+        self.assertEqual(4, len(polygon))
+        # the third half plane does not cut the polygon anymore
+        self.assertNotIn(2, labels.tolist())
+
+    def test_vectorized_engine(self): 
+        random.seed(11)
+        points = [Point(random.randint(-800, 800), random.randint(-800, 800)) for _ in range(60)]
+        clipped = VoronoiDiagram(points)
+        vectorized = VoronoiDiagram(points, engine='vectorized')
+        for c1, c2 in zip(clipped.voronoi_cells, vectorized.voronoi_cells): 
+            h1 = sorted((round(p.x(), 4), round(p.y(), 4)) for p in c1.hull)
+            h2 = sorted((round(p.x(), 4), round(p.y(), 4)) for p in c2.hull)
+            self.assertListEqual(h1, h2)
+
+    def test_lattice(self):
+        # sites on an integer grid have many corners where more than two bisectors meet
+        random.seed(5)
+        points = [Point(x, y) for x, y in sorted({(random.randint(0, 12), random.randint(0, 12)) for _ in range(80)})]
+        diagrams = [VoronoiDiagram(points, engine=engine) for engine in ('clipping', 'fortune', 'delaunay', 'vectorized')]
+        for cells in zip(*[diagram.voronoi_cells for diagram in diagrams]):
+            expected = sorted(other.vertex.label for other in cells[0].neighbours())
+            for cell in cells[1:]:
+                self.assertListEqual(expected, sorted(other.vertex.label for other in cell.neighbours()))
+                self.assertEqual(len(cells[0].hull), len(cell.hull))
+
+    def test_one_site(self):
+        box = [(point.x(), point.y()) for point in VoronoiDiagram([Point(3, 4)]).voronoi_cells[0].hull]
+        cell = VoronoiDiagram([Point(3, 4)], engine='vectorized').voronoi_cells[0]
+        self.assertEqual(box, [(point.x(), point.y()) for point in cell.hull])
+        self.assertEqual([], cell.neighbours())
+
+    def test_parallel_engine(self):
+        random.seed(13)
+        points = [Point(random.randint(-800, 800), random.randint(-800, 800)) for _ in range(40)]
+        clipped = VoronoiDiagram(points)
+        parallel = VoronoiDiagram(points, engine='parallel', workers=2)
+        for c1, c2 in zip(clipped.voronoi_cells, parallel.voronoi_cells): 
+            h1 = sorted((round(p.x(), 4), round(p.y(), 4)) for p in c1.hull)
+            h2 = sorted((round(p.x(), 4), round(p.y(), 4)) for p in c2.hull)
+            self.assertListEqual(h1, h2)
+
+    def test_parallel_one_site(self):
+        box = [(point.x(), point.y()) for point in VoronoiDiagram([Point(3, 4)]).voronoi_cells[0].hull]
+        cell = VoronoiDiagram([Point(3, 4)], engine='parallel', workers=1).voronoi_cells[0]
+        self.assertEqual(box, [(point.x(), point.y()) for point in cell.hull])
+        self.assertEqual([], cell.neighbours())
+
+    def test_chunks(self):
+        random.seed(13)
+        points = [Point(random.randint(-800, 800), random.randint(-800, 800)) for _ in range(40)]
+        clipped = VoronoiDiagram(points)
+        chunked = VoronoiDiagram(points, engine='parallel', workers=2, build=False)
+        starts = [chunk[0] for chunk in chunked.cell_chunks(chunk_size=7)]
+        self.assertListEqual(list(range(0, 40, 7)), sorted(starts))
+        for chunk in chunked.cell_chunks(chunk_size=7):
+            chunked.add_cells(chunk)
+        for c1, c2 in zip(clipped.voronoi_cells, chunked.voronoi_cells):
+            h1 = sorted((round(p.x(), 4), round(p.y(), 4)) for p in c1.hull)
+            h2 = sorted((round(p.x(), 4), round(p.y(), 4)) for p in c2.hull)
+            self.assertListEqual(h1, h2)
+
+
+class TestHalfPlaneIntersection(unittest.TestCase):
+
+    def area(self, polygon: ComplexPolygon) -> float: 
+        hull = polygon.hull
+        return abs(sum(hull[i].x() * hull[i - 1].y() - hull[i - 1].x() * hull[i].y() for i in range(len(hull)))) / 2
+
+    def test_same_as_clipping(self): 
+        random.seed(19)
+        middle = Point(30, -20)
+        others = [Point(random.uniform(-900, 900), random.uniform(-900, 900)) for _ in range(50)]
+        bisectors = [middle.bi_sector(other) for other in others]
+        half_planes = [HalfPlane(bisector, middle - bisector.start) for bisector in bisectors]
+
+        clipped = ComplexPolygon([Point(-1000, 1000), Point(1000,1000), Point(1000,-1000), Point(-1000, -1000)])
+        for half_plane in half_planes: 
+            clipped = clipped.clip_with_halfplane(half_plane)
+        self.assertAlmostEqual(self.area(clipped), self.area(half_plane_intersection(half_planes)))
+
+    def test_array_and_bounds(self): 
+        # x <= 5 and y <= 5 inside the triangle (0, 0), (10, 0), (0, 10)
+        planes = np.array([[1, 0, 5], [0, 1, 5]], dtype=float)
+        triangle = ComplexPolygon([Point(0, 0), Point(10, 0), Point(0, 10)])
+        result = half_plane_intersection(planes, bounds=triangle)
+        self.assertEqual({(0, 0), (5, 0), (5, 5), (0, 5)}, {(round(p.x(), 6) + 0, round(p.y(), 6) + 0) for p in result.hull})
+
+    def test_rounded_angles(self):
+        # cos(pi / 2) is not 0, the plane y >= 183.9 is parallel to a side of the box up to a rounding error
+        result = half_plane_intersection(np.array([[np.cos(np.pi / 2), -1.0, -183.9]]))
+        self.assertEqual(183.9, round(min(p.y() for p in result.hull), 6))
+        # the same for the sides at an angle of pi and -pi, and an empty intersection
+        planes = np.array([[np.cos(np.pi / 2), np.sin(np.pi / 2), 20], [np.cos(-np.pi / 2), np.sin(-np.pi / 2), -30]])
+        self.assertIsNone(half_plane_intersection(planes))
+        rng = np.random.default_rng(4)
+        for _ in range(50):
+            angles = rng.integers(0, 4, 4) * np.pi / 2
+            planes = np.column_stack([np.cos(angles), np.sin(angles), rng.uniform(-50, 50, 4)])
+            # every plane is x <= c, x >= -c, y <= c or y >= -c up to rounding, the result is a rectangle
+            low_x = max([-1000.0] + [-c for a, b, c in planes if a < -0.5])
+            high_x = min([1000.0] + [c for a, b, c in planes if a > 0.5])
+            low_y = max([-1000.0] + [-c for a, b, c in planes if b < -0.5])
+            high_y = min([1000.0] + [c for a, b, c in planes if b > 0.5])
+            result = half_plane_intersection(planes)
+            if low_x >= high_x or low_y >= high_y:
+                self.assertIsNone(result)
+            else:
+                self.assertAlmostEqual((high_x - low_x) * (high_y - low_y), self.area(result), places=6)
+
+    def test_empty(self):
+        above = HalfPlane(Line(Point(0, 0), Point(1, 0)), Point(0, 1))
+        below = HalfPlane(Line(Point(0, -5), Point(1, -5)), Point(0, -1))
+        self.assertIsNone(half_plane_intersection([above, below]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+
+from utils.shapes import Point
+from utils.network import Network, Vertex, Edge
+from utils.graph import CSRGraph
+
+def floyd_warshall(n: int, sources: np.ndarray, targets: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    distances = np.full((n, n), np.inf)
+    np.fill_diagonal(distances, 0)
+    for a, b, w in zip(sources, targets, weights):
+        distances[a, b] = distances[b, a] = min(distances[a, b], w)
+    for k in range(n):
+        distances = np.minimum(distances, distances[:, k:k + 1] + distances[k:k + 1, :])
+    return distances
+
+class TestCSRGraph(unittest.TestCase):
+
+    def setUp(self):
+        # a square with a diagonal and a separate edge
+        self.vertices = [Vertex(Point(x, y)) for x, y in [(0, 0), (3, 0), (3, 4), (0, 4), (10, 10), (11, 10)]]
+        pairs = [(0, 1), (1, 2), (2, 3), (3, 0), (0, 2), (4, 5)]
+        self.network = Network(self.vertices, [Edge(self.vertices[a], self.vertices[b]) for a, b in pairs])
+
+    def test_network_adjacency(self):
+        self.assertEqual([0, 1, 2, 3, 4, 5], [vertex.label for vertex in self.vertices])
+        self.assertEqual(3, len(self.vertices[0].edges))
+        graph = CSRGraph.from_network(self.network)
+        self.assertEqual([1, 2, 3], sorted(graph.neighbours(0).tolist()))
+        self.assertEqual([3, 2, 3, 2, 1, 1], graph.degrees().tolist())
+
+    def test_shortest_path(self):
+        graph = CSRGraph.from_network(self.network)
+        length, path = graph.shortest_path(1, 3)
+        self.assertAlmostEqual(7, length)
+        self.assertIn(path, ([1, 0, 3], [1, 2, 3]))
+        self.assertEqual((np.inf, []), graph.shortest_path(0, 4))
+        self.assertEqual([0, 1, 1, 1, -1, -1], graph.bfs(0).tolist())
+
+    def test_components(self):
+        count, components = CSRGraph.from_network(self.network).connected_components()
+        self.assertEqual(2, count)
+        self.assertEqual([0, 0, 0, 0, 1, 1], components.tolist())
+
+    def test_long_path(self):
+        # the rounds of a component search must not grow with the diameter
+        rng = np.random.default_rng(3)
+        n = 200_000
+        labels = rng.permutation(n)
+        graph = CSRGraph(n + 1, labels[:-1], labels[1:])
+        count, components = graph.connected_components()
+        self.assertEqual(2, count)
+        self.assertEqual(1, components[n])
+        self.assertEqual(0, components[:n].max())
+        length, path = graph.shortest_path(int(labels[0]), int(labels[1]))
+        self.assertEqual((1, [labels[0], labels[1]]), (length, path))
+
+    def test_random_graphs(self):
+        rng = np.random.default_rng(7)
+        for _ in range(10):
+            n, m = 25, int(rng.integers(0, 40))
+            sources, targets, weights = rng.integers(0, n, m), rng.integers(0, n, m), rng.uniform(0, 5, m)
+            graph = CSRGraph(n, sources, targets, weights)
+            expected = floyd_warshall(n, sources, targets, weights)
+            self.assertTrue(np.allclose(expected, graph.multi_source(list(range(n)))))
+            _, components = graph.connected_components()
+            self.assertTrue(((components[:, None] == components[None, :]) == np.isfinite(expected)).all())
+
+    def test_value_error(self):
+        with self.assertRaises(ValueError):
+            CSRGraph(2, [0], [2])
+        with self.assertRaises(ValueError):
+            CSRGraph(2, [0], [1], [-1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from utils.importer import project, read_geojson, import_csv, import_geojson
+
+class TestImporter(unittest.TestCase):
+
+    def setUp(self): 
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self): 
+        self.directory.cleanup()
+
+    def write(self, name: str, text: str) -> str: 
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as file: 
+            file.write(text)
+        return path
+
+    def test_project(self): 
+        points = project([0, 180, 4.9], [0, 0, 52.4], origin=(4.9, 52.4))
+        self.assertTrue(np.allclose([0, 0], points[2]))
+        self.assertAlmostEqual(20037508.34, points[1, 0] - points[0, 0], places=1)
+        self.assertTrue(np.isfinite(project([0], [90])).all())
+
+    def test_csv(self): 
+        stations = self.write('stations.csv', 'id,name,lon,lat\na,A,4.90,52.37\nb,B,4.88,52.36\nc,C,4.91,52.35\nd,D,4.93,52.34\n')
+        lines = self.write('lines.csv', 'from,to\na,b\nb,c\nc,b\nc,d\n')
+        reported = []
+        importer = import_csv(stations, lines, chunk_size=2, progress=lambda done, total: reported.append((done, total)))
+        network = importer.network()
+        self.assertEqual(4, len(network.vertices))
+        self.assertEqual([[0, 1], [1, 2], [2, 3]], network.edge_array().tolist())
+        self.assertTrue(np.allclose(project([4.9], [52.37])[0], [network.vertices[0].point.x(), network.vertices[0].point.y()]))
+        self.assertEqual(4, len(importer.sites()))
+        total = os.path.getsize(stations) + os.path.getsize(lines)
+        self.assertEqual((total, total), reported[-1])
+        self.assertEqual(sorted(reported), reported)
+
+        with self.assertRaises(ValueError): 
+            import_csv(stations, self.write('bad.csv', 'from,to\na,x\n'))
+        with self.assertRaises(ValueError): 
+            import_csv(stations, lon_column='longitude')
+
+    def test_geojson(self): 
+        features = [
+            {'type': 'Feature', 'properties': {'id': 's1'}, 'geometry': {'type': 'Point', 'coordinates': [0.0, 0.0]}}, 
+            {'type': 'Feature', 'properties': {}, 'geometry': {'type': 'LineString', 'coordinates': [[0.0, 0.0], [1.0, 0.0], [1.0, 1.0]]}}, 
+            {'type': 'Feature', 'properties': {}, 'geometry': {'type': 'MultiLineString', 'coordinates': [[[1.0, 0.0], [2.0, 0.0]], [[5.0, 5.0], [6.0, 5.0]]]}}, 
+            {'type': 'Feature', 'properties': {'id': 's2'}, 'geometry': {'type': 'Point', 'coordinates': [2.0, 0.0]}}, 
+        ]
+        collection = self.write('lines.geojson', json.dumps({'features': features, 'type': 'FeatureCollection'}))
+        sequence = self.write('lines.geojsonl', '\n'.join(json.dumps(feature) for feature in features))
+        for path in (collection, sequence): 
+            # a tiny buffer makes every feature cross a buffer boundary
+            self.assertEqual(features, [feature for chunk in read_geojson(path, chunk_size=3, buffer_size=7) for feature in chunk])
+            points, edges = import_geojson(path, chunk_size=2).arrays()
+            self.assertEqual(6, len(points))
+            self.assertEqual([[0, 1], [1, 2], [1, 3], [4, 5]], edges.tolist())
+
+if __name__ == '__main__':
+    unittest.main()
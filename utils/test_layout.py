@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+
+from utils.shapes import Point
+from utils.network import Network, Vertex, Edge
+from utils.layout import QuadTree, ForceLayout
+
+class TestQuadTree(unittest.TestCase):
+
+    def exact_repulsion(self, points: np.ndarray) -> np.ndarray:
+        delta = points[:, None, :] - points[None, :, :]
+        distance_sq = (delta * delta).sum(axis=2)
+        np.fill_diagonal(distance_sq, np.inf)
+        return (delta / distance_sq[:, :, None]).sum(axis=1)
+
+    def test_mass(self):
+        points = np.random.default_rng(1).uniform(0, 100, (500, 2))
+        tree = QuadTree(points)
+        self.assertEqual(500, tree.mass[0])
+        self.assertTrue(np.allclose(points.mean(axis=0), tree.center_of_mass[0]))
+        self.assertTrue(all(tree.end[tree.leaf] - tree.start[tree.leaf] <= tree.leaf_size))
+
+    def test_repulsion(self):
+        points = np.random.default_rng(2).uniform(0, 100, (400, 2))
+        exact = self.exact_repulsion(points)
+        # with theta 0 every node is opened, so it is exact
+        self.assertTrue(np.allclose(exact, QuadTree(points).repulsion(1.0, theta=0.0)))
+        error = np.linalg.norm(QuadTree(points).repulsion(1.0, theta=0.5) - exact, axis=1) / np.linalg.norm(exact, axis=1)
+        self.assertLess(np.median(error), 0.01)
+
+class TestForceLayout(unittest.TestCase):
+
+    def test_path(self):
+        # a path folded on itself should unfold to edges of about the ideal length (repulsion stretches them a bit)
+        rng = np.random.default_rng(3)
+        vertices = [Vertex(Point(*rng.uniform(0, 10, 2))) for _ in range(20)]
+        network = Network(vertices, [Edge(vertices[i], vertices[i + 1]) for i in range(19)])
+        layout = ForceLayout(network, ideal_length=10)
+        steps = layout.run(iterations=500)
+        self.assertLess(steps, 500)
+        lengths = [abs(edge.vertices[1].point - edge.vertices[0].point) for edge in network.edges]
+        self.assertTrue(all(5 < length < 30 for length in lengths))
+        self.assertEqual(network.edges[0].line.end, vertices[1].point)
+
+    def test_same_spot(self):
+        vertices = [Vertex(Point(0, 0)) for _ in range(5)]
+        layout = ForceLayout(Network(vertices, []), seed=1)
+        layout.run(iterations=10)
+        self.assertEqual(5, len({(vertex.point.x(), vertex.point.y()) for vertex in vertices}))
+
+if __name__ == '__main__':
+    unittest.main()
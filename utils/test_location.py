@@ -0,0 +1,42 @@
+import unittest
+import random
+import numpy as np
+
+from utils.shapes import Point
+from utils.network import VoronoiDiagram
+from utils.location import KDTree, VoronoiLocator
+
+class TestLocation(unittest.TestCase):
+
+    def test_kd_tree(self): 
+        rng = np.random.default_rng(1)
+        points = rng.uniform(-100, 100, (500, 2))
+        queries = rng.uniform(-150, 150, (300, 2))
+        tree = KDTree(points)
+        expected = np.sqrt(((queries[:, None, :] - points[None]) ** 2).sum(axis=2).min(axis=1))
+
+        _, distances = tree.nearest_many(queries)
+        np.testing.assert_allclose(expected, distances)
+        for query, distance in zip(queries[:50], expected): 
+            self.assertAlmostEqual(distance, tree.nearest(query[0], query[1])[1])
+
+    def test_empty_tree(self): 
+        indices, _ = KDTree(np.zeros((0, 2))).nearest_many(np.zeros((3, 2)))
+        self.assertEqual([-1, -1, -1], indices.tolist())
+
+    def test_locate_cells(self): 
+        random.seed(23)
+        points = [Point(random.uniform(-800, 800), random.uniform(-800, 800)) for _ in range(50)]
+        diagram = VoronoiDiagram(points, engine='delaunay')
+        locator = VoronoiLocator(diagram)
+
+        query = Point(12, 34)
+        expected = min(range(len(points)), key=lambda i: abs(points[i] - query))
+        self.assertEqual(expected, locator.locate(query))
+        self.assertIs(diagram.voronoi_cells[expected], locator.cell_at(query))
+        self.assertEqual(-1, locator.locate(Point(5000, 0)))
+        self.assertEqual([expected, -1], locator.locate_many(np.array([[12, 34], [5000, 0]])).tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
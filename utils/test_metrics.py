@@ -0,0 +1,43 @@
+import unittest
+import json
+import os
+import tempfile
+
+from utils.metrics import Metrics
+
+class TestMetrics(unittest.TestCase):
+
+    def test_frames(self): 
+        metrics = Metrics(history=2)
+        for _ in range(3): 
+            with metrics.frame(): 
+                with metrics.phase('scene'): 
+                    metrics.count('primitives', 10)
+        # outside of a frame a phase goes to the last frame
+        with metrics.phase('blit'): 
+            pass
+        self.assertEqual(2, len(metrics.frames))
+        self.assertEqual({'scene', 'blit'}, set(metrics.last_frame()['phases']))
+        self.assertEqual(30, metrics.totals['primitives'])
+        summary = metrics.summary()
+        self.assertEqual(10, summary['counts']['primitives'])
+        self.assertEqual(2, summary['phases']['scene']['count'])
+        self.assertEqual(1, summary['phases']['blit']['count'])
+
+    def test_dump(self): 
+        metrics = Metrics()
+        with metrics.measure('build'): 
+            pass
+        with metrics.measure('build'): 
+            pass
+        with tempfile.TemporaryDirectory() as directory: 
+            path = os.path.join(directory, 'metrics.json')
+            metrics.dump(path, frames=True)
+            with open(path) as file: 
+                data = json.load(file)
+        self.assertEqual(2, data['builds']['build']['count'])
+        self.assertIsNone(data['frame'])
+        self.assertEqual([], data['frame_log'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import random
+import numpy as np
+
+from utils.shapes import Point
+from utils.network import VoronoiDiagram, Network
+from utils.random_graphs import knn_edges
+
+def cell_key(cell): 
+    return sorted((round(p.x(), 6), round(p.y(), 6)) for p in cell.hull)
+
+class TestIncrementalVoronoi(unittest.TestCase):
+
+    def setUp(self): 
+        random.seed(21)
+        self.points = [Point(random.uniform(-800, 800), random.uniform(-800, 800)) for _ in range(40)]
+        self.diagram = VoronoiDiagram(self.points, engine='delaunay')
+
+    def assertSameAsRebuild(self): 
+        rebuilt = VoronoiDiagram([vertex.point for vertex in self.diagram.vertices], engine='delaunay')
+        for i, (c1, c2) in enumerate(zip(self.diagram.voronoi_cells, rebuilt.voronoi_cells)): 
+            self.assertEqual(i, c1.vertex.label)
+            self.assertListEqual(cell_key(c2), cell_key(c1))
+
+    def test_nearest_site(self): 
+        query = Point(10, 20)
+        expected = min(range(len(self.points)), key=lambda i: abs(self.points[i] - query))
+        self.assertEqual(expected, self.diagram.nearest_site(query))
+
+    def test_insert(self): 
+        label = self.diagram.insert_site(Point(12, -34))
+        self.assertEqual(40, label)
+        self.assertSameAsRebuild()
+
+    def test_remove(self): 
+        self.diagram.remove_site(7)
+        self.assertEqual(39, len(self.diagram.voronoi_cells))
+        self.assertSameAsRebuild()
+
+    def test_move(self): 
+        self.diagram.move_site(3, Point(-500, 600))
+        self.diagram.move_site(3, Point(-490, 610))
+        self.assertSameAsRebuild()
+
+    def test_duplicate(self): 
+        with self.assertRaises(ValueError): 
+            self.diagram.insert_site(Point(self.points[5].x(), self.points[5].y()))
+        with self.assertRaises(ValueError): 
+            self.diagram.move_site(3, Point(self.points[5].x(), self.points[5].y()))
+        self.assertEqual(40, len(self.diagram.voronoi_cells))
+        # nothing changed, and a site can stay where it is
+        self.diagram.move_site(3, Point(self.points[3].x(), self.points[3].y()))
+        self.assertSameAsRebuild()
+
+    def test_from_empty(self): 
+        diagram = VoronoiDiagram([])
+        diagram.insert_site(Point(0, 0))
+        diagram.insert_site(Point(100, 0))
+        self.assertEqual(2, len(diagram.voronoi_cells))
+        self.assertListEqual([(-1000, -1000), (-1000, 1000), (50, -1000), (50, 1000)], cell_key(diagram.voronoi_cells[0]))
+
+
+class TestRandomNetwork(unittest.TestCase): 
+
+    def edge_set(self, network: Network) -> set[tuple[int, int]]: 
+        return {tuple(sorted(edge)) for edge in network.edge_array().tolist()}
+
+    def test_seed(self): 
+        first = Network.create_random(size=100, connectivity=200, seed=3)
+        second = Network.create_random(size=100, connectivity=200, seed=3)
+        self.assertEqual(self.edge_set(first), self.edge_set(second))
+        self.assertEqual(200, len(self.edge_set(first)))
+        self.assertEqual([v.point for v in first.vertices], [v.point for v in second.vertices])
+        with self.assertRaises(ValueError): 
+            Network.create_random(size=5, connectivity=11)
+
+    def test_knn(self): 
+        network = Network.create_random(size=300, model='knn', k=4, seed=1)
+        points = np.array([[v.point.x(), v.point.y()] for v in network.vertices])
+        distances = ((points[:, None] - points[None]) ** 2).sum(axis=2)
+        np.fill_diagonal(distances, np.inf)
+        edges = self.edge_set(network)
+        for i in range(len(points)): 
+            for j in np.argsort(distances[i])[:4].tolist(): 
+                self.assertIn((min(i, j), max(i, j)), edges)
+
+    def test_knn_collinear(self):
+        # the points span no area, the cells of the grid still have to be a sensible size
+        # (random x, points that are equally far apart make the nearest ambiguous)
+        points = np.column_stack([np.random.default_rng(3).uniform(1, 500, 1000), np.full(1000, 7.0)])
+        edges = {(min(i, j), max(i, j)) for i, j in knn_edges(points, 3).tolist()}
+        distances = ((points[:, None] - points[None]) ** 2).sum(axis=2)
+        np.fill_diagonal(distances, np.inf)
+        for i in range(len(points)):
+            for j in np.argsort(distances[i])[:3].tolist():
+                self.assertIn((min(i, j), max(i, j)), edges)
+        self.assertEqual(1, len(knn_edges(np.full((2, 2), 5.0), 3)))
+
+    def test_radius(self): 
+        network = Network.create_random(size=300, model='radius', radius=40, seed=2)
+        points = np.array([[v.point.x(), v.point.y()] for v in network.vertices])
+        distances = ((points[:, None] - points[None]) ** 2).sum(axis=2)
+        first, second = np.nonzero(np.triu(distances <= 40 ** 2, k=1))
+        self.assertEqual(set(zip(first.tolist(), second.tolist())), self.edge_set(network))
+
+if __name__ == '__main__':
+    unittest.main()
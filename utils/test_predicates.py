@@ -0,0 +1,54 @@
+import unittest
+
+from utils.shapes import Point, Line, HalfPlane, ComplexPolygon
+from utils.predicates import orientation, in_circle, side_of_line
+from utils.network import VoronoiDiagram
+
+class TestPredicates(unittest.TestCase):
+
+    def test_orientation(self):
+        self.assertEqual(1, orientation((0, 0), (1, 0), (0, 1)))
+        self.assertEqual(-1, orientation((0, 0), (0, 1), (1, 0)))
+        self.assertEqual(0, orientation((0, 0), (1, 1), (3, 3)))
+
+    def test_orientation_near_collinear(self):
+        # the float determinant of these points has the wrong sign or is zero for many of them
+        for i in range(64):
+            p = (0.5 + i * 2 ** -53, 0.5)
+            exact = orientation(p, (12.0, 12.0), (24.0, 24.0))
+            self.assertEqual(-1 if i > 0 else 0, exact)
+
+    def test_in_circle(self):
+        a, b, c = (0, 0), (2, 0), (0, 2)
+        self.assertEqual(1, in_circle(a, b, c, (1, 1)))
+        self.assertEqual(-1, in_circle(a, b, c, (5, 5)))
+        # cocircular points
+        self.assertEqual(0, in_circle(a, b, c, (2, 2)))
+        self.assertEqual(0, in_circle((0.1, 0.1), (0.3, 0.1), (0.1, 0.3), (0.3, 0.3)))
+
+    def test_side_of_line(self):
+        self.assertEqual(1, side_of_line((0, 0), (0, 1), (5, 2)))
+        self.assertEqual(0, side_of_line((0, 0), (0, 1), (5, 0)))
+        self.assertEqual(-1, side_of_line((0.1, 0.2), (1, 1), (0, 0)))
+
+class TestExactClipping(unittest.TestCase):
+
+    def test_clip_trough_corners(self):
+        square = ComplexPolygon([Point(0, 10), Point(10, 10), Point(10, 0), Point(0, 0)])
+        # the diagonal goes trough two corners, they should not show up twice
+        diagonal = HalfPlane(Line(Point(0, 0), Point(10, 10)), Point(1, -1))
+        clipped = square.clip_with_halfplane(diagonal)
+        self.assertEqual({(10, 10), (10, 0), (0, 0)}, {(p.x(), p.y()) for p in clipped.hull})
+        self.assertEqual(3, clipped.size)
+
+    def test_cocircular_sites(self):
+        # on a grid four cells meet in every corner, which should not leave tiny edges behind
+        points = [Point(x * 50, y * 50) for x in range(-4, 5) for y in range(-4, 5)]
+        clipping = VoronoiDiagram(points)
+        fortune = VoronoiDiagram(points, engine='fortune')
+        for c1, c2 in zip(clipping.voronoi_cells, fortune.voronoi_cells):
+            self.assertEqual(len(c2.hull), len(c1.hull))
+            self.assertEqual({cell.vertex.label for cell in c2.neighbours()}, {cell.vertex.label for cell in c1.neighbours()})
+
+if __name__ == '__main__':
+    unittest.main()
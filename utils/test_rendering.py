@@ -0,0 +1,68 @@
+import unittest
+
+from PySide6.QtGui import QPainter, QPicture
+
+from utils.shapes import Point
+from utils.network import Network, Vertex, Edge, EDGE_BATCH, VERTEX_BATCH
+from utils.rendering import DrawLayer, SceneIndex
+import utils.colors as Colors
+
+class TestDrawLayer(unittest.TestCase):
+
+    def setUp(self): 
+        self.vertices = [Vertex(Point(x, 0)) for x in range(0, 100, 10)]
+        self.network = Network(self.vertices, [Edge(v1, v2) for v1, v2 in zip(self.vertices, self.vertices[1:])])
+
+    def test_visible(self): 
+        layer = DrawLayer(self.vertices)
+        self.assertEqual([2, 3, 4], layer.visible((15, -1, 45, 1)).tolist())
+        self.vertices[0].point = Point(30, 0)
+        layer.update([0])
+        self.assertEqual([0, 2, 3, 4], layer.visible((15, -1, 45, 1)).tolist())
+        self.assertEqual([], layer.visible((15, 5, 45, 10)).tolist())
+
+    def test_batch(self): 
+        layer = SceneIndex().add_layer(self.network.edges, batch=EDGE_BATCH)
+        self.assertEqual([0, 1], layer.visible((5, 0, 15, 0)).tolist())
+        self.assertEqual((10, 20), (layer.primitives[1].x1(), layer.primitives[1].x2()))
+        self.vertices[2].point = Point(20, 50)
+        self.network.edges[1].update_line()
+        layer.update([1])
+        self.assertEqual(50, layer.primitives[1].y2())
+
+    def test_detail(self): 
+        # at zoom band -3 a pixel is 4 world units, markers 10 apart are clustered in cells of 16 units
+        layer = DrawLayer(self.vertices, batch=VERTEX_BATCH)
+        primitives, tree = layer.level(-3)
+        self.assertLess(len(primitives), 10)
+        self.assertEqual(len(primitives), len(tree.query((-1, -1, 101, 1))))
+        # the ends snap to two pixels, edges of 10 units stay on a grid of 8 units at band -3 and most vanish on 32 units
+        edges = DrawLayer(self.network.edges, batch=EDGE_BATCH)
+        self.assertEqual(9, len(edges.level(-3)[0]))
+        self.assertEqual(3, len(edges.level(-5)[0]))
+
+    def test_detail_empty(self):
+        # no edges, or edges that all snap to a point, leave nothing to draw below zoom 1
+        self.assertEqual(0, len(DrawLayer([], batch=EDGE_BATCH).level(-3)[0]))
+        short = [Edge(Vertex(Point(x, 0)), Vertex(Point(x + 0.1, 0))) for x in range(3)]
+        self.assertEqual(0, len(DrawLayer(short, batch=EDGE_BATCH).level(-3)[0]))
+        picture = QPicture()
+        painter = QPainter(picture)
+        self.assertEqual(0, DrawLayer(short, batch=EDGE_BATCH).draw(painter, (-10, -10, 10, 10), -3))
+        painter.end()
+
+    def test_bounds(self):
+        index = SceneIndex()
+        self.assertIsNone(index.bounds())
+        index.add_layer([])
+        index.add_layer(self.network.edges, batch=EDGE_BATCH)
+        index.add_layer([Vertex(Point(20, -30))])
+        self.assertEqual((0, -30, 90, 0), index.bounds())
+
+    def test_style_cache(self):
+        self.assertIs(Colors.pen(Colors.TEAL, 3), Colors.pen(Colors.TEAL, 3))
+        self.assertIsNot(Colors.pen(Colors.TEAL, 3), Colors.pen(Colors.TEAL, 2))
+        self.assertIs(Colors.brush(Colors.WHITE), Colors.brush(Colors.WHITE))
+
+if __name__ == '__main__':
+    unittest.main()
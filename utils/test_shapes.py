@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+
+from utils.vectors import Vector
+from utils.shapes import Point, PointArray
+
+class TestPoint(unittest.TestCase):
+
+    def test_create_point(self): 
+        p = Point(1, 2)
+        self.assertEqual([1, 2], p.get_data())
+        self.assertEqual(Point(1, 2), Point(Vector([1, 2])))
+        self.assertFalse(hasattr(p, '__dict__'))
+        with self.assertRaises(TypeError): 
+            Point('a', 2)
+
+    def test_arithmetic(self): 
+        p1 = Point(1, 2)
+        p2 = Point(3, 5)
+        self.assertEqual(Point(4, 7), p1 + p2)
+        self.assertEqual(Point(-2, -3), p1 - p2)
+        self.assertEqual(13, p1.dot_product(p2))
+        p1.add(p2)
+        self.assertEqual(Point(4, 7), p1)
+        with self.assertRaises(ValueError): 
+            p1 + Vector([1, 2, 3])
+
+    def test_copy_does_not_share(self): 
+        p = Point(3, 4)
+        normalized = p.get_normalized()
+        self.assertEqual(Point(3, 4), p)
+        self.assertAlmostEqual(1, normalized.magnitude())
+        v = Vector([3, 4])
+        v.get_scaled(2)
+        self.assertEqual(Vector([3, 4]), v)
+
+    def test_hash(self): 
+        self.assertEqual(hash(Point(1, 2)), hash(Point(1.0, 2.0)))
+        self.assertEqual(1, len({Point(1, 2), Point(1, 2)}))
+
+
+class TestPointArray(unittest.TestCase):
+
+    def test_create(self): 
+        points = PointArray([Point(1, 2), Point(3, 4)])
+        self.assertEqual(2, len(points))
+        self.assertEqual(Point(3, 4), points[1])
+        self.assertEqual([Point(1, 2), Point(3, 4)], points.to_points())
+        self.assertEqual(np.float64, points.data.dtype)
+
+    def test_operations(self): 
+        points = PointArray(np.array([[1, 2], [3, 4]]))
+        np.testing.assert_allclose([[2, 4], [4, 6]], (points + Point(1, 2)).data)
+        np.testing.assert_allclose([[0, 0], [0, 0]], (points - points).data)
+        np.testing.assert_allclose([[2, 4], [9, 12]], points.get_scaled(np.array([2, 3])).data)
+        np.testing.assert_allclose([5, 11], points.dot_product(Point(1, 2)))
+        np.testing.assert_allclose([np.sqrt(5), 5], points.magnitude())
+
+    def test_bi_sectors(self): 
+        points = PointArray([Point(0, 0), Point(2, 6)])
+        others = PointArray([Point(4, 2), Point(-1, 1)])
+        starts, ends = points.bi_sectors(others)
+        for i in range(2): 
+            line = points[i].bi_sector(others[i])
+            self.assertEqual(line.start, starts[i])
+            self.assertEqual(line.end, ends[i])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import random
+import math
+import numpy as np
+
+from utils.shapes import Point
+from utils.spatial import SpatialGrid, BoxTree
+from utils.network import VoronoiDiagram
+
+class TestSpatialGrid(unittest.TestCase):
+
+    def test_nearest_order(self): 
+        random.seed(2)
+        points = [Point(random.uniform(-100, 100), random.uniform(-100, 100)) for _ in range(200)]
+        grid = SpatialGrid(points)
+        query = Point(12.5, -40)
+        found = list(grid.nearest(query))
+        expected = sorted((math.hypot(p.x() - 12.5, p.y() + 40), i) for i, p in enumerate(points))
+        self.assertEqual(expected, found)
+
+    def test_query_outside(self): 
+        grid = SpatialGrid([Point(0, 0), Point(10, 0), Point(3, 4)])
+        self.assertEqual([1, 2, 0], [i for _, i in grid.nearest(Point(100, 50))])
+
+    def test_empty(self): 
+        self.assertEqual([], list(SpatialGrid([]).nearest(Point(0, 0))))
+
+    def test_grid_engine(self): 
+        random.seed(17)
+        points = [Point(random.randint(-800, 800), random.randint(-800, 800)) for _ in range(60)]
+        clipped = VoronoiDiagram(points)
+        indexed = VoronoiDiagram(points, engine='grid')
+        for c1, c2 in zip(clipped.voronoi_cells, indexed.voronoi_cells): 
+            h1 = sorted((round(p.x(), 6), round(p.y(), 6)) for p in c1.hull)
+            h2 = sorted((round(p.x(), 6), round(p.y(), 6)) for p in c2.hull)
+            self.assertListEqual(h1, h2)
+
+    def test_collinear(self):
+        # the sites span no area, the cells are strips that reach far outside of the grid
+        points = [Point(x, 2 * x) for x in range(10)]
+        self.assertGreater(SpatialGrid(points).cell_size, 1)
+        clipped = VoronoiDiagram(points)
+        indexed = VoronoiDiagram(points, engine='grid')
+        for c1, c2 in zip(clipped.voronoi_cells, indexed.voronoi_cells):
+            h1 = sorted((round(p.x(), 6), round(p.y(), 6)) for p in c1.hull)
+            h2 = sorted((round(p.x(), 6), round(p.y(), 6)) for p in c2.hull)
+            self.assertListEqual(h1, h2)
+
+class TestBoxTree(unittest.TestCase):
+
+    def brute_force(self, boxes: np.ndarray, box: tuple) -> list[int]: 
+        min_x, min_y, max_x, max_y = box
+        return np.flatnonzero((boxes[:, 0] <= max_x) & (boxes[:, 2] >= min_x) & (boxes[:, 1] <= max_y) & (boxes[:, 3] >= min_y)).tolist()
+
+    def test_query(self): 
+        rng = np.random.default_rng(4)
+        corners = rng.uniform(0, 1000, (2000, 2))
+        boxes = np.column_stack([corners, corners + rng.exponential(10, (2000, 2))])
+        tree = BoxTree(boxes)
+        for _ in range(20): 
+            low = rng.uniform(0, 1000, 2)
+            box = tuple(np.concatenate([low, low + rng.uniform(0, 300, 2)]))
+            self.assertEqual(self.brute_force(boxes, box), tree.query(box).tolist())
+
+        # move some boxes far away and back in
+        moved = rng.choice(2000, 100, replace=False)
+        boxes[moved] += rng.uniform(-500, 500, (100, 1))
+        tree.update(moved, boxes[moved])
+        self.assertEqual(self.brute_force(boxes, (100, 100, 600, 400)), tree.query((100, 100, 600, 400)).tolist())
+
+    def test_empty(self): 
+        self.assertEqual([], BoxTree(np.zeros((0, 4))).query((0, 0, 1, 1)).tolist())
+        self.assertEqual([0], BoxTree([(0, 0, 0, 0)]).query((0, 0, 1, 1)).tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from utils.shapes import Point
+from utils.network import Network, VoronoiDiagram
+from utils.storage import save_network, load_network, load_network_arrays, save_voronoi, load_voronoi, load_voronoi_arrays, save_arrays
+
+def cell_key(cell): 
+    return sorted((round(p.x(), 6), round(p.y(), 6)) for p in cell.hull)
+
+class TestStorage(unittest.TestCase):
+
+    def setUp(self): 
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'data.bin')
+
+    def tearDown(self): 
+        self.directory.cleanup()
+
+    def test_network(self): 
+        network = Network.create_random(size=30, connectivity=40, seed=5)
+        save_network(self.path, network)
+        points, edges = load_network_arrays(self.path)
+        self.assertIsInstance(points, np.memmap)
+        self.assertEqual((30, 2), points.shape)
+        self.assertTrue((network.edge_array() == edges).all())
+
+        loaded = load_network(self.path)
+        self.assertEqual([(v.point.x(), v.point.y()) for v in network.vertices], [(v.point.x(), v.point.y()) for v in loaded.vertices])
+        self.assertTrue((network.edge_array() == loaded.edge_array()).all())
+
+    def test_voronoi(self): 
+        rng = np.random.default_rng(11)
+        diagram = VoronoiDiagram([Point(x, y) for x, y in rng.uniform(-800, 800, (40, 2))])
+        save_voronoi(self.path, diagram)
+        self.assertIsInstance(load_voronoi_arrays(self.path)['vertices'], np.memmap)
+
+        loaded = load_voronoi(self.path)
+        self.assertEqual(diagram.engine, loaded.engine)
+        for c1, c2 in zip(diagram.voronoi_cells, loaded.voronoi_cells): 
+            self.assertListEqual(cell_key(c1), cell_key(c2))
+            self.assertEqual({c.vertex.label for c in c1.neighbours()}, loaded.neighbours[c2.vertex.label])
+        # a loaded diagram is a complete one, it can be edited
+        self.assertEqual(40, loaded.insert_site(Point(1.5, 2.5)))
+
+    def test_value_error(self): 
+        save_arrays(self.path, 'voronoi', {'sites': np.zeros((0, 2))})
+        with self.assertRaises(ValueError): 
+            load_network(self.path)
+        with open(self.path, 'wb') as file: 
+            file.write(b'not a network')
+        with self.assertRaises(ValueError): 
+            load_voronoi(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
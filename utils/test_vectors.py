@@ -1,5 +1,6 @@
 import unittest
 import math 
+import numpy as np
 
 from vectors import Vector, Matrix 
 
@@ -94,6 +95,48 @@ class TestVector(unittest.TestCase):
     def test_determinant(self): 
         m1 = Matrix([Vector([4, 0]), Vector([0, 2])])
         self.assertEqual(8, m1.determinant())
+        self.assertEqual(-2, Matrix.from_list([[1, 2], [3, 4]]).determinant())
+        # abs would suggest a norm, the determinant can be negative
+        with self.assertRaises(TypeError): 
+            abs(m1)
+
+    def test_matrix_operations(self): 
+        m1 = Matrix.from_list([[1, 2], [3, 4]])
+        m2 = Matrix.from_list([[5, 6], [7, 8]])
+        self.assertEqual(Matrix.from_list([[6, 8], [10, 12]]), m1 + m2)
+        self.assertEqual(Matrix.from_list([[-4, -4], [-4, -4]]), m1 - m2)
+        self.assertEqual(Matrix.from_list([[5, 12], [21, 32]]), m1 * m2)
+        self.assertEqual(Matrix.from_list([[19, 22], [43, 50]]), m1 @ m2)
+        self.assertEqual(Vector([5, 11]), m1 @ Vector([1, 2]))
+
+    def test_transpose_is_view(self): 
+        m1 = Matrix.from_list([[1, 2, 3], [4, 5, 6]])
+        t = m1.transpose()
+        self.assertEqual(Vector([1, 2, 3]), t.get_col(0))
+        t.set(2, 1, 10)
+        self.assertEqual(10, m1.get(1, 2))
+        with self.assertRaises(ValueError): 
+            m1.get(2, 0)
+
+    def test_solve_and_inverse(self): 
+        m1 = Matrix.from_list([[2, 1], [1, 3]])
+        x = m1.solve(Vector([3, 5]))
+        self.assertAlmostEqual(0.8, x.get(0))
+        self.assertAlmostEqual(1.4, x.get(1))
+        identity = m1 @ m1.inverse()
+        self.assertTrue(np.allclose(identity.data, np.eye(2)))
+        with self.assertRaises(ValueError): 
+            Matrix.from_list([[1, 2], [2, 4]]).inverse()
+
+    def test_affine_transform(self): 
+        transform = Matrix.translation(1, 2) @ Matrix.rotation(math.pi / 2) @ Matrix.scaling(2, 2)
+        points = np.array([[1.0, 0.0], [0.0, 1.0]])
+        self.assertTrue(np.allclose(transform.apply(points), [[1, 4], [-1, 2]]))
+        point = transform.apply_point(Vector([1, 0]))
+        self.assertAlmostEqual(1, point.get(0))
+        self.assertAlmostEqual(4, point.get(1))
+        back = transform.inverse().apply(transform.apply(points))
+        self.assertTrue(np.allclose(back, points))
     
 
 if __name__ == '__main__':
@@ -5,6 +5,7 @@ import math
 import numpy as np  
     
 class Vector: 
+    __slots__ = ('data', 'length')
 
     def __init__(self, data: list[float]): 
         if (not data or len(data) < 1): 
@@ -35,7 +36,7 @@ class Vector:
         return self.data
     
     def copy(self) -> Vector: 
-        return Vector(self.get_data())
+        return Vector(list(self.get_data()))
     
     def add(self, other: Vector):
         self.check_length_error(len(other))
@@ -147,16 +148,19 @@ class Vector:
 
     
 class Matrix: 
+    # The entries live in one numpy array, transpose gives a view on the same memory
 
-    def __init__(self, data: list[Vector]): 
+    def __init__(self, data: list[Vector] | np.ndarray): 
+        if isinstance(data, np.ndarray): 
+            if data.ndim != 2: 
+                raise ValueError("A matrix must have two dimensions")
+            self.data: np.ndarray = data if data.dtype == np.float64 else data.astype(np.float64)
+        else: 
+            if (not all([len(row) == len(data[0]) for row in data])): 
+                raise ValueError("All rows must have the same number as columns") 
+            self.data: np.ndarray = np.array([row.get_data() for row in data], dtype=np.float64)
 
-        if (not all([len(row) == len(data[0]) for row in data])): 
-            raise ValueError("All rows must have the same number as columns") 
-        
-        self.rows = len(data)
-        self.cols = len(data[0])
-        self.data: list[Vector] = data
-        self.data_t: list[Vector] = [Vector(list(column)) for column in zip(*[row.get_data() for row in data])]
+        self.rows, self.cols = self.data.shape
 
     @classmethod
     def from_list(cls, data: list[list[float]]): 
@@ -164,65 +168,118 @@ class Matrix:
     
     @classmethod
     def zero(cls, rows: int, cols: int): 
-        return cls([Vector([0] * cols) for _ in range(rows)])
+        return cls(np.zeros((rows, cols)))
+
+    @classmethod
+    def identity(cls, size: int): 
+        return cls(np.eye(size))
+
+    # 3x3 affine transformations of the plane, combine them with @ (the right one is applied first)
+    @classmethod
+    def translation(cls, dx: float, dy: float) -> Matrix: 
+        return cls(np.array([[1, 0, dx], [0, 1, dy], [0, 0, 1]], dtype=np.float64))
+
+    @classmethod
+    def scaling(cls, sx: float, sy: float) -> Matrix: 
+        return cls(np.array([[sx, 0, 0], [0, sy, 0], [0, 0, 1]], dtype=np.float64))
+
+    @classmethod
+    def rotation(cls, angle: float) -> Matrix: 
+        cos, sin = math.cos(angle), math.sin(angle)
+        return cls(np.array([[cos, -sin, 0], [sin, cos, 0], [0, 0, 1]], dtype=np.float64))
     
     def get_data(self) -> list[list[float]]: 
-        return [row.get_data() for row in self.data]
+        return self.data.tolist()
         
     def get(self, row: int, col: int) -> float: 
-        self.raise_col_error()
-        self.raise_row_error()
-        return self.data[row].get(col)
+        self.raise_col_error(col)
+        self.raise_row_error(row)
+        return float(self.data[row, col])
     
     def get_row(self, row: int) -> Vector: 
-        self.raise_row_error()
-        return self.data[row]
+        self.raise_row_error(row)
+        return Vector(self.data[row].tolist())
     
     def get_col(self, col: int) -> Vector: 
-        self.raise_col_error()
-        return self.data_t[col]
+        self.raise_col_error(col)
+        return Vector(self.data[:, col].tolist())
     
     def set(self, row: int, col: int, value: float): 
-        self.raise_col_error()
-        self.raise_row_error()
-        self.data[row].set(col, value)
+        self.raise_col_error(col)
+        self.raise_row_error(row)
+        self.data[row, col] = value
     
     def transpose(self) -> Matrix: 
-        return Matrix(self.data_t)
+        # a view, changing the transpose also changes this matrix
+        return Matrix(self.data.T)
     
     def determinant(self) -> float: 
         if self.rows != self.cols: 
             raise ValueError("Rows should be equal to the columns to take a determinant")
         
         if (self.rows == 2): 
-            return (self.data[0].get(0) * self.data[1].get(1)) - (self.data[0].get(1) * self.data[1].get(0))
+            return float((self.data[0, 0] * self.data[1, 1]) - (self.data[0, 1] * self.data[1, 0]))
 
-        return np.linalg.det([row.get_data() for row in self.data]) 
+        return float(np.linalg.det(self.data))
+
+    def inverse(self) -> Matrix: 
+        self.raise_square()
+        try: 
+            return Matrix(np.linalg.inv(self.data))
+        except np.linalg.LinAlgError: 
+            raise ValueError("The matrix is singular and has no inverse")
+
+    def solve(self, b: Vector | np.ndarray) -> Vector | np.ndarray: 
+        # Solves self x = b, b can be a Vector or an array with one right hand side per column
+        self.raise_square()
+        rhs = np.array(b.get_data(), dtype=np.float64) if isinstance(b, Vector) else np.asarray(b, dtype=np.float64)
+        if rhs.shape[0] != self.rows: 
+            raise ValueError(f"The right hand side must have {self.rows} rows")
+        try: 
+            x = np.linalg.solve(self.data, rhs)
+        except np.linalg.LinAlgError: 
+            raise ValueError("The matrix is singular, there is no unique solution")
+        return Vector(x.tolist()) if isinstance(b, Vector) else x
+
+    def apply(self, points): 
+        # Applies a 3x3 affine transformation to a PointArray or an (n, 2) array of points in one go
+        if self.rows != 3 or self.cols != 3: 
+            raise ValueError("Only a 3x3 matrix is an affine transformation of the plane")
+        coordinates = points if isinstance(points, np.ndarray) else points.data
+        transformed = coordinates @ self.data[:2, :2].T + self.data[:2, 2]
+        return transformed if isinstance(points, np.ndarray) else type(points)(transformed)
+
+    def apply_point(self, point: Vector) -> Vector: 
+        # point is a 2d Vector or a Point, the result has the same type
+        x, y, _ = (self.data @ (point.get(0), point.get(1), 1)).tolist()
+        return Vector([x, y]) if type(point) is Vector else type(point)(x, y)
 
-    def __abs__(self) -> float: 
-        pass
-    
     def __add__(self, other: Matrix) -> Matrix: 
         self.raise_same_size(other)
-        new_data = [self.data[i] + self.data[i] for i in range(self.rows)]
-        return Matrix(new_data) 
+        return Matrix(self.data + other.data)
     
     def __sub__(self, other: Matrix) -> Matrix: 
         self.raise_same_size(other)
-        new_data = [self.data[i] - self.data[i] for i in range(self.rows)]
-        return Matrix(new_data)
+        return Matrix(self.data - other.data)
     
-    def __mul__(self, other: Matrix) -> Matrix: 
+    def __mul__(self, other: Matrix | float) -> Matrix: 
+        # element wise, use @ for the matrix product
+        if isinstance(other, (int, float)): 
+            return Matrix(self.data * other)
         self.raise_same_size(other)
-        new_data = [self.data[i] * self.data[i] for i in range(self.rows)]
-        return Matrix(new_data)
+        return Matrix(self.data * other.data)
+
+    def __matmul__(self, other: Matrix | Vector) -> Matrix | Vector: 
+        if isinstance(other, Vector): 
+            if self.cols != len(other): 
+                raise ValueError(f"The vector must have {self.cols} values")
+            return Vector((self.data @ np.array(other.get_data(), dtype=np.float64)).tolist())
+        if self.cols != other.rows: 
+            raise ValueError(f"The matrix must have {self.cols} rows to multiply with it")
+        return Matrix(self.data @ other.data)
     
     def __eq__(self, other: Matrix) -> bool: 
-        for i in range(self.rows): 
-            if self.data[i] != other.data[i]: 
-                return False 
-        else: 
-            return True 
+        return self.data.shape == other.data.shape and bool(np.array_equal(self.data, other.data))
     
     def __ne__(self, other: Matrix) -> bool: 
         return not self == other
@@ -236,7 +293,7 @@ class Matrix:
     def __str__(self) -> str:
         output = '\n'
         for row in range(self.rows): 
-            output += str(self.data[row])
+            output += str(self.data[row].tolist())
             output += '\n'
         return output
 
@@ -247,14 +304,13 @@ class Matrix:
     def raise_col_error(self, col: int): 
         if (col < 0 or col >= self.cols): 
             raise ValueError(f"The column index must be > 0 and < {self.cols}") 
+
+    def raise_square(self): 
+        if self.rows != self.cols: 
+            raise ValueError("The matrix must be square")
         
     def raise_same_size(self, other: Matrix): 
         if (self.cols != other.cols): 
             raise ValueError(f"The matrices don't have the same amount of columns")
         if (self.rows != other.rows):  
             raise ValueError(f"The matrices don't have the same amount of rows")
-
-    
-
-
-    